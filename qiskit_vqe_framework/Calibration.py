@@ -6,6 +6,13 @@ from collections.abc import Iterable, Sequence
 import copy
 import os
 import pickle
+import json
+import hashlib
+import yaml
+from . import Serialization
+
+# yaml loader of the calibration files: libyaml C loader if pyyaml was built with libyaml (same constructor as yaml.Loader, i.e., python tags are supported), pure-python loader otherwise
+YAML_LOADER = getattr(yaml, "CLoader", yaml.Loader)
 
 class Calibration(metaclass=abc.ABCMeta):
     """Abstract base class for all calibration classes
@@ -30,19 +37,27 @@ class Calibration(metaclass=abc.ABCMeta):
         out = "Calibration(%s)" % ", ".join(string_list)
         return out
 
-    def to_dict(self) -> Dict:
+    def to_dict(self,
+                deep_copy: bool = True) -> Dict:
         """
+        Args:
+            deep_copy: If False, the dictionary is a read-only view, i.e., its values are the attributes of the calibration itself (e.g. noise models or initial parameter maps are not copied) and must not be modified.
+
         Returns:
             Calibration class properties as a dictionary.
         """
-        return copy.deepcopy(self.__dict__)
+        if deep_copy:
+            return copy.deepcopy(self.__dict__)
+        return copy.copy(self.__dict__)
 
     def to_pickle(self,
-                  fname: str):
+                  fname: str,
+                  out_of_band: bool = False):
         """Saves Calibration class in a serialized pickle file.
 
         Args:
             fname: Name of the file to which the object should be saved
+            out_of_band: If True, the file is written with pickle protocol 5 and out-of-band buffers (see Serialization.to_pickle), such that large arrays (e.g. of noise models) are not copied into the pickle stream and are memory-mapped on load.
 
         Raises:
             ValueError: if the file already exists.
@@ -50,6 +65,9 @@ class Calibration(metaclass=abc.ABCMeta):
         if os.path.isfile(fname):
             raise ValueError("file {} does already exist!".format(fname))
 
+        if out_of_band:
+            Serialization.to_pickle(self, fname)
+            return
         with open(fname, "wb") as f:
             pickle.dump(self, f)
 
@@ -61,4 +79,155 @@ class Calibration(metaclass=abc.ABCMeta):
             Header strings and the corresponding list of data as a tuple.
         """
 
+    def get_fingerprint(self) -> str:
+        """
+        Returns:
+            Hash of the calibration data, which is the same for calibrations with identical content.
+        """
+        return get_fingerprint([self])
+
+# canonical data of types that are no plain python or numpy data (type -> function returning the canonical data of an object, e.g. a content hash),
+# registered by the modules of these types (e.g. noise models in VQEEstimator.py, termination checkers in VQEOptimizer.py)
+FINGERPRINT_TYPES = {}
+
+def get_canonical_data(value):
+    """Canonical json-compatible form of calibration data, which is the same for data with identical content.
+    Dictionaries are sorted by key (when serialized), numpy scalars and arrays are converted to python numbers and lists, sets are sorted,
+    calibrations are given by their dictionary and the types in FINGERPRINT_TYPES by their registered canonical data. Other objects are given by their repr.
+
+    Args:
+        value: Calibration data.
+
+    Returns:
+        Canonical data (dictionaries, lists, strings, numbers, bools and None).
+    """
+    for value_type, get_data in FINGERPRINT_TYPES.items():
+        if isinstance(value, value_type):
+            return get_canonical_data(get_data(value))
+    if isinstance(value, Calibration):
+        return get_canonical_data(value.to_dict(deep_copy=False))
+    if isinstance(value, dict):
+        return {str(key): get_canonical_data(val) for key, val in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [get_canonical_data(val) for val in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((get_canonical_data(val) for val in value), key=lambda val: json.dumps(val, sort_keys=True))
+    if isinstance(value, np.ndarray):
+        return get_canonical_data(value.tolist())
+    if isinstance(value, np.generic):
+        return get_canonical_data(value.item())
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        # -0.0 and 0.0 are the same value
+        return value + 0.0
+    if isinstance(value, complex):
+        return {"real": value.real + 0.0, "imag": value.imag + 0.0}
+    return repr(value)
+
+def get_fingerprint(calibration_list: Sequence[Calibration],
+                    extra_data = None) -> str:
+    """Combined fingerprint of several calibrations, e.g., target model, ansatz and estimator calibration of a problem.
+    The canonical data of the calibrations (see get_canonical_data) is serialized to json with sorted keys and hashed.
+
+    Args:
+        calibration_list: List of calibrations.
+        extra_data: Optional additional data that is part of the fingerprint (e.g. the inputs of a run besides the calibrations).
+
+    Returns:
+        Hex digest of the sha256 hash of the calibration data.
+    """
+    data = [get_canonical_data(c) for c in calibration_list]
+    if extra_data is not None:
+        data = {"calibrations": data, "extra_data": get_canonical_data(extra_data)}
+    cal_json = json.dumps(data, sort_keys=True)
+    return hashlib.sha256(cal_json.encode("utf-8")).hexdigest()
+
+class CalibrationRegistry:
+    """Registry of shared calibration instances, one per fingerprint (see get_fingerprint). Interning a calibration returns the registered instance with the same content,
+    such that many results (e.g. of a parameter sweep) refer to a few shared calibrations (and noise models) instead of holding copies of them.
+    The registered calibrations are shared, i.e., they must be treated as immutable (use a copy to change a calibration).
+    """
+    def __init__(self) -> None:
+        self._calibrations = {}
+        # hash of the pickle of a calibration -> fingerprint, identical copies of a calibration (e.g. loaded from many result files) are only fingerprinted once
+        self._pickle_fingerprints = {}
+
+    def __repr__(self):
+        out = "CalibrationRegistry(num_calibrations={})".format(len(self._calibrations))
+        return out
+
+    def __len__(self):
+        return len(self._calibrations)
+
+    def __contains__(self, fingerprint: str) -> bool:
+        return fingerprint in self._calibrations
+
+    def get(self,
+            fingerprint: str) -> Union[Calibration, None]:
+        """
+        Args:
+            fingerprint: Fingerprint of a calibration.
+
+        Returns:
+            Registered calibration with the fingerprint, None if there is none.
+        """
+        return self._calibrations.get(fingerprint)
+
+    def get_fingerprint(self,
+                        calibration: Calibration) -> str:
+        """Fingerprint of a calibration (see Calibration.get_fingerprint). Pickling a calibration is much faster than building its canonical data (e.g. the content hash of a noise model),
+        so the fingerprints are cached by the hash of the pickle of the calibrations.
+
+        Args:
+            calibration: Calibration.
+
+        Returns:
+            Fingerprint of the calibration.
+        """
+        try:
+            pickle_hash = hashlib.sha256(pickle.dumps(calibration, protocol=5)).digest()
+        except Exception:
+            return calibration.get_fingerprint()
+        if pickle_hash not in self._pickle_fingerprints:
+            self._pickle_fingerprints[pickle_hash] = calibration.get_fingerprint()
+        return self._pickle_fingerprints[pickle_hash]
+
+    def intern(self,
+               calibration: Calibration,
+               fingerprint: Union[str, None] = None) -> Calibration:
+        """
+        Args:
+            calibration: Calibration.
+            fingerprint: Fingerprint of the calibration, computed if None (see get_fingerprint).
+
+        Returns:
+            Registered calibration with the same fingerprint, the given calibration is registered if there is none.
+        """
+        if fingerprint is None:
+            fingerprint = self.get_fingerprint(calibration)
+        return self._calibrations.setdefault(fingerprint, calibration)
+
+    def clear(self) -> None:
+        """Removes all calibrations from the registry.
+        """
+        self._calibrations.clear()
+        self._pickle_fingerprints.clear()
+
+# registry of the calibrations of loaded results (see VQEResult.intern_results)
+CALIBRATION_REGISTRY = CalibrationRegistry()
+
+def load_yaml(raw_data: str):
+    """Parses the content of a calibration yaml file with the C loader (if available).
+
+    Args:
+        raw_data: Content of the yaml file.
+
+    Returns:
+        Parsed data (dictionary for calibration files).
+    """
+    return yaml.load(raw_data, Loader=YAML_LOADER)
 
+def _load_yaml_files(files: Sequence[Tuple[str, str]]) -> List[Tuple[str, Dict]]:
+    # parse the contents of several yaml files given as (file name, content) tuples, used by the worker processes of the bulk loader (see VQErun.get_calibrations_from_yaml)
+    return [(fname, load_yaml(raw_data)) for fname, raw_data in files]
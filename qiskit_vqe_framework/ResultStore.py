@@ -0,0 +1,927 @@
+from __future__ import annotations
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from collections.abc import Iterable, Sequence
+from . import Calibration as cal
+from . import VQEResult as VQER
+from . import Serialization
+import os
+import shutil
+import time
+import uuid
+import yaml
+
+# column types of the schema and their numpy data types (str columns are stored with the maximal string length of every segment)
+COLUMN_DTYPES = {"bool": np.bool_, "int64": np.int64, "float64": np.float64, "complex128": np.complex128, "str": np.str_}
+
+# column types of the values that can be appended to a column of a type
+# (int64 columns are not inferred anymore, but can be in the schema of stores created before)
+COMPATIBLE_DTYPES = {"bool": ["bool"], "int64": ["int64"], "float64": ["int64", "float64"], "complex128": ["int64", "float64", "complex128"], "str": list(COLUMN_DTYPES.keys())}
+
+def _get_column_dtype(values: Sequence) -> str:
+    # infer the column type from the values of a column (None is stored as NaN in float and complex columns)
+    # integer columns are stored as float64, such that later batches with None (e.g. meas_shots) or non-integer values (e.g. g=-0.5 after g=-1) fit into the schema of the first batch
+    vals = [val for val in values if val is not None]
+    has_none = len(vals) < len(values)
+    if len(vals) == 0:
+        return "float64"
+    if not has_none and all(isinstance(val, (bool, np.bool_)) for val in vals):
+        return "bool"
+    if any(isinstance(val, (bool, np.bool_)) for val in vals):
+        return "str"
+    if all(isinstance(val, (int, float, np.integer, np.floating)) for val in vals):
+        return "float64"
+    if all(isinstance(val, (int, float, complex, np.number)) for val in vals):
+        return "complex128"
+    return "str"
+
+def _get_column_array(values: Sequence,
+                      dtype: str,
+                      name: str) -> np.ndarray:
+    # convert the values of a column to an array of the column type of the schema
+    if _get_column_dtype(values) not in COMPATIBLE_DTYPES[dtype]:
+        raise ValueError("values of column {} do not match the column type {}!".format(name, dtype))
+    if dtype == "str":
+        return np.array([str(val) for val in values], dtype=np.str_)
+    return np.array([np.nan if val is None else val for val in values], dtype=COLUMN_DTYPES[dtype])
+
+class ResultStore:
+    """Append-only columnar store of result file vectors (see get_filevector of VQEResult, ReferenceResult and InferenceResult).
+    Every column is stored as a typed numpy array. Every append writes a new segment directory with one .npy file per column, which is renamed into the store when it is complete,
+    so concurrent workers can append to the same store and readers only see complete segments. The columns are read with memory mapping.
+
+    Directory layout:
+        schema.yaml: column names (file vector header) and column types
+        segments/<segment>/<column index>.npy: column values of the rows of a segment
+    """
+    def __init__(self,
+                 path: str) -> None:
+        """
+        Args:
+            path: Directory of the store. It is created if it does not exist.
+        """
+        self._path = path
+        self._segments_path = os.path.join(path, "segments")
+        os.makedirs(self._segments_path, exist_ok=True)
+        self._header = None
+        self._dtypes = None
+        # (segment, column name) -> (distinct values, positions of the row values in the distinct values), segments are never modified
+        self._segment_indexes = {}
+        self._load_schema()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def header(self) -> Union[List[str], None]:
+        """Column names of the store (None if nothing was appended yet).
+        """
+        self._load_schema()
+        return self._header
+
+    @property
+    def dtypes(self) -> Union[List[str], None]:
+        """Column types of the store (None if nothing was appended yet).
+        """
+        self._load_schema()
+        return self._dtypes
+
+    @property
+    def num_rows(self) -> int:
+        num = 0
+        for segment in self.get_segments():
+            num += self._get_segment_length(segment)
+        return num
+
+    def __repr__(self):
+        out = "ResultStore(path={})".format(self._path)
+        return out
+
+    def __len__(self):
+        return self.num_rows
+
+    def _load_schema(self) -> None:
+        # read the schema if it was created (by this or another process)
+        if self._header is not None:
+            return
+        fname = os.path.join(self._path, "schema.yaml")
+        if not os.path.isfile(fname):
+            return
+        with open(fname, "r") as f:
+            schema = yaml.safe_load(f)
+        self._header = schema["header"]
+        self._dtypes = schema["dtypes"]
+
+    def _create_schema(self,
+                       header: List[str],
+                       dtypes: List[str]) -> None:
+        # write the schema atomically, the schema of a concurrent worker that was created first is kept
+        fname = os.path.join(self._path, "schema.yaml")
+        fname_tmp = os.path.join(self._path, "schema-{}.tmp".format(uuid.uuid4().hex))
+        with open(fname_tmp, "w") as f:
+            yaml.safe_dump({"header": list(header), "dtypes": list(dtypes)}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.link(fname_tmp, fname)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(fname_tmp)
+        self._load_schema()
+
+    def get_segments(self) -> List[str]:
+        """
+        Returns:
+            Names of the complete segments in the order they were appended, without segments that were replaced by compact.
+        """
+        names = sorted(name for name in os.listdir(self._segments_path) if not name.startswith("."))
+        replaced = set()
+        for name in names:
+            fname = os.path.join(self._segments_path, name, "replaces.txt")
+            if os.path.isfile(fname):
+                with open(fname, "r") as f:
+                    replaced.update(f.read().split())
+        return [name for name in names if name not in replaced]
+
+    def _get_segment_length(self,
+                            segment: str) -> int:
+        return len(np.load(os.path.join(self._segments_path, segment, "0.npy"), mmap_mode="r"))
+
+    def _write_segment(self,
+                       columns: List[np.ndarray],
+                       replaces: Union[List[str], None] = None) -> str:
+        # write all columns to a hidden directory and rename it into the store when it is complete
+        # segment names start with the creation time, a merged segment keeps the position of the oldest replaced segment
+        timestamp = "{:020d}".format(time.time_ns()) if replaces is None else replaces[0].split("-")[0]
+        name = "{}-{}-{}".format(timestamp, os.getpid(), uuid.uuid4().hex)
+        tmp_path = os.path.join(self._segments_path, "." + name)
+        os.makedirs(tmp_path)
+        for idx, col in enumerate(columns):
+            with open(os.path.join(tmp_path, "{}.npy".format(idx)), "wb") as f:
+                np.save(f, col)
+                f.flush()
+                os.fsync(f.fileno())
+        if replaces is not None:
+            with open(os.path.join(tmp_path, "replaces.txt"), "w") as f:
+                f.write("\n".join(replaces))
+        os.rename(tmp_path, os.path.join(self._segments_path, name))
+        return name
+
+    def append_rows(self,
+                    header: List[str],
+                    rows: Sequence[Sequence]) -> None:
+        """Appends rows of file vector data as one segment. The first append defines the schema of the store (column types inferred from the values).
+
+        Args:
+            header: Column names of the rows.
+            rows: Data of the rows (same length as header).
+
+        Raises:
+            ValueError: If the header does not match the schema of the store or a row has the wrong length.
+        """
+        if len(rows) == 0:
+            return
+        for row in rows:
+            if len(row) != len(header):
+                raise ValueError("row with {} values does not match the header with {} columns!".format(len(row), len(header)))
+        values = list(zip(*rows))
+
+        if self.header is None:
+            self._create_schema(header, [_get_column_dtype(list(col)) for col in values])
+        if list(header) != self._header:
+            raise ValueError("header {} does not match the schema of the result store {}!".format(header, self._header))
+
+        columns = [_get_column_array(list(col), dtype, name) for col, dtype, name in zip(values, self._dtypes, self._header)]
+        self._write_segment(columns)
+
+    def append_results(self,
+                       results: Sequence[Union[VQER.VQEResult, VQER.ReferenceResult, VQER.InferenceResult]]) -> None:
+        """Appends the file vectors of results as one segment.
+
+        Args:
+            results: Results with the same file vector header.
+
+        Raises:
+            ValueError: If the file vector headers of the results differ.
+        """
+        header = None
+        rows = []
+        for result in results:
+            curr_header, curr_data = result.get_filevector()
+            if header is None:
+                header = curr_header
+            elif curr_header != header:
+                raise ValueError("file vector header of {} does not match the header of the other results!".format(result))
+            rows.append(curr_data)
+        if header is not None:
+            self.append_rows(header, rows)
+
+    def get_column_dtype(self,
+                         name: str) -> str:
+        """
+        Args:
+            name: Column name.
+
+        Returns:
+            Column type of the schema (see COLUMN_DTYPES).
+
+        Raises:
+            ValueError: If the column does not exist.
+        """
+        header = self.header
+        if header is None or name not in header:
+            raise ValueError("column {} does not exist in the result store!".format(name))
+        return self._dtypes[header.index(name)]
+
+    def get_column_segments(self,
+                            name: str,
+                            mmap: bool = True,
+                            segments: Union[Sequence[str], None] = None) -> List[np.ndarray]:
+        """
+        Args:
+            name: Column name.
+            mmap: If True, the arrays are memory-mapped (read-only).
+            segments: Names of the segments (all complete segments if None).
+
+        Returns:
+            Arrays of the column values of the segments.
+
+        Raises:
+            ValueError: If the column does not exist.
+        """
+        self.get_column_dtype(name)
+        idx = self._header.index(name)
+        mmap_mode = "r" if mmap else None
+        if segments is None:
+            segments = self.get_segments()
+        return [np.load(os.path.join(self._segments_path, segment, "{}.npy".format(idx)), mmap_mode=mmap_mode) for segment in segments]
+
+    def get_column(self,
+                   name: str,
+                   segments: Union[Sequence[str], None] = None) -> np.ndarray:
+        """
+        Args:
+            name: Column name.
+            segments: Names of the segments (all complete segments if None).
+
+        Returns:
+            Array of the column values of all rows.
+        """
+        dtype = self.get_column_dtype(name)
+        column_segments = self.get_column_segments(name, segments=segments)
+        if len(column_segments) == 0:
+            return np.array([], dtype=COLUMN_DTYPES[dtype])
+        return np.concatenate(column_segments)
+
+    def get_index(self,
+                  name: str,
+                  segments: Union[Sequence[str], None] = None) -> ColumnIndex:
+        """Index of a column, e.g. of a calibration field like g, num_layers or optimizer. The index of every segment is built once per store object and the indexes of the segments are merged.
+
+        Args:
+            name: Column name.
+            segments: Names of the segments (all complete segments if None).
+
+        Returns:
+            Index of the column values of all rows.
+        """
+        if segments is None:
+            segments = self.get_segments()
+        segment_indexes = []
+        for segment, column in zip(segments, self.get_column_segments(name, segments=segments)):
+            if (segment, name) not in self._segment_indexes:
+                self._segment_indexes[(segment, name)] = np.unique(column, return_inverse=True)
+            segment_indexes.append(self._segment_indexes[(segment, name)])
+        if len(segment_indexes) == 0:
+            return ColumnIndex(np.array([], dtype=COLUMN_DTYPES[self.get_column_dtype(name)]), np.array([], dtype=np.int64))
+        values = np.unique(np.concatenate([segment_values for segment_values, _ in segment_indexes]))
+        codes = np.concatenate([np.searchsorted(values, segment_values)[segment_codes] for segment_values, segment_codes in segment_indexes])
+        return ColumnIndex(values, codes.astype(np.int64))
+
+    def query(self) -> ResultQuery:
+        """
+        Returns:
+            Query of all rows of the complete segments (see ResultQuery).
+        """
+        return ResultQuery(self)
+
+    def get_columns(self,
+                    names: Union[List[str], None] = None) -> Dict[str, np.ndarray]:
+        """
+        Args:
+            names: Column names (all columns if None).
+
+        Returns:
+            Dictionary with the arrays of the column values of all rows.
+        """
+        if names is None:
+            names = self.header if self.header is not None else []
+        return {name: self.get_column(name) for name in names}
+
+    def compact(self) -> None:
+        """Merges all segments into one segment. The merged segment replaces the other ones atomically, before they are removed.
+        Appends of concurrent workers are kept, but only one process may compact the store at a time and reads that listed the segments before the compaction may fail.
+        """
+        segments = self.get_segments()
+        if len(segments) <= 1:
+            return
+        columns = []
+        for idx in range(len(self.header)):
+            columns.append(np.concatenate([np.load(os.path.join(self._segments_path, segment, "{}.npy".format(idx)), mmap_mode="r") for segment in segments]))
+        self._write_segment(columns, replaces=segments)
+        for segment in segments:
+            shutil.rmtree(os.path.join(self._segments_path, segment))
+
+class ColumnIndex:
+    """Index of a column of a result store: the sorted distinct values of the column and, for every row, the position of its value in the distinct values.
+    Equality filters and groupings of rows only work on the integer positions.
+    """
+    def __init__(self,
+                 values: np.ndarray,
+                 codes: np.ndarray) -> None:
+        """
+        Args:
+            values: Sorted distinct values of the column.
+            codes: Position of the value of every row in values.
+        """
+        self._values = values
+        self._codes = codes
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self._codes
+
+    def __repr__(self):
+        out = "ColumnIndex(num_values={}, num_rows={})".format(len(self._values), len(self._codes))
+        return out
+
+    def __len__(self):
+        return len(self._codes)
+
+    def get_mask(self,
+                 values: Sequence) -> np.ndarray:
+        """
+        Args:
+            values: Values of the column.
+
+        Returns:
+            Boolean array that is True for the rows with one of the values.
+        """
+        if len(values) == 0:
+            return np.zeros(len(self._codes), dtype=bool)
+        # the values are not cast to the column type (e.g. longer strings would be truncated)
+        values = np.asarray(values)
+        positions = np.searchsorted(self._values, values)
+        # positions of values that are not in the column are dropped
+        found = positions < len(self._values)
+        matches = self._values[positions[found]] == values[found]
+        if values.dtype.kind in "fc":
+            # NaN (None in float columns) is in the column if it is the last distinct value
+            matches |= np.isnan(values[found]) & np.isnan(self._values[positions[found]])
+        found[found] = matches
+        return np.isin(self._codes, positions[found])
+
+# comparison operators of ResultQuery.where
+QUERY_OPERATORS = {"==": np.equal, "!=": np.not_equal, "<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal}
+
+# aggregation functions of ResultGroups.aggregate, applied to the values of a group
+AGGREGATIONS = ["count", "min", "max", "sum", "mean", "std", "first"]
+
+class ResultQuery:
+    """Query of the rows of a result store that are selected by filters on the columns, e.g. all VQE results of an ansatz with a given number of shots.
+    The query only reads the columns that are used (memory-mapped), equality filters and groupings use the column indexes of the store (see ResultStore.get_index).
+    The rows are the ones of the segments that were complete when the query of the store was created, later appends are not part of the query.
+    Filters return new queries, i.e., a query can be refined in several ways.
+    """
+    def __init__(self,
+                 store: ResultStore,
+                 segments: Union[Sequence[str], None] = None,
+                 mask: Union[np.ndarray, None] = None) -> None:
+        """
+        Args:
+            store: Result store.
+            segments: Names of the segments of the rows (all complete segments if None).
+            mask: Boolean array of the selected rows of the segments (all rows if None).
+        """
+        self._store = store
+        self._segments = list(store.get_segments() if segments is None else segments)
+        if mask is None:
+            num_rows = sum(store._get_segment_length(segment) for segment in self._segments)
+            mask = np.ones(num_rows, dtype=bool)
+        self._mask = mask
+
+    @property
+    def store(self) -> ResultStore:
+        return self._store
+
+    @property
+    def mask(self) -> np.ndarray:
+        """Boolean array of the selected rows of the store.
+        """
+        return self._mask
+
+    @property
+    def num_rows(self) -> int:
+        return int(np.count_nonzero(self._mask))
+
+    def __repr__(self):
+        out = "ResultQuery(store={}, num_rows={})".format(self._store, self.num_rows)
+        return out
+
+    def __len__(self):
+        return self.num_rows
+
+    def get_index(self,
+                  name: str) -> ColumnIndex:
+        """
+        Args:
+            name: Column name.
+
+        Returns:
+            Index of the column values of all rows of the segments of the query (not only the selected ones).
+        """
+        return self._store.get_index(name, segments=self._segments)
+
+    def _get_value(self,
+                   name: str,
+                   value):
+        # values of str columns are compared with their string (e.g. None is stored as "None"), None is stored as NaN in the other columns
+        if self._store.get_column_dtype(name) == "str":
+            return str(value)
+        if value is None:
+            return np.nan
+        return value
+
+    def where(self,
+              name: str,
+              operator: str = "==",
+              value = None) -> ResultQuery:
+        """Filters the rows by the values of a column.
+
+        Args:
+            name: Column name.
+            operator: Comparison operator (see QUERY_OPERATORS) or "in" to select the rows with one of the values of a sequence.
+            value: Value (or sequence of values for "in") the column values are compared with.
+
+        Returns:
+            Query of the selected rows that fulfill the condition.
+
+        Raises:
+            ValueError: If the operator is not supported.
+        """
+        if operator in ["==", "!=", "in"]:
+            values = value if operator == "in" else [value]
+            mask = self.get_index(name).get_mask([self._get_value(name, val) for val in values])
+            if operator == "!=":
+                mask = ~mask
+        elif operator in QUERY_OPERATORS:
+            mask = QUERY_OPERATORS[operator](self._store.get_column(name, segments=self._segments), self._get_value(name, value))
+        else:
+            raise ValueError("operator {} is not supported! Use one of {}.".format(operator, list(QUERY_OPERATORS.keys()) + ["in"]))
+        return ResultQuery(self._store, self._segments, self._mask & mask)
+
+    def get_rows(self) -> np.ndarray:
+        """
+        Returns:
+            Row numbers of the selected rows in the segments of the query.
+        """
+        return np.flatnonzero(self._mask)
+
+    def get_column(self,
+                   name: str) -> np.ndarray:
+        """
+        Args:
+            name: Column name.
+
+        Returns:
+            Array of the column values of the selected rows.
+        """
+        return self._store.get_column(name, segments=self._segments)[self._mask]
+
+    def get_columns(self,
+                    names: Union[List[str], None] = None) -> Dict[str, np.ndarray]:
+        """
+        Args:
+            names: Column names (all columns if None).
+
+        Returns:
+            Dictionary with the arrays of the column values of the selected rows.
+        """
+        if names is None:
+            names = self._store.header if self._store.header is not None else []
+        return {name: self.get_column(name) for name in names}
+
+    def group_by(self,
+                 names: Union[str, Sequence[str]]) -> ResultGroups:
+        """
+        Args:
+            names: Column name or names whose distinct value combinations define the groups, e.g. ["g", "num_layers"].
+
+        Returns:
+            Groups of the selected rows.
+        """
+        if isinstance(names, str):
+            names = [names]
+        indexes = [self.get_index(name) for name in names]
+        codes = tuple(index.codes[self._mask] for index in indexes)
+        dims = tuple(max(len(index.values), 1) for index in indexes)
+        try:
+            # the combination of the index positions is a single integer, the groups are sorted by the key values of the first column, then the second column, ...
+            group_keys, group_ids = np.unique(np.ravel_multi_index(codes, dims), return_inverse=True)
+            group_codes = np.unravel_index(group_keys, dims)
+        except ValueError:
+            # too many value combinations for a single integer
+            group_codes, group_ids = np.unique(np.stack(codes, axis=1), axis=0, return_inverse=True)
+            group_codes = group_codes.T
+        keys = {name: index.values[group_codes[i]] for i, (name, index) in enumerate(zip(names, indexes))}
+        return ResultGroups(self, keys, group_ids.reshape(-1))
+
+class ResultGroups:
+    """Groups of the selected rows of a result query with the same values of the group columns (see ResultQuery.group_by). The groups are sorted by their key values.
+    """
+    def __init__(self,
+                 query: ResultQuery,
+                 keys: Dict[str, np.ndarray],
+                 group_ids: np.ndarray) -> None:
+        """
+        Args:
+            query: Query of the grouped rows.
+            keys: Dictionary with the values of the group columns of every group.
+            group_ids: Group of every selected row of the query.
+        """
+        self._query = query
+        self._keys = keys
+        self._group_ids = group_ids
+
+    @property
+    def keys(self) -> Dict[str, np.ndarray]:
+        return self._keys
+
+    @property
+    def group_ids(self) -> np.ndarray:
+        return self._group_ids
+
+    @property
+    def num_groups(self) -> int:
+        return len(next(iter(self._keys.values()))) if len(self._keys) > 0 else 0
+
+    def __repr__(self):
+        out = "ResultGroups(keys={}, num_groups={})".format(list(self._keys.keys()), self.num_groups)
+        return out
+
+    def __len__(self):
+        return self.num_groups
+
+    def aggregate(self,
+                  aggregations: Dict[str, Union[str, Sequence[str]]]) -> Dict[str, np.ndarray]:
+        """Aggregates the column values of every group.
+
+        Args:
+            aggregations: Dictionary with the column names and the aggregation function or functions (see AGGREGATIONS), e.g. {"energy_vqe": ["min", "mean"]}.
+
+        Returns:
+            Dictionary with the group keys and the aggregated values of every group, the aggregated columns are named <column name>_<aggregation>.
+
+        Raises:
+            ValueError: If an aggregation function is not supported.
+        """
+        out = dict(self._keys)
+        num_groups = self.num_groups
+        count = np.bincount(self._group_ids, minlength=num_groups)
+        # rows sorted by group, starts of the groups in the sorted rows
+        order = np.argsort(self._group_ids, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(count)[:-1]]).astype(np.int64)
+        for name, funcs in aggregations.items():
+            if isinstance(funcs, str):
+                funcs = [funcs]
+            values = None
+            for func in funcs:
+                if func not in AGGREGATIONS:
+                    raise ValueError("aggregation {} is not supported! Use one of {}.".format(func, AGGREGATIONS))
+                if func == "count":
+                    out[name + "_count"] = count
+                    continue
+                if values is None:
+                    values = self._query.get_column(name)[order]
+                if num_groups == 0:
+                    out[name + "_" + func] = values[:0]
+                elif func == "first":
+                    out[name + "_first"] = values[starts]
+                elif func == "min":
+                    out[name + "_min"] = np.minimum.reduceat(values, starts)
+                elif func == "max":
+                    out[name + "_max"] = np.maximum.reduceat(values, starts)
+                elif func == "sum":
+                    out[name + "_sum"] = np.add.reduceat(values, starts)
+                elif func == "mean":
+                    out[name + "_mean"] = np.add.reduceat(values, starts)/count
+                elif func == "std":
+                    mean = np.add.reduceat(values, starts)/count
+                    out[name + "_std"] = np.sqrt(np.maximum(np.add.reduceat(values*values, starts)/count - mean*mean, 0.0))
+        return out
+
+    def get_best(self,
+                 name: str,
+                 columns: Union[List[str], None] = None,
+                 maximize: bool = False) -> Dict[str, np.ndarray]:
+        """Selects the row with the minimal (or maximal) value of a column in every group, e.g. the best VQE energy per (g, num_layers). NaN values are only selected if a group has no other values.
+
+        Args:
+            name: Column name of the values, e.g. "energy_vqe".
+            columns: Names of additional columns of the selected rows, e.g. the angles.
+            maximize: If True, the row with the maximal value is selected.
+
+        Returns:
+            Dictionary with the group keys, the values of the column and of the additional columns of the selected row of every group.
+        """
+        values = self._query.get_column(name)
+        sort_values = -values if maximize else values
+        # rows sorted by group and by value within the group, the first row of every group is the best one
+        order = np.lexsort((sort_values, self._group_ids))
+        sorted_ids = self._group_ids[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = sorted_ids[1:] != sorted_ids[:-1]
+        best_rows = order[first]
+
+        out = dict(self._keys)
+        out[name] = values[best_rows]
+        for column in columns if columns is not None else []:
+            out[column] = self._query.get_column(column)[best_rows]
+        return out
+
+# numeric entries of the estimator metadata that are kept as intermediate results columns (NaN if not available)
+IRESULTS_META_COLUMNS = ["variance", "shots"]
+
+class IResultsSink:
+    """Streams the intermediate results of a VQE run (see the callback of run_vqe) to disk in chunks of fixed size, such that the memory usage does not grow with the number of cost function evaluations.
+    Every chunk is a directory with one .npy file per column (num_cost_fctn_calls, energy_values, circ_params and the numeric estimator metadata in IRESULTS_META_COLUMNS),
+    which is renamed into the sink directory when it is complete. The chunks are read with IResultsReader.
+    """
+    def __init__(self,
+                 path: str,
+                 chunk_size: int = 1000) -> None:
+        """
+        Args:
+            path: Directory of the intermediate results. It must not contain intermediate results yet.
+            chunk_size: Number of cost function evaluations per chunk.
+
+        Raises:
+            ValueError: If the chunk size is not positive or the directory already contains intermediate results.
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk size {} must be a positive integer!".format(chunk_size))
+        os.makedirs(path, exist_ok=True)
+        if len(os.listdir(path)) != 0:
+            raise ValueError("directory {} does already contain data!".format(path))
+        self._path = path
+        self._chunk_size = chunk_size
+        self._num_chunks = 0
+        self._num_rows = 0
+        self._buffer = None
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def num_rows(self) -> int:
+        """Number of cost function evaluations (written and buffered).
+        """
+        return self._num_rows
+
+    def __repr__(self):
+        out = "IResultsSink(path={}, chunk_size={})".format(self._path, self._chunk_size)
+        return out
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _get_buffer(self,
+                    num_params: int) -> Dict[str, np.ndarray]:
+        # preallocated columns of one chunk
+        buffer = {"num_cost_fctn_calls": np.zeros(self._chunk_size, dtype=np.int64),
+                  "energy_values": np.zeros(self._chunk_size),
+                  "circ_params": np.zeros((self._chunk_size, num_params))}
+        for key in IRESULTS_META_COLUMNS:
+            buffer[key] = np.full(self._chunk_size, np.nan)
+        return buffer
+
+    def callback(self,
+                 eval_count: int,
+                 params: Sequence[float],
+                 mean: float,
+                 meta: Dict) -> None:
+        """VQE callback that adds the result of a cost function evaluation and writes the chunk if it is full.
+        """
+        if self._buffer is None:
+            self._buffer = self._get_buffer(len(params))
+        idx = self._num_rows - self._num_chunks*self._chunk_size
+        self._buffer["num_cost_fctn_calls"][idx] = eval_count
+        self._buffer["energy_values"][idx] = mean
+        self._buffer["circ_params"][idx] = params
+        for key in IRESULTS_META_COLUMNS:
+            val = None if meta is None else meta.get(key, None)
+            self._buffer[key][idx] = np.nan if val is None else val
+        self._num_rows += 1
+        if idx + 1 == self._chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the buffered cost function evaluations as a chunk.
+        """
+        num = self._num_rows - self._num_chunks*self._chunk_size
+        if num == 0:
+            return
+        name = "chunk-{:08d}".format(self._num_chunks)
+        tmp_path = os.path.join(self._path, "." + name)
+        os.makedirs(tmp_path)
+        for key, col in self._buffer.items():
+            with open(os.path.join(tmp_path, key + ".npy"), "wb") as f:
+                np.save(f, col[:num])
+        os.rename(tmp_path, os.path.join(self._path, name))
+        self._num_chunks += 1
+
+    def close(self) -> None:
+        """Writes the remaining buffered cost function evaluations.
+        """
+        self.flush()
+        self._buffer = None
+
+class IResultsReader:
+    """Reads the intermediate results written by IResultsSink with memory mapping.
+    """
+    def __init__(self,
+                 path: str) -> None:
+        """
+        Args:
+            path: Directory of the intermediate results.
+
+        Raises:
+            ValueError: If the directory does not exist.
+        """
+        if not os.path.isdir(path):
+            raise ValueError("directory {} does not exist!".format(path))
+        self._path = path
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def header(self) -> List[str]:
+        return ["num_cost_fctn_calls", "energy_values", "circ_params"] + IRESULTS_META_COLUMNS
+
+    @property
+    def num_rows(self) -> int:
+        return sum(len(chunk) for chunk in self.get_column_chunks("num_cost_fctn_calls"))
+
+    def __repr__(self):
+        out = "IResultsReader(path={})".format(self._path)
+        return out
+
+    def __len__(self):
+        return self.num_rows
+
+    def get_chunks(self) -> List[str]:
+        """
+        Returns:
+            Names of the complete chunks in the order they were written.
+        """
+        return sorted(name for name in os.listdir(self._path) if name.startswith("chunk-"))
+
+    def get_column_chunks(self,
+                          name: str,
+                          mmap: bool = True) -> List[np.ndarray]:
+        """
+        Args:
+            name: Column name (see header).
+            mmap: If True, the arrays are memory-mapped (read-only).
+
+        Returns:
+            Arrays of the column values of all chunks.
+
+        Raises:
+            ValueError: If the column does not exist.
+        """
+        if name not in self.header:
+            raise ValueError("column {} does not exist in the intermediate results!".format(name))
+        mmap_mode = "r" if mmap else None
+        return [np.load(os.path.join(self._path, chunk, name + ".npy"), mmap_mode=mmap_mode) for chunk in self.get_chunks()]
+
+    def get_column(self,
+                   name: str) -> np.ndarray:
+        """
+        Args:
+            name: Column name (see header).
+
+        Returns:
+            Array of the column values of all cost function evaluations (circ_params has one row per evaluation).
+        """
+        chunks = self.get_column_chunks(name)
+        if len(chunks) == 0:
+            return np.array([])
+        return np.concatenate(chunks)
+
+    def get_iresults_dict(self) -> Dict[str, np.ndarray]:
+        """
+        Returns:
+            Intermediate results dictionary like the one of run_vqe (with arrays instead of lists and the metadata columns instead of the metadata dictionaries).
+        """
+        return {name: self.get_column(name) for name in self.header}
+
+class RunRegistry:
+    """Registry of the outputs of completed runs (e.g. run_vqe), keyed by the run type and the canonical fingerprint of the calibrations and inputs of the run (see Calibration.get_fingerprint).
+    A run whose key is in the registry is not executed again, its stored output is returned instead. Every output is a pickle file with out-of-band buffers (see Serialization.to_pickle),
+    which is written atomically, so concurrent workers can share a registry and only see complete outputs.
+
+    Directory layout:
+        <run type>_<fingerprint>.pickle: output of a run
+    """
+    def __init__(self,
+                 path: str) -> None:
+        """
+        Args:
+            path: Directory of the registry. It is created if it does not exist.
+        """
+        self._path = path
+        os.makedirs(path, exist_ok=True)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def __repr__(self):
+        out = "RunRegistry(path={})".format(self._path)
+        return out
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.isfile(self.get_fname(key))
+
+    @staticmethod
+    def get_key(run_type: str,
+                calibration_list: Sequence[cal.Calibration],
+                extra_data = None) -> str:
+        """
+        Args:
+            run_type: Name of the run type, e.g. "vqe".
+            calibration_list: Calibrations of the run.
+            extra_data: Other inputs of the run that determine its output (see Calibration.get_fingerprint).
+
+        Returns:
+            Key of the run.
+        """
+        return "{}_{}".format(run_type, cal.get_fingerprint(calibration_list, extra_data))
+
+    def get_fname(self,
+                  key: str) -> str:
+        """
+        Args:
+            key: Key of a run (see get_key).
+
+        Returns:
+            Name of the file of the output of the run.
+        """
+        return os.path.join(self._path, key + ".pickle")
+
+    def keys(self) -> List[str]:
+        """
+        Returns:
+            Keys of all runs in the registry.
+        """
+        return sorted(name[:-len(".pickle")] for name in os.listdir(self._path) if name.endswith(".pickle"))
+
+    def get(self,
+            key: str):
+        """
+        Args:
+            key: Key of a run (see get_key).
+
+        Returns:
+            Stored output of the run, None if the run is not in the registry.
+        """
+        if key not in self:
+            return None
+        return Serialization.get_object_from_pickle(self.get_fname(key), mmap_mode=False)
+
+    def add(self,
+            key: str,
+            output) -> None:
+        """Stores the output of a run, the output of a run that is already in the registry is replaced.
+
+        Args:
+            key: Key of the run (see get_key).
+            output: Output of the run.
+        """
+        Serialization.to_pickle(output, self.get_fname(key))
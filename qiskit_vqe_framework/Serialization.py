@@ -0,0 +1,127 @@
+from __future__ import annotations
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from collections.abc import Iterable, Sequence
+import mmap
+import os
+import pickle
+import struct
+
+# pickle files with out-of-band buffers: header (magic, format version, number of buffers, offset and length of the pickle stream), buffer table (offset and length of every buffer),
+# pickle stream and the raw buffers, every buffer starts at a multiple of PICKLE_ALIGNMENT bytes
+PICKLE_MAGIC = b"VQEPKL5\0"
+PICKLE_VERSION = 1
+PICKLE_HEADER_FORMAT = "<8sIIQQ"
+PICKLE_BUFFER_FORMAT = "<QQ"
+PICKLE_ALIGNMENT = 64
+
+def _get_aligned(offset: int) -> int:
+    return -(-offset // PICKLE_ALIGNMENT) * PICKLE_ALIGNMENT
+
+def get_pickle_buffers(obj) -> Tuple[bytes, List[memoryview]]:
+    """Serializes an object with pickle protocol 5, the data of large contiguous buffers (e.g. numpy arrays) is not copied into the pickle stream but returned out-of-band.
+
+    Args:
+        obj: Object to serialize.
+
+    Returns:
+        Pickle stream and the raw (byte) memoryviews of the out-of-band buffers as a tuple.
+    """
+    buffers = []
+    data = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    return data, [buffer.raw() for buffer in buffers]
+
+def get_object_from_buffers(data: Union[bytes, memoryview],
+                            buffers: Sequence[Union[bytes, bytearray, memoryview]]):
+    """Inverse of get_pickle_buffers. The out-of-band buffers are used without copying, i.e., numpy arrays are views of the given buffers (read-only for read-only buffers).
+
+    Args:
+        data: Pickle stream.
+        buffers: Out-of-band buffers in the order returned by get_pickle_buffers.
+
+    Returns:
+        Deserialized object.
+    """
+    return pickle.loads(data, buffers=buffers)
+
+def to_pickle(obj,
+              fname: str) -> None:
+    """Saves an object in a pickle file with out-of-band buffers (pickle protocol 5). The buffers are written as separate aligned blobs behind the pickle stream, such that they can be memory-mapped on load.
+    The file is written to a temporary file and renamed when it is complete, i.e., an existing file is only replaced by a completely written one.
+
+    Args:
+        obj: Object to serialize.
+        fname: Name of the file.
+    """
+    data, buffers = get_pickle_buffers(obj)
+    header_size = struct.calcsize(PICKLE_HEADER_FORMAT) + len(buffers)*struct.calcsize(PICKLE_BUFFER_FORMAT)
+    buffer_table = []
+    offset = _get_aligned(header_size + len(data))
+    for buffer in buffers:
+        buffer_table.append((offset, buffer.nbytes))
+        offset = _get_aligned(offset + buffer.nbytes)
+
+    fname_tmp = fname + ".{}.tmp".format(os.getpid())
+    with open(fname_tmp, "wb") as f:
+        f.write(struct.pack(PICKLE_HEADER_FORMAT, PICKLE_MAGIC, PICKLE_VERSION, len(buffers), header_size, len(data)))
+        for buffer_offset, buffer_length in buffer_table:
+            f.write(struct.pack(PICKLE_BUFFER_FORMAT, buffer_offset, buffer_length))
+        f.write(data)
+        for (buffer_offset, _), buffer in zip(buffer_table, buffers):
+            f.write(b"\0"*(buffer_offset - f.tell()))
+            f.write(buffer)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(fname_tmp, fname)
+
+def is_out_of_band_pickle(fname: str) -> bool:
+    """
+    Args:
+        fname: Name of the file.
+
+    Returns:
+        True if the file was written by to_pickle (pickle file with out-of-band buffers), False otherwise (e.g. a plain pickle file).
+    """
+    with open(fname, "rb") as f:
+        return f.read(len(PICKLE_MAGIC)) == PICKLE_MAGIC
+
+def get_object_from_pickle(fname: str,
+                           mmap_mode: bool = True):
+    """Loads an object from a pickle file with out-of-band buffers (see to_pickle) or from a plain pickle file.
+
+    Args:
+        fname: Name of the file.
+        mmap_mode: If True, the out-of-band buffers are memory-mapped, i.e., numpy arrays are read-only views of the file and their data is only read when it is accessed.
+            If False, the file is read into memory at once and the arrays are writable views of this memory.
+
+    Returns:
+        Deserialized object.
+
+    Raises:
+        ValueError: If the file does not exist or is corrupted.
+    """
+    if not os.path.isfile(fname):
+        raise ValueError("file {} does not exist!".format(fname))
+    if not is_out_of_band_pickle(fname):
+        with open(fname, "rb") as f:
+            return pickle.load(f)
+
+    with open(fname, "rb") as f:
+        if mmap_mode:
+            # the mapping stays valid after the file is closed, it is released with the last array referencing it
+            content = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        else:
+            content = memoryview(bytearray(os.fstat(f.fileno()).st_size))
+            f.readinto(content)
+
+    _, version, num_buffers, data_offset, data_length = struct.unpack_from(PICKLE_HEADER_FORMAT, content)
+    if version != PICKLE_VERSION:
+        raise ValueError("pickle file version {} is not supported!".format(version))
+    buffers = []
+    table_offset = struct.calcsize(PICKLE_HEADER_FORMAT)
+    for i in range(num_buffers):
+        buffer_offset, buffer_length = struct.unpack_from(PICKLE_BUFFER_FORMAT, content, table_offset + i*struct.calcsize(PICKLE_BUFFER_FORMAT))
+        if buffer_offset + buffer_length > len(content):
+            raise ValueError("pickle file {} is truncated!".format(fname))
+        buffers.append(content[buffer_offset:buffer_offset+buffer_length])
+    return get_object_from_buffers(content[data_offset:data_offset+data_length], buffers)
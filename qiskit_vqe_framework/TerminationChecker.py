@@ -1,8 +1,11 @@
 import abc
 import numpy as np
 from collections.abc import Iterable, Sequence
-from typing import Union
+from typing import Dict, List, Tuple, Union
+from statistics import NormalDist
 import copy
+import itertools
+import time
 import warnings
 
 class TerminationChecker(metaclass=abc.ABCMeta):
@@ -23,8 +26,111 @@ class TerminationChecker(metaclass=abc.ABCMeta):
         if buffer_length <= 0:
             raise ValueError("length of history buffer {} must be a positive integer!".format(buffer_length))
         self.buffer_length = buffer_length
-        self.values = []
         self.name = name_str
+        # ring buffer of the latest cost function values, _start is the slot of the oldest value
+        self._buffer = np.zeros(buffer_length)
+        self._start = 0
+        self._num_values = 0
+        # total number of values pushed to the buffer
+        self._num_pushed = 0
+        self._reset_statistics()
+
+    @property
+    def values(self) -> list:
+        """Cost function values in the history buffer (oldest first).
+        """
+        return self._get_values().tolist()
+    @values.setter
+    def values(self,
+               vals: Sequence[float]):
+        vals = np.asarray(vals, dtype=float)[-self.buffer_length:]
+        self._buffer[:len(vals)] = vals
+        self._start = 0
+        self._num_values = len(vals)
+        self._num_pushed = len(vals)
+        self._reset_statistics()
+
+    def __setstate__(self, state):
+        # termination checkers pickled before the ring buffer was introduced store the history buffer as a list of values
+        if "_buffer" not in state:
+            state = dict(state)
+            values = state.pop("values", [])
+            self.__dict__.update(state)
+            self._buffer = np.zeros(self.buffer_length)
+            self.values = values
+        else:
+            self.__dict__.update(state)
+
+    def _get_values(self) -> np.ndarray:
+        """
+        Returns:
+            Array of the cost function values in the history buffer (oldest first).
+        """
+        return self._buffer[self._get_slots()]
+
+    def _get_slots(self) -> np.ndarray:
+        """
+        Returns:
+            Ring buffer slots of the values in the history buffer (oldest first).
+        """
+        return (self._start + np.arange(self._num_values)) % self.buffer_length
+
+    def _push(self,
+              value: float) -> None:
+        """Add a value to the history buffer. If the buffer is full, the oldest value is overwritten.
+        The statistics of the subclasses are updated incrementally and recalculated from scratch every buffer_length values to avoid the accumulation of rounding errors.
+        """
+        if self._num_values == self.buffer_length:
+            slot = self._start
+            evicted = self._buffer[slot]
+            self._start = (self._start + 1) % self.buffer_length
+        else:
+            slot = (self._start + self._num_values) % self.buffer_length
+            evicted = None
+            self._num_values += 1
+        self._buffer[slot] = value
+        self._num_pushed += 1
+        self._update_statistics(slot, value, evicted)
+        if self._num_pushed % self.buffer_length == 0:
+            self._reset_statistics()
+
+    def _reset_statistics(self) -> None:
+        """Define method to (re)calculate the running statistics of the history buffer from scratch.
+        """
+
+    def _update_statistics(self,
+                           slot: int,
+                           value: float,
+                           evicted: Union[float, None]) -> None:
+        """Define method to update the running statistics after value was written to the ring buffer slot.
+
+        Args:
+            slot: Ring buffer slot of the new value.
+            value: New cost function value.
+            evicted: Oldest value that was overwritten by the new value (None if the buffer was not full).
+        """
+
+    def reset(self) -> None:
+        """Clears the history buffer for a new optimization (run_vqe calls it before the optimization starts).
+        Termination checkers with further state (e.g. the usage of a budget) override it.
+        """
+        self.values = []
+
+    def update_metadata(self,
+                        value: float,
+                        meta: Dict) -> None:
+        """Hook that is called with the result of every cost function evaluation (see the callback of run_vqe).
+        Termination checkers that need more information than the values passed by the optimizer (e.g. the estimator variances) override it.
+
+        Args:
+            value: Cost function value of the evaluation
+            meta: Estimator metadata of the evaluation
+        """
+
+    def update_job(self) -> None:
+        """Hook that is called once per job of the estimator primitive (see run_vqe).
+        Termination checkers that count the estimator jobs override it.
+        """
 
     def __call__(self,
                  nfev: int,
@@ -44,15 +150,11 @@ class TerminationChecker(metaclass=abc.ABCMeta):
         Returns:
             Bool flag if the optimization has terminated (converged).
         """
-        # add current value to history buffer
-        self.values.append(value)
-        # check current history buffer length
-        if len(self.values) > self.buffer_length:
-            # values should be of length buffer_length, containing the latest values
-            self.values = self.values[-self.buffer_length:]
+        # add current value to history buffer (overwrites the oldest value if the buffer is full)
+        self._push(value)
 
         # call termination checker if values list is large enough
-        if len(self.values) == self.buffer_length:
+        if self._num_values == self.buffer_length:
             return self._check_termination(nfev, parameters, value, stepsize, accepted)
         # otherwise return false
         return False
@@ -60,9 +162,14 @@ class TerminationChecker(metaclass=abc.ABCMeta):
     def to_dict(self) -> dict:
         """
         Returns:
-            Deepcopy of the class properties as a dictionary.
+            Deepcopy of the class properties (including the values of the history buffer) as a dictionary.
         """
-        return copy.deepcopy(self.__dict__)
+        out = {}
+        for key, val in self.__dict__.items():
+            if not key.startswith("_"):
+                out[key] = copy.deepcopy(val)
+        out["values"] = self.values
+        return out
     
     
     def __eq__(self, other) -> bool:
@@ -84,7 +191,7 @@ class TerminationChecker(metaclass=abc.ABCMeta):
         if self.buffer_length != other.buffer_length:
             return False
         
-        if self.values != other.values:
+        if not np.array_equal(self._get_values(), other._get_values()):
             return False
         
         return True
@@ -134,6 +241,49 @@ class RelativeEnergyChecker(TerminationChecker):
         
         super().__init__(buffer_length, "relative_energy_change")
 
+    def _reset_statistics(self) -> None:
+        """Calculate the relative changes of the history buffer from scratch.
+        The relative change between a value and the next considered value (values too close to zero are not considered) is stored in the slot of the older value (NaN if there is none).
+        """
+        self._deltas = np.full(self.buffer_length, np.nan)
+        self._last_considered = None
+        slots = self._get_slots()
+        vals = self._buffer[slots]
+        considered = np.abs(vals) > 1e-05
+        considered_slots = slots[considered]
+        considered_values = vals[considered]
+        if len(considered_values) > 0:
+            self._deltas[considered_slots[:-1]] = np.abs((considered_values[1:]-considered_values[:-1])/considered_values[1:])
+            # absolute position (number of pushed values before) of the latest considered value
+            self._last_considered = (self._num_pushed - self._num_values + int(np.flatnonzero(considered)[-1]), float(considered_values[-1]), int(considered_slots[-1]))
+        valid = ~np.isnan(self._deltas)
+        self._delta_sum = float(np.sum(self._deltas[valid]))
+        self._num_deltas = int(np.count_nonzero(valid))
+
+    def _update_statistics(self,
+                           slot: int,
+                           value: float,
+                           evicted: Union[float, None]) -> None:
+        """Update the sum and the number of relative changes after value was written to the ring buffer slot.
+        """
+        # relative change of the evicted value to its next considered value leaves the buffer
+        if not np.isnan(self._deltas[slot]):
+            self._delta_sum -= self._deltas[slot]
+            self._num_deltas -= 1
+        self._deltas[slot] = np.nan
+
+        if np.abs(value) > 1e-05:
+            pos = self._num_pushed - 1
+            if self._last_considered is not None:
+                last_pos, last_value, last_slot = self._last_considered
+                # previous considered value must still be in the buffer
+                if last_pos >= self._num_pushed - self._num_values:
+                    delta = np.abs((value-last_value)/value)
+                    self._deltas[last_slot] = delta
+                    self._delta_sum += delta
+                    self._num_deltas += 1
+            self._last_considered = (pos, float(value), slot)
+
     def __eq__(self, other) -> bool:
         """Method to compare two RelativeEnergyChecker objects. 
         It compares class instance, considered_values_length, epsilon threshold , name, values and buffer length.
@@ -174,10 +324,8 @@ class RelativeEnergyChecker(TerminationChecker):
         # handle optimization steps that have not been accepted by the optimizer routine
         if not accepted:
             return False
-        # calculate relative change in the values history
-        dv = self._calc_relative_change()
-        # check if the mean relative change is below epsilon
-        if len(dv) >= self.considered_values_length and np.average(dv) <= self.epsilon:
+        # check if the mean relative change in the values history is below epsilon
+        if self._num_deltas >= self.considered_values_length and self._delta_sum/self._num_deltas <= self.epsilon:
             return True
 
         #otherwise return False
@@ -189,16 +337,9 @@ class RelativeEnergyChecker(TerminationChecker):
         Returns:
             Relative change in the cost function values
         """
-        relative_change = []
-        # filter all values that are too close to zero
-        considered_values = list(filter(lambda e: np.abs(e) > 1e-05, self.values))
-        considered_values = considered_values
-        # calculate relative change
-        for old, new in zip(considered_values[:], considered_values[1:]):
-            delta = np.abs((new-old)/new)
-            relative_change.append(delta)
-
-        return relative_change
+        # relative changes are stored in the slot of the older value
+        deltas = self._deltas[self._get_slots()]
+        return deltas[~np.isnan(deltas)].tolist()
 
     def __repr__(self):
         """String format of class for output in REPR.
@@ -228,6 +369,37 @@ class LinearFitChecker(TerminationChecker):
         
         super().__init__(buffer_length, "linear_fit")
 
+    def _reset_statistics(self) -> None:
+        """Calculate the sums of the values y_i and i*y_i (i = 0 for the oldest value) of the history buffer from scratch.
+        """
+        vals = self._get_values()
+        self._sum_y = float(np.sum(vals))
+        self._sum_iy = float(np.dot(np.arange(len(vals)), vals))
+
+    def _update_statistics(self,
+                           slot: int,
+                           value: float,
+                           evicted: Union[float, None]) -> None:
+        """Update the sums of the values y_i and i*y_i after value was written to the ring buffer slot.
+        """
+        if evicted is None:
+            self._sum_iy += (self._num_values-1)*value
+            self._sum_y += value
+        else:
+            # all remaining values move one position to the front
+            self._sum_iy += -(self._sum_y - evicted) + (self._num_values-1)*value
+            self._sum_y += value - evicted
+
+    def _get_slope(self) -> float:
+        """
+        Returns:
+            Slope of the least squares linear fit to the values of the history buffer over their positions.
+        """
+        n = self._num_values
+        sum_i = n*(n-1)/2
+        sum_ii = (n-1)*n*(2*n-1)/6
+        return (n*self._sum_iy - sum_i*self._sum_y)/(n*sum_ii - sum_i**2)
+
     def __eq__(self, other) -> bool:
         """Method to compare two LinearFitChecker objects. 
         It compares class instance, epsilon threshold, name, values and buffer length.
@@ -267,8 +439,7 @@ class LinearFitChecker(TerminationChecker):
         if not accepted:
             return False
         # linear fit to current values history buffer
-        pp = np.polyfit(range(self.buffer_length), self.values, 1)
-        slope = pp[0]/self.buffer_length
+        slope = self._get_slope()/self.buffer_length
         # check if the mean relative change is below epsilon
         if np.abs(slope) <= self.epsilon:
             return True
@@ -282,6 +453,483 @@ class LinearFitChecker(TerminationChecker):
         out = "LinearFitChecker(buffer_length={}, epsilon={})".format(self.buffer_length, self.epsilon)
         return out
 
+class StatisticalTrendChecker(TerminationChecker):
+    """Termination checker which tests if the downward trend of the previous cost function values is statistically significant.
+    A line is fitted to the history buffer by weighted least squares, where the weights are the inverse variances of the values calculated from the estimator metadata (variance and shots).
+    If the variances are not known for all values (e.g. for exact estimators), the noise is estimated from the residuals of an unweighted fit instead.
+    The optimization is terminated if the one-sided p-value of the slope is not below the significance level, i.e., the improvement is statistically indistinguishable from zero.
+    """
+    def __init__(self,
+                 buffer_length: int,
+                 significance_level: float = 0.05) -> None:
+        """
+        Args:
+            buffer_length: Number of previous values that are fitted (at least 3).
+            significance_level: The optimization continues only while the probability of the fitted slope without an actual improvement is below this level.
+
+        Raises:
+            ValueError: If the history buffer is shorter than 3 or the significance level is not in (0, 1).
+        """
+        if buffer_length < 3:
+            raise ValueError("length of history buffer {} must be at least 3 to estimate a trend!".format(buffer_length))
+        if significance_level <= 0 or significance_level >= 1:
+            raise ValueError("significance level {} must be in the open interval (0, 1)!".format(significance_level))
+        self.significance_level = significance_level
+
+        # variances of the values in the ring buffer (NaN if unknown)
+        self._variances = np.full(buffer_length, np.nan)
+        # results of the cost function evaluations since the last check: (value, variance)
+        self._pending = []
+        self._next_variance = np.nan
+
+        super().__init__(buffer_length, "statistical_trend")
+
+    @TerminationChecker.values.setter
+    def values(self,
+               vals: Sequence[float]):
+        # the variances of externally set values are unknown
+        self._variances = np.full(self.buffer_length, np.nan)
+        TerminationChecker.values.fset(self, vals)
+
+    def reset(self) -> None:
+        """Clears the history buffer and the evaluations since the last check.
+        """
+        self._pending = []
+        self._next_variance = np.nan
+        super().reset()
+
+    def update_metadata(self,
+                        value: float,
+                        meta: Dict) -> None:
+        """Stores the value and the variance of the mean of a cost function evaluation (variance/shots or std_error**2 of the estimator metadata, NaN if not available).
+        """
+        variance = np.nan
+        if meta is not None:
+            if meta.get("variance", None) is not None and meta.get("shots", None) is not None:
+                variance = meta["variance"]/meta["shots"]
+            elif meta.get("std_error", None) is not None:
+                variance = meta["std_error"]**2
+        self._pending.append((value, variance))
+
+    def _get_variance(self,
+                      value: float) -> float:
+        """
+        Returns:
+            Variance of value, which is either the value of the last evaluation or the mean of the last evaluations (e.g. the SPSA estimate of the current iteration). NaN if no matching evaluations are found.
+        """
+        if len(self._pending) == 0:
+            return np.nan
+        pending = np.array(self._pending[::-1], dtype=float)
+        num = np.arange(1, len(pending)+1)
+        means = np.cumsum(pending[:,0])/num
+        match = np.flatnonzero(np.isclose(means, value, rtol=1e-09, atol=1e-12))
+        if len(match) == 0:
+            return np.nan
+        k = match[0] + 1
+        return np.sum(pending[:k,1])/k**2
+
+    def __call__(self,
+                 nfev: int,
+                 parameters: Sequence[float],
+                 value: float,
+                 stepsize: int,
+                 accepted: bool) -> bool:
+        """Checks the termination with the variance of value taken from the metadata of the evaluations since the last check.
+        """
+        self._next_variance = self._get_variance(value)
+        self._pending = []
+        return super().__call__(nfev, parameters, value, stepsize, accepted)
+
+    def _reset_statistics(self) -> None:
+        """Calculate the weighted (first row, inverse variances) and unweighted (second row) sums w, w*x, w*x**2, w*y, w*x*y and w*y**2 of the values y at positions x (x = 0 for the oldest value) from scratch.
+        """
+        slots = self._get_slots()
+        y = self._buffer[slots]
+        variances = self._variances[slots]
+        unknown = np.isnan(variances)
+        self._num_unknown = int(np.count_nonzero(unknown))
+        w = np.vstack([np.where(unknown, 0.0, 1/np.where(unknown, 1.0, variances)), np.ones(len(y))])
+        x = np.arange(len(y))
+        self._sums = np.stack([np.sum(w, axis=1), w @ x, w @ x**2, w @ y, w @ (x*y), w @ y**2], axis=1)
+
+    def _update_statistics(self,
+                           slot: int,
+                           value: float,
+                           evicted: Union[float, None]) -> None:
+        """Update the weighted and unweighted sums after value was written to the ring buffer slot.
+        """
+        variance = self._next_variance
+        self._next_variance = np.nan
+        if evicted is not None:
+            evicted_variance = self._variances[slot]
+            if np.isnan(evicted_variance):
+                self._num_unknown -= 1
+                w = np.array([0.0, 1.0])
+            else:
+                w = np.array([1/evicted_variance, 1.0])
+            # remove the oldest value at x = 0
+            self._sums -= np.outer(w, [1.0, 0.0, 0.0, evicted, 0.0, evicted**2])
+            # all remaining values move one position to the front
+            s_w, s_wx, s_wxx, s_wy, s_wxy, s_wyy = self._sums.T
+            self._sums = np.stack([s_w, s_wx - s_w, s_wxx - 2*s_wx + s_w, s_wy, s_wxy - s_wy, s_wyy], axis=1)
+
+        self._variances[slot] = variance
+        if np.isnan(variance):
+            self._num_unknown += 1
+            w = np.array([0.0, 1.0])
+        else:
+            w = np.array([1/variance, 1.0])
+        x = self._num_values - 1
+        self._sums += np.outer(w, [1.0, x, x**2, value, x*value, value**2])
+
+    def _get_trend(self) -> Tuple[float, float]:
+        """
+        Returns:
+            Slope of the fitted line and its standard error.
+        """
+        n = self._num_values
+        if self._num_unknown == 0:
+            s_w, s_wx, s_wxx, s_wy, s_wxy, _ = self._sums[0]
+            det = s_w*s_wxx - s_wx**2
+            slope = (s_w*s_wxy - s_wx*s_wy)/det
+            return slope, np.sqrt(s_w/det)
+        s_1, s_x, s_xx, s_y, s_xy, s_yy = self._sums[1]
+        sxx = s_xx - s_x**2/s_1
+        sxy = s_xy - s_x*s_y/s_1
+        syy = s_yy - s_y**2/s_1
+        slope = sxy/sxx
+        rss = max(syy - slope*sxy, 0.0)
+        return slope, np.sqrt(rss/(n-2)/sxx)
+
+    def _check_termination(self,
+                           nfev: int,
+                           parameters: Sequence[float],
+                           value: float,
+                           stepsize: int,
+                           accepted: bool) -> bool:
+        """Implemented method for checking the termination via the significance of the trend in the history buffer.
+
+        Args:
+            nfev: Current number of cost function evaluations
+            parameters: Current optimization parameters
+            value: Current cost function value
+            stepsize: Step size for changing the optimization parameters
+            accepted: Bool flag if the optimization step is accepted by the used optimizer
+
+        Returns:
+            Bool flag if the optimization has terminated (converged).
+        """
+        slope, std_error = self._get_trend()
+        if std_error == 0:
+            return bool(slope >= 0)
+        # probability of a slope at most as steep as the fitted one without an actual improvement
+        p_value = NormalDist().cdf(slope/std_error)
+        return bool(p_value >= self.significance_level)
+
+    def __repr__(self):
+        """String format of class for output in REPR.
+        """
+        out = "StatisticalTrendChecker(buffer_length={}, significance_level={})".format(self.buffer_length, self.significance_level)
+        return out
+        
+
+class BudgetChecker(TerminationChecker):
+    """Base class for checking termination of a running optimization by a budget (e.g. shots, wall time or estimator jobs).
+    The optimization is terminated before an iteration which would exceed the budget, where the usage of the next iteration is estimated by the usage of the last one.
+    The first iteration only terminates the optimization if the budget is already exhausted, since its usage includes the calibration of the optimizer.
+    The evaluations after the optimization (final energy and auxiliary operators) are not part of the budget.
+    """
+    def __init__(self,
+                 budget: float,
+                 name_str: str) -> None:
+        """
+        Args:
+            budget: Maximal usage of the optimization.
+            name_str: Unique name string of the implemented budget.
+
+        Raises:
+            ValueError: If the budget is not positive.
+        """
+        if budget <= 0:
+            raise ValueError("budget {} of {} must be positive!".format(budget, name_str))
+        # usage at the previous check (None before the first check)
+        self._checked_usage = None
+
+        super().__init__(1, name_str)
+
+    def reset(self) -> None:
+        """Clears the usage for a new optimization.
+        """
+        self._checked_usage = None
+        super().reset()
+
+    @property
+    @abc.abstractmethod
+    def budget(self) -> float:
+        """Maximal usage of the optimization.
+        """
+
+    @property
+    @abc.abstractmethod
+    def usage(self) -> float:
+        """Current usage of the optimization.
+        """
+
+    def _check_termination(self,
+                           nfev: int,
+                           parameters: Sequence[float],
+                           value: float,
+                           stepsize: int,
+                           accepted: bool) -> bool:
+        """Implemented method for checking the termination via the remaining budget.
+
+        Args:
+            nfev: Current number of cost function evaluations
+            parameters: Current optimization parameters
+            value: Current cost function value
+            stepsize: Step size for changing the optimization parameters
+            accepted: Bool flag if the optimization step is accepted by the used optimizer
+
+        Returns:
+            Bool flag if the optimization has terminated (budget is exhausted).
+        """
+        usage = self.usage
+        iteration_usage = 0
+        if self._checked_usage is not None:
+            iteration_usage = usage - self._checked_usage
+        self._checked_usage = usage
+        return bool(usage >= self.budget or usage + iteration_usage > self.budget)
+
+class ShotBudgetChecker(BudgetChecker):
+    """Budget of the total number of shots of the estimator, which are taken from the metadata of every cost function evaluation.
+    Evaluations without shots in their metadata (exact estimators) do not use the budget.
+    """
+    def __init__(self,
+                 max_shots: int) -> None:
+        """
+        Args:
+            max_shots: Maximal total number of shots.
+        """
+        self.max_shots = max_shots
+        self._num_shots = 0
+
+        super().__init__(max_shots, "shot_budget")
+
+    @property
+    def budget(self) -> int:
+        return self.max_shots
+
+    @property
+    def usage(self) -> int:
+        return self._num_shots
+
+    def reset(self) -> None:
+        self._num_shots = 0
+        super().reset()
+
+    def update_metadata(self,
+                        value: float,
+                        meta: Dict) -> None:
+        """Adds the shots of a cost function evaluation.
+        """
+        if meta is not None and meta.get("shots", None) is not None:
+            self._num_shots += meta["shots"]
+
+    def __repr__(self):
+        """String format of class for output in REPR.
+        """
+        out = "ShotBudgetChecker(max_shots={})".format(self.max_shots)
+        return out
+
+class WallTimeChecker(BudgetChecker):
+    """Budget of the wall-clock time of the optimization, measured from the first cost function evaluation.
+    The time between a checkpoint (or a pickled copy) of the checker and its next use is not counted.
+    """
+    def __init__(self,
+                 max_time: float) -> None:
+        """
+        Args:
+            max_time: Maximal wall-clock time in seconds.
+        """
+        self.max_time = max_time
+        self._elapsed_time = 0.0
+        self._last_time = None
+
+        super().__init__(max_time, "wall_time")
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # monotonic clock of another process (or after resuming) is not comparable
+        state["_last_time"] = None
+        return state
+
+    def reset(self) -> None:
+        self._elapsed_time = 0.0
+        self._last_time = None
+        super().reset()
+
+    def _update_time(self) -> None:
+        """Adds the time since the last update.
+        """
+        now = time.monotonic()
+        if self._last_time is not None:
+            self._elapsed_time += now - self._last_time
+        self._last_time = now
+
+    @property
+    def budget(self) -> float:
+        return self.max_time
+
+    @property
+    def usage(self) -> float:
+        return self._elapsed_time
+
+    def update_metadata(self,
+                        value: float,
+                        meta: Dict) -> None:
+        """Updates the elapsed time after a cost function evaluation.
+        """
+        self._update_time()
+
+    def update_job(self) -> None:
+        """Updates the elapsed time before an estimator job.
+        """
+        self._update_time()
+
+    def _check_termination(self,
+                           nfev: int,
+                           parameters: Sequence[float],
+                           value: float,
+                           stepsize: int,
+                           accepted: bool) -> bool:
+        self._update_time()
+        return super()._check_termination(nfev, parameters, value, stepsize, accepted)
+
+    def __repr__(self):
+        """String format of class for output in REPR.
+        """
+        out = "WallTimeChecker(max_time={})".format(self.max_time)
+        return out
+
+class JobBudgetChecker(BudgetChecker):
+    """Budget of the number of jobs of the estimator primitive.
+    """
+    def __init__(self,
+                 max_jobs: int) -> None:
+        """
+        Args:
+            max_jobs: Maximal number of estimator jobs.
+        """
+        self.max_jobs = max_jobs
+        self._num_jobs = 0
+
+        super().__init__(max_jobs, "job_budget")
+
+    @property
+    def budget(self) -> int:
+        return self.max_jobs
+
+    @property
+    def usage(self) -> int:
+        return self._num_jobs
+
+    def reset(self) -> None:
+        self._num_jobs = 0
+        super().reset()
+
+    def update_job(self) -> None:
+        """Counts an estimator job.
+        """
+        self._num_jobs += 1
+
+    def __repr__(self):
+        """String format of class for output in REPR.
+        """
+        out = "JobBudgetChecker(max_jobs={})".format(self.max_jobs)
+        return out
+
+class CompositeChecker(TerminationChecker):
+    """Combination of several termination checkers, which terminates the optimization if any or all of them terminate it.
+    All termination checkers are called in every iteration, such that their buffers are up to date.
+    """
+    def __init__(self,
+                 checkers: List[TerminationChecker],
+                 mode: str = "any") -> None:
+        """
+        Args:
+            checkers: Combined termination checkers.
+            mode: "any" or "all" of the termination checkers have to terminate the optimization.
+
+        Raises:
+            ValueError: If no termination checkers are given or the mode is unknown.
+        """
+        if len(checkers) == 0:
+            raise ValueError("composite termination checker needs at least one termination checker!")
+        if mode not in ["any", "all"]:
+            raise ValueError("unknown mode {} of composite termination checker! Possible modes are 'any' and 'all'.".format(mode))
+        self.checkers = list(checkers)
+        self.mode = mode
+        self._results = []
+
+        super().__init__(1, "composite")
+
+    def reset(self) -> None:
+        for checker in self.checkers:
+            checker.reset()
+        self._results = []
+        super().reset()
+
+    def update_metadata(self,
+                        value: float,
+                        meta: Dict) -> None:
+        for checker in self.checkers:
+            checker.update_metadata(value, meta)
+
+    def update_job(self) -> None:
+        for checker in self.checkers:
+            checker.update_job()
+
+    def __call__(self,
+                 nfev: int,
+                 parameters: Sequence[float],
+                 value: float,
+                 stepsize: int,
+                 accepted: bool) -> bool:
+        """Calls all combined termination checkers.
+        """
+        self._results = [checker(nfev, parameters, value, stepsize, accepted) for checker in self.checkers]
+        return super().__call__(nfev, parameters, value, stepsize, accepted)
+
+    def _check_termination(self,
+                           nfev: int,
+                           parameters: Sequence[float],
+                           value: float,
+                           stepsize: int,
+                           accepted: bool) -> bool:
+        if self.mode == "any":
+            return any(self._results)
+        return all(self._results)
+
+    def to_dict(self) -> dict:
+        """
+        Returns:
+            Deepcopy of the class properties as a dictionary, where the combined termination checkers are dictionaries as well.
+        """
+        out = super().to_dict()
+        out["checkers"] = [checker.to_dict() for checker in self.checkers]
+        return out
+
+    def __eq__(self, other) -> bool:
+        if not super().__eq__(other):
+            return False
+        return isinstance(other, CompositeChecker) and self.mode == other.mode and self.checkers == other.checkers
+
+    def __repr__(self):
+        """String format of class for output in REPR.
+        """
+        out = "CompositeChecker(checkers={}, mode={})".format(self.checkers, self.mode)
+        return out
+
 def get_termination_checker_from_name(checker_name: str,
                                       **kwargs) -> TerminationChecker:
     """Function to generate a termination checker class based on a unique name string.
@@ -331,6 +979,212 @@ def get_termination_checker_from_name(checker_name: str,
             raise ValueError("Missing epsilon argument!")
         
         return LinearFitChecker(buffer_length, epsilon)
+    elif checker_name == "statistical_trend":
+        buffer_length = kwargs.get("buffer_length", None)
+
+        if buffer_length is None:
+            raise ValueError("Missing buffer_length argument!")
+
+        significance_level = kwargs.get("significance_level", None)
+
+        if significance_level is None:
+            raise ValueError("Missing significance_level argument!")
+        
+        return StatisticalTrendChecker(buffer_length, significance_level)
+    elif checker_name == "shot_budget":
+        max_shots = kwargs.get("max_shots", None)
+
+        if max_shots is None:
+            raise ValueError("Missing max_shots argument!")
+
+        return ShotBudgetChecker(max_shots)
+    elif checker_name == "wall_time":
+        max_time = kwargs.get("max_time", None)
+
+        if max_time is None:
+            raise ValueError("Missing max_time argument!")
+
+        return WallTimeChecker(max_time)
+    elif checker_name == "job_budget":
+        max_jobs = kwargs.get("max_jobs", None)
+
+        if max_jobs is None:
+            raise ValueError("Missing max_jobs argument!")
+
+        return JobBudgetChecker(max_jobs)
+    elif checker_name == "composite":
+        checkers = kwargs.get("checkers", None)
+
+        if checkers is None:
+            raise ValueError("Missing checkers argument!")
+
+        mode = kwargs.get("mode", None)
+
+        if mode is None:
+            raise ValueError("Missing mode argument!")
+
+        checker_list = []
+        for checker in checkers:
+            # combined termination checkers may be given by their dictionaries (see to_dict)
+            if isinstance(checker, dict):
+                checker_dict = copy.copy(checker)
+                checker = get_termination_checker_from_name(checker_dict.pop("name"), **checker_dict)
+            checker_list.append(checker)
+        
+        return CompositeChecker(checker_list, mode)
     else:
         raise ValueError("unkown TerminationChecker name {}!".format(checker_name))
-        
+
+
+def get_termination_checker_grid(checker_name: str,
+                                 **kwargs) -> List[TerminationChecker]:
+    """Function to generate termination checkers for all combinations of the given input arguments (e.g. for replay_termination_checkers).
+
+    Args:
+        checker_name: Unique name string of the termination checker method.
+        **kwargs: Input arguments for class initialization, where sequences (lists, tuples or arrays) are the values of a grid dimension.
+
+    Returns:
+        List of termination checkers (last argument varies fastest).
+    """
+    keys = list(kwargs.keys())
+    grid = [val if isinstance(val, (list, tuple, np.ndarray)) else [val] for val in kwargs.values()]
+    return [get_termination_checker_from_name(checker_name, **dict(zip(keys, vals))) for vals in itertools.product(*grid)]
+
+def get_iteration_values(energy_values: Sequence[float],
+                         evaluations_per_iteration: int = 2,
+                         num_calibration_evaluations: int = 50) -> np.ndarray:
+    """Function to convert the energies of all cost function evaluations (energy_values of the intermediate results of run_vqe) to the values the termination checker gets per iteration.
+    The defaults correspond to the SPSA optimizer with calibration, which checks the mean energy of the two evaluations of an iteration.
+
+    Args:
+        energy_values: Energies of all cost function evaluations.
+        evaluations_per_iteration: Number of cost function evaluations per optimizer iteration.
+        num_calibration_evaluations: Number of cost function evaluations before the first iteration.
+
+    Returns:
+        Array with the mean energy of every (complete) iteration.
+    """
+    vals = np.asarray(energy_values, dtype=float)[num_calibration_evaluations:]
+    num_iterations = len(vals)//evaluations_per_iteration
+    return vals[:num_iterations*evaluations_per_iteration].reshape(num_iterations, evaluations_per_iteration).mean(axis=1)
+
+def _get_window_sums(vals: np.ndarray,
+                     window: int) -> np.ndarray:
+    # sums over the last window values (including the current one) of every row, NaN if the window is not full
+    csum = np.zeros((vals.shape[0], vals.shape[1]+1))
+    csum[:,1:] = np.cumsum(vals, axis=1)
+    out = np.full(vals.shape, np.nan)
+    out[:,window-1:] = csum[:,window:] - csum[:,:-window]
+    return out
+
+def _replay_linear_fit(vals: np.ndarray,
+                       n: int) -> np.ndarray:
+    # absolute normalized slope (see LinearFitChecker) of every iteration, where the slope of the window is calculated from rolling sums of y_j and j*y_j
+    idx = np.arange(vals.shape[1])
+    # the slope does not depend on a shift of the values, which reduces the rounding errors of the rolling sums
+    vals = vals - vals[:,:1]
+    s_y = _get_window_sums(vals, n)
+    # sum of i*y with i = 0 for the oldest value of the window
+    s_iy = _get_window_sums(idx*vals, n) - (idx - n + 1)*s_y
+    sum_i = n*(n-1)/2
+    sum_ii = (n-1)*n*(2*n-1)/6
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = (n*s_iy - sum_i*s_y)/(n*sum_ii - sum_i**2)
+    return np.abs(slope/n)
+
+def _replay_relative_energy(vals: np.ndarray,
+                            n: int) -> Tuple[np.ndarray, np.ndarray]:
+    # number and mean of the relative changes of every iteration, where the relative change between a considered value and the next one is stored at the position of the older value
+    num_traces, length = vals.shape
+    idx = np.arange(length)
+    with np.errstate(invalid="ignore"):
+        considered = np.abs(vals) > 1e-05
+    # position of the latest considered value up to every iteration (-1 if none)
+    last = np.maximum.accumulate(np.where(considered, idx, -1), axis=1)
+    # position of the next considered value after every iteration (length if none)
+    following = np.full((num_traces, length), length)
+    following[:,:-1] = np.minimum.accumulate(np.where(considered, idx, length)[:,::-1], axis=1)[:,::-1][:,1:]
+    rows = np.arange(num_traces)[:,None]
+    has_next = considered & (following < length)
+    deltas = np.zeros((num_traces, length))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        next_vals = vals[rows, np.minimum(following, length-1)]
+        deltas[has_next] = np.abs((next_vals - vals)/next_vals)[has_next]
+    delta_sum = _get_window_sums(deltas, n)
+    delta_num = _get_window_sums(has_next.astype(float), n)
+    # the relative change of the latest considered value of the window belongs to the next window(s)
+    last_in_window = (last >= idx - n + 1) & (last >= 0)
+    last_pos = np.maximum(last, 0)
+    last_has_next = last_in_window & has_next[rows, last_pos]
+    delta_sum -= np.where(last_has_next, deltas[rows, last_pos], 0.0)
+    delta_num -= last_has_next
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return delta_num, delta_sum/delta_num
+
+def replay_termination_checkers(energy_traces: Sequence[Union[Sequence[float], Dict]],
+                                checkers: Sequence[TerminationChecker],
+                                ref_energy: Union[float, Sequence[float], None] = None) -> Dict[str, np.ndarray]:
+    """Replays recorded energy traces through termination checkers without running the optimizations again.
+    RelativeEnergyChecker and LinearFitChecker are evaluated for all traces at once with rolling sums, other termination checkers are called value by value (copies of the given ones).
+
+    Args:
+        energy_traces: Values the termination checker gets in every optimizer iteration (see get_iteration_values) for several optimizations. Intermediate results dictionaries of run_vqe are converted with the SPSA defaults of get_iteration_values.
+        checkers: Termination checker configurations (see get_termination_checker_grid). Their history buffers are not used.
+        ref_energy: Reference energy of all traces or of every trace for the energy gap. If None, the last value of every trace is the reference.
+
+    Returns:
+        Dictionary with arrays of shape (number of checkers, number of traces):
+        "terminated" (bool flag if the checker terminated the optimization), "stop_iteration" (number of iterations until termination or the length of the trace),
+        "stop_energy" (value of the stop iteration) and "energy_gap" (stop energy minus reference energy).
+    """
+    traces = []
+    for trace in energy_traces:
+        if isinstance(trace, dict):
+            trace = get_iteration_values(trace["energy_values"])
+        traces.append(np.asarray(trace, dtype=float))
+    lengths = np.array([len(trace) for trace in traces])
+    if np.any(lengths == 0):
+        raise ValueError("energy traces must not be empty!")
+
+    # traces padded with NaN to a common length
+    vals = np.full((len(traces), lengths.max()), np.nan)
+    for i, trace in enumerate(traces):
+        vals[i,:len(trace)] = trace
+
+    if ref_energy is None:
+        ref_energy = vals[np.arange(len(traces)), lengths-1]
+    ref_energy = np.broadcast_to(np.asarray(ref_energy, dtype=float), (len(traces),))
+
+    terminated = np.zeros((len(checkers), len(traces)), dtype=bool)
+    stop_iteration = np.tile(lengths, (len(checkers), 1))
+    # window statistics only depend on the checker type and the buffer length
+    stats = {}
+    for c, checker in enumerate(checkers):
+        key = (checker.name, checker.buffer_length)
+        if isinstance(checker, LinearFitChecker):
+            if key not in stats:
+                stats[key] = _replay_linear_fit(vals, checker.buffer_length)
+            with np.errstate(invalid="ignore"):
+                flags = stats[key] <= checker.epsilon
+        elif isinstance(checker, RelativeEnergyChecker):
+            if key not in stats:
+                stats[key] = _replay_relative_energy(vals, checker.buffer_length)
+            delta_num, delta_mean = stats[key]
+            with np.errstate(invalid="ignore"):
+                flags = (delta_num >= checker.considered_values_length) & (delta_mean <= checker.epsilon)
+        else:
+            flags = np.zeros(vals.shape, dtype=bool)
+            for i, trace in enumerate(traces):
+                replay_checker = copy.deepcopy(checker)
+                replay_checker.values = []
+                for j, val in enumerate(trace):
+                    if replay_checker(j, [], val, 0.0, True):
+                        flags[i,j] = True
+                        break
+        flags &= np.arange(vals.shape[1]) < lengths[:,None]
+        terminated[c] = np.any(flags, axis=1)
+        stop_iteration[c, terminated[c]] = np.argmax(flags, axis=1)[terminated[c]] + 1
+
+    stop_energy = vals[np.arange(len(traces)), stop_iteration-1]
+    return {"terminated": terminated, "stop_iteration": stop_iteration, "stop_energy": stop_energy, "energy_gap": stop_energy - ref_energy}
@@ -7,6 +7,7 @@ from qiskit.circuit import Parameter, Instruction
 from qiskit.circuit.library import EfficientSU2
 from qiskit.quantum_info import Statevector
 from . import Calibration as cal
+from . import Serialization
 import abc
 import yaml
 import pickle
@@ -68,7 +69,7 @@ class AnsatzCalibration(cal.Calibration):
         return self._use_custom_state_init
 
     def __repr__(self):
-        ansatz_cal_dict = self.to_dict()
+        ansatz_cal_dict = self.to_dict(deep_copy=False)
         cal_name = ansatz_cal_dict.pop("name")
         use_custom_state_init = ansatz_cal_dict.pop("use_custom_state_init")
 
@@ -79,8 +80,9 @@ class AnsatzCalibration(cal.Calibration):
 
         return out
 
-    def to_dict(self):
-        qalg_cal_dict = super().to_dict()
+    def to_dict(self,
+                deep_copy: bool = True):
+        qalg_cal_dict = super().to_dict(deep_copy)
         psi_start = qalg_cal_dict.pop("_psi_start")
         qalg_cal_dict["psi_start"] = psi_start
 
@@ -151,7 +153,7 @@ def get_AnsatzCalibration_from_yaml(fname: str) -> AnsatzCalibration:
     with open(fname, "r") as f:
         raw_data = f.read()
 
-    ansatz_cal_dict = yaml.load(raw_data, Loader=yaml.Loader)
+    ansatz_cal_dict = cal.load_yaml(raw_data)
     if ansatz_cal_dict is None:
         raise ValueError("Something went wrong while reading in yml text file! resulting dictionary is empty!")
     
@@ -162,9 +164,8 @@ def get_AnsatzCalibration_from_pickle(fname: str) -> AnsatzCalibration:
     if not os.path.isfile(fname):
         raise ValueError("file {} does not exist!".format(fname))
 
-    ansatz_cal = None
-    with open(fname, "rb") as f:
-        ansatz_cal = pickle.load(f)
+    # plain pickle files and pickle files with out-of-band buffers (see Calibration.to_pickle)
+    ansatz_cal = Serialization.get_object_from_pickle(fname)
 
     if not isinstance(ansatz_cal, AnsatzCalibration):
         raise ValueError("loaded pickle object is no AnsatzCalibration!")
@@ -295,3 +296,39 @@ class ESU2(VQEAnsatz):
         #circ_su2.decompose()
 
         return circ_su2
+
+class FrozenParameterAnsatz(VQEAnsatz):
+    def __init__(self,
+                 ansatz: VQEAnsatz,
+                 frozen_values: Sequence[float],
+                 trailing: bool = False) -> None:
+        # ansatz with the leading parameters (in circuit parameter order) of another ansatz frozen to fixed values, only the remaining parameters are free.
+        # If trailing is True, the trailing parameters are frozen instead.
+        # It has the calibration of the original ansatz.
+        if len(frozen_values) > ansatz.circuit.num_parameters:
+            raise ValueError("number of frozen values {} is larger than the number of circuit parameters {}!".format(len(frozen_values), ansatz.circuit.num_parameters))
+        self._ansatz = ansatz
+        self._frozen_values = list(frozen_values)
+        self._trailing = trailing
+        super().__init__(ansatz.parameters)
+
+    @property
+    def frozen_values(self):
+        return self._frozen_values
+
+    @property
+    def trailing(self):
+        return self._trailing
+
+    def _get_circuit(self) -> QuantumCircuit:
+        circ = self._ansatz.circuit
+        if self._trailing:
+            frozen_params = circ.parameters[circ.num_parameters-len(self._frozen_values):]
+        else:
+            frozen_params = circ.parameters[:len(self._frozen_values)]
+        return circ.assign_parameters(dict(zip(frozen_params, self._frozen_values)))
+
+    def __repr__(self):
+        out = "FrozenParameterAnsatz(ansatz={}, num_frozen={}, trailing={})".format(self._ansatz, len(self._frozen_values), self._trailing)
+
+        return out
@@ -0,0 +1,234 @@
+from __future__ import annotations
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from collections.abc import Iterable, Sequence
+from itertools import islice
+from . import TerminationChecker as tc
+from . import Calibration as cal
+from . import VQEOptimizer as VQEO
+from . import Serialization
+import qiskit.algorithms.optimizers as optimizers
+from qiskit.utils import algorithm_globals
+import copy
+import os
+
+class VQECheckpoint:
+    """State of a running SPSA optimization after a finished iteration.
+    It contains everything that is needed to continue the optimization with identical subsequent behavior.
+    """
+    def __init__(self,
+                 iteration: int,
+                 maxiter: int,
+                 params: Sequence[float],
+                 energy: float,
+                 learning_rate: Sequence[float],
+                 perturbation: Sequence[float],
+                 rng_state: Dict,
+                 termination_checker: Union[tc.TerminationChecker, None],
+                 terminated: bool,
+                 opt_nfev: int,
+                 iresults: Dict,
+                 calibration_list: List[Dict]) -> None:
+        """
+        Args:
+            iteration: Number of finished optimizer iterations.
+            maxiter: Maximal number of optimizer iterations of the whole optimization.
+            params: Optimization parameters after the last finished iteration.
+            energy: Cost function value at params.
+            learning_rate: Learning rate sequence of all maxiter iterations.
+            perturbation: Perturbation sequence of all maxiter iterations.
+            rng_state: State of the bit generator of qiskit's algorithm_globals random number generator.
+            termination_checker: Termination checker including its history buffer (None if no termination checker is used).
+            terminated: Bool flag if the termination checker terminated the optimization in the last finished iteration.
+            opt_nfev: Number of cost function evaluations counted by the optimizer.
+            iresults: Accumulated intermediate results (number of cost function calls, energy values, circuit parameters and estimator metadata).
+            calibration_list: Dictionaries of the target model, ansatz, optimizer and estimator calibrations the optimization was started with.
+        """
+        self.iteration = iteration
+        self.maxiter = maxiter
+        self.params = params
+        self.energy = energy
+        self.learning_rate = learning_rate
+        self.perturbation = perturbation
+        self.rng_state = rng_state
+        self.termination_checker = termination_checker
+        self.terminated = terminated
+        self.opt_nfev = opt_nfev
+        self.iresults = iresults
+        self.calibration_list = calibration_list
+
+    @property
+    def finished(self) -> bool:
+        """Bool flag if the optimization was already finished when the checkpoint was written.
+        """
+        return self.terminated or self.iteration >= self.maxiter
+
+    def __repr__(self):
+        out = "VQECheckpoint(iteration={}, maxiter={}, energy={}, terminated={}, opt_nfev={})".format(self.iteration, self.maxiter, self.energy, self.terminated, self.opt_nfev)
+        return out
+
+    def to_dict(self) -> Dict:
+        """
+        Returns:
+            Deepcopy of the class properties as a dictionary.
+        """
+        return copy.deepcopy(self.__dict__)
+
+    def to_file(self,
+                fname: str):
+        """Saves the checkpoint atomically in a serialized pickle file, i.e., an existing checkpoint file is only replaced by a completely written one.
+        The arrays (parameters, SPSA sequences, intermediate results) are written as out-of-band buffers (see Serialization.to_pickle).
+
+        Args:
+            fname: Name of the checkpoint file
+        """
+        Serialization.to_pickle(self, fname)
+
+def get_VQECheckpoint_from_file(fname: str) -> VQECheckpoint:
+    if not os.path.isfile(fname):
+        raise ValueError("file {} does not exist!".format(fname))
+
+    # the checkpoint is read at once, such that the arrays of the resumed optimization are writable
+    checkpoint = Serialization.get_object_from_pickle(fname, mmap_mode=False)
+
+    if not isinstance(checkpoint, VQECheckpoint):
+        raise ValueError("loaded pickle object is no VQECheckpoint!")
+
+    return checkpoint
+
+def _get_sequence(value: Union[float, Sequence[float], Callable[[], Iterable], None],
+                  length: int) -> np.ndarray:
+    # convert a learning rate or perturbation of the SPSA optimizer (float, array or callable returning an iterator) to an array with length elements
+    if isinstance(value, float):
+        return np.full(length, value)
+    if isinstance(value, (list, np.ndarray)):
+        if len(value) < length:
+            raise ValueError("SPSA sequence of length {} is shorter than the number of iterations {}!".format(len(value), length))
+        return np.asarray(value[:length], dtype=float)
+    return np.fromiter(islice(value(), length), dtype=float, count=length)
+
+class VQECheckpointer:
+    """Writes checkpoints of an SPSA optimization run by the VQE.
+    It is installed into the qiskit SPSA optimizer of a VQEOptimizer object (termination checker and calibration) and into the VQE (callback for intermediate results).
+    The optimizer callback is not used, since SPSA evaluates the cost function an additional time per iteration if a callback is set.
+    """
+    def __init__(self,
+                 fname: str,
+                 checkpoint_interval: int = 1,
+                 previous_checkpoint: Union[VQECheckpoint, None] = None) -> None:
+        """
+        Args:
+            fname: Name of the checkpoint file.
+            checkpoint_interval: A checkpoint is written every checkpoint_interval optimizer iterations (and after the last iteration).
+            previous_checkpoint: Checkpoint the optimization is resumed from. Its iterations, cost function evaluations and intermediate results are continued.
+
+        Raises:
+            ValueError: If the checkpoint interval is not positive.
+        """
+        if checkpoint_interval <= 0:
+            raise ValueError("checkpoint interval {} must be a positive integer!".format(checkpoint_interval))
+        self.fname = fname
+        self.checkpoint_interval = checkpoint_interval
+        self.previous_checkpoint = previous_checkpoint
+
+        if previous_checkpoint is None:
+            self.iteration = 0
+            self.opt_nfev = 0
+            self.iresults = {"num_cost_fctn_calls": [], "energy_values": [], "circ_params": [], "est_meta": []}
+        else:
+            self.iteration = previous_checkpoint.iteration
+            self.opt_nfev = previous_checkpoint.opt_nfev
+            self.iresults = copy.deepcopy(previous_checkpoint.iresults)
+        self._eval_count_offset = len(self.iresults["num_cost_fctn_calls"])
+        self._opt_nfev_offset = self.opt_nfev
+
+        self._optimizer = None
+        self._termination_checker = None
+        self._maxiter = None
+        self._learning_rate = None
+        self._perturbation = None
+        self._calibration_list = None
+
+    def install(self,
+                vqe_optimizer: VQEO.VQEOptimizer,
+                calibration_list: List[cal.Calibration]) -> None:
+        """Installs the checkpointer into the SPSA optimizer of vqe_optimizer.
+
+        Args:
+            vqe_optimizer: VQEOptimizer object with SPSA optimizer. Its learning rate and perturbation are fixed to explicit sequences (calibrated by SPSA if not set).
+            calibration_list: Calibrations of the target model, ansatz, optimizer and estimator the optimization is started with.
+
+        Raises:
+            ValueError: If the optimizer is not a first-order SPSA optimizer or if it is blocking.
+        """
+        optimizer = vqe_optimizer.optimizer
+        if not isinstance(optimizer, optimizers.SPSA) or isinstance(optimizer, optimizers.QNSPSA) or optimizer.second_order:
+            raise ValueError("checkpoints are only supported for the (first-order) SPSA optimizer, but optimizer {} was given!".format(vqe_optimizer.parameters.optimizer_name))
+        if optimizer.blocking:
+            # SPSA skips the termination checker for rejected iterations
+            raise ValueError("checkpoints are not supported for the blocking SPSA optimizer!")
+
+        self._optimizer = optimizer
+        self._termination_checker = optimizer.termination_checker
+        if self.previous_checkpoint is None:
+            self._maxiter = optimizer.maxiter
+            self._calibration_list = [c.to_dict() for c in calibration_list]
+        else:
+            self._maxiter = self.previous_checkpoint.maxiter
+            self._calibration_list = self.previous_checkpoint.calibration_list
+            self._learning_rate = self.previous_checkpoint.learning_rate
+            self._perturbation = self.previous_checkpoint.perturbation
+
+        if optimizer.learning_rate is None and optimizer.perturbation is None:
+            # record the sequences of the SPSA calibration, such that they can be continued
+            calibrate_fctn = optimizer.calibrate
+            def calibrate(loss, initial_point, **kwargs):
+                get_eta, get_eps = calibrate_fctn(loss, initial_point, **kwargs)
+                self._learning_rate = _get_sequence(get_eta, self._maxiter)
+                self._perturbation = _get_sequence(get_eps, self._maxiter)
+                return (lambda: iter(self._learning_rate)), (lambda: iter(self._perturbation))
+            optimizer.calibrate = calibrate
+        elif self.previous_checkpoint is None:
+            self._learning_rate = _get_sequence(optimizer.learning_rate, self._maxiter)
+            self._perturbation = _get_sequence(optimizer.perturbation, self._maxiter)
+            optimizer.learning_rate = self._learning_rate
+            optimizer.perturbation = self._perturbation
+
+        optimizer.termination_checker = self.termination_checker
+
+    def vqe_callback(self,
+                     eval_count: int,
+                     params: Sequence[float],
+                     mean: float,
+                     meta: Dict) -> None:
+        """VQE callback that accumulates the intermediate results.
+        """
+        self.iresults["num_cost_fctn_calls"].append(eval_count + self._eval_count_offset)
+        self.iresults["energy_values"].append(mean)
+        self.iresults["circ_params"].append(params)
+        self.iresults["est_meta"].append(meta)
+
+    def termination_checker(self,
+                            nfev: int,
+                            params: Sequence[float],
+                            value: float,
+                            stepsize: float,
+                            accepted: bool) -> bool:
+        """SPSA termination checker that writes a checkpoint every checkpoint_interval iterations.
+        It is called by SPSA after every iteration and passes the arguments on to the termination checker of the optimizer (if there is one).
+
+        Returns:
+            Bool flag of the termination checker of the optimizer (False if there is none).
+        """
+        self.iteration += 1
+        self.opt_nfev = self._opt_nfev_offset + nfev
+
+        terminated = False
+        if self._termination_checker is not None:
+            terminated = bool(self._termination_checker(nfev, params, value, stepsize, accepted))
+
+        if self.iteration % self.checkpoint_interval == 0 or self.iteration >= self._maxiter or terminated:
+            checkpoint = VQECheckpoint(self.iteration, self._maxiter, np.array(params), value, self._learning_rate, self._perturbation, copy.deepcopy(algorithm_globals.random.bit_generator.state), self._termination_checker, terminated, self.opt_nfev, self.iresults, self._calibration_list)
+            checkpoint.to_file(self.fname)
+
+        return terminated
@@ -4,10 +4,14 @@ import numpy as np
 from typing import Callable, Dict, List, Optional, Tuple, Union
 from collections.abc import Iterable, Sequence
 from . import Calibration as cal
+from . import Serialization
 from qiskit.primitives import BaseEstimator
 from qiskit.primitives import Estimator as TerraEstimator
 from qiskit.primitives import BackendEstimator as BackendEstimator
 from qiskit_aer.primitives import Estimator as AerEstimator
+from qiskit.primitives import BaseSampler
+from qiskit.primitives import Sampler as TerraSampler
+from qiskit_aer.primitives import Sampler as AerSampler
 from qiskit_aer.noise import NoiseModel
 
 from qiskit.transpiler import PassManager
@@ -16,7 +20,134 @@ import qiskit_ibm_runtime as qir
 import copy
 import os
 import yaml
-import pickle
+import json
+import hashlib
+
+# per-process cache of the noise models loaded from or added to a NoiseModelStore (content hash -> noise model), i.e., every noise model is only unpickled once per process
+_NOISE_MODEL_CACHE = {}
+# content hashes of the cached noise model objects (id -> content hash), the objects are kept alive by _NOISE_MODEL_CACHE, so their ids are not reused
+_NOISE_MODEL_KEYS = {}
+
+def get_noise_model_hash(noise_model: NoiseModel) -> str:
+    """Content hash of a noise model, which is the same for noise models with identical errors.
+
+    Args:
+        noise_model: qiskit aer noise model.
+
+    Returns:
+        Hex digest of the sha256 hash of the canonical json of the serializable noise model dictionary (without the random ids of the errors).
+    """
+    key = _NOISE_MODEL_KEYS.get(id(noise_model), None)
+    if key is not None and _NOISE_MODEL_CACHE.get(key, None) is noise_model:
+        return key
+    noise_model_dict = noise_model.to_dict(serializable=True)
+    # the errors carry a random id, which is not part of the content
+    for error in noise_model_dict.get("errors", []):
+        error.pop("id", None)
+    noise_model_json = json.dumps(noise_model_dict, sort_keys=True, default=repr)
+    return hashlib.sha256(noise_model_json.encode("utf-8")).hexdigest()
+
+# noise models are part of the fingerprint of an estimator calibration by their content hash (see Calibration.get_fingerprint)
+cal.FINGERPRINT_TYPES[NoiseModel] = get_noise_model_hash
+
+def clear_noise_model_cache() -> None:
+    """Removes all noise models from the per-process cache of the noise model stores.
+    """
+    _NOISE_MODEL_CACHE.clear()
+    _NOISE_MODEL_KEYS.clear()
+
+class NoiseModelStore:
+    """Content-addressed store of noise models, which are shared by the yaml files of many estimator calibrations (see EstimatorCalibration.to_yaml).
+    Every noise model is saved once as <content hash>.pickle (pickle with out-of-band buffers, see Serialization.to_pickle) and referenced by its hash.
+    Loaded noise models are kept in a per-process cache, i.e., all estimator calibrations loaded from the store share the same noise model object.
+    Noise models must not be modified after they were added to or loaded from a store.
+    """
+    def __init__(self,
+                 path: str) -> None:
+        """
+        Args:
+            path: Directory of the store. It is created if it does not exist.
+        """
+        self.path = os.path.abspath(path)
+        os.makedirs(self.path, exist_ok=True)
+
+    def __repr__(self):
+        out = "NoiseModelStore(path={})".format(self.path)
+        return out
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.isfile(self.get_fname(key))
+
+    def get_fname(self,
+                  key: str) -> str:
+        """
+        Args:
+            key: Content hash of a noise model.
+
+        Returns:
+            Name of the pickle file of the noise model.
+        """
+        return os.path.join(self.path, key + ".pickle")
+
+    def add(self,
+            noise_model: NoiseModel) -> str:
+        """Adds a noise model to the store, it is only written if the store does not contain a noise model with the same content.
+
+        Args:
+            noise_model: qiskit aer noise model.
+
+        Returns:
+            Content hash of the noise model.
+
+        Raises:
+            ValueError: If noise_model is no qiskit aer NoiseModel.
+        """
+        if not isinstance(noise_model, NoiseModel):
+            raise ValueError("noise model {} is no qiskit_aer NoiseModel!".format(noise_model))
+        key = get_noise_model_hash(noise_model)
+        if key not in self:
+            # concurrent writers of the same noise model write identical files, which are replaced atomically
+            Serialization.to_pickle(noise_model, self.get_fname(key))
+        if key not in _NOISE_MODEL_CACHE:
+            _NOISE_MODEL_CACHE[key] = noise_model
+            _NOISE_MODEL_KEYS[id(noise_model)] = key
+        return key
+
+    def get(self,
+            key: str) -> NoiseModel:
+        """
+        Args:
+            key: Content hash of a noise model.
+
+        Returns:
+            Noise model from the per-process cache, it is loaded from the store if it is not cached yet.
+
+        Raises:
+            ValueError: If the store does not contain the noise model.
+        """
+        noise_model = _NOISE_MODEL_CACHE.get(key, None)
+        if noise_model is not None:
+            return noise_model
+        if key not in self:
+            raise ValueError("noise model {} does not exist in noise model store {}!".format(key, self.path))
+        # the arrays are read at once (and writable), since they are converted by the simulator anyway
+        noise_model = Serialization.get_object_from_pickle(self.get_fname(key), mmap_mode=False)
+        if not isinstance(noise_model, NoiseModel):
+            raise ValueError("Loaded noise model is no qiskit_aer NoiseModel!")
+        _NOISE_MODEL_CACHE[key] = noise_model
+        _NOISE_MODEL_KEYS[id(noise_model)] = key
+        return noise_model
+
+    def get_reference(self,
+                      key: str) -> Dict:
+        """
+        Args:
+            key: Content hash of a noise model.
+
+        Returns:
+            Reference to the noise model in the store as written to the yaml file of an estimator calibration.
+        """
+        return {"noise_model_store": self.path, "noise_model_hash": key}
 
 class EstimatorCalibration(cal.Calibration):
     def __init__(self,
@@ -51,8 +182,9 @@ class EstimatorCalibration(cal.Calibration):
 
         return out
 
-    def to_dict(self):
-        est_cal_dict = super().to_dict()
+    def to_dict(self,
+                deep_copy: bool = True):
+        est_cal_dict = super().to_dict(deep_copy)
         est_str = est_cal_dict.pop("_estimator_str")
         est_cal_dict["estimator_str"] = est_str
 
@@ -62,25 +194,31 @@ class EstimatorCalibration(cal.Calibration):
         return est_cal_dict
 
     def to_yaml(self,
-                fname: str):
+                fname: str,
+                noise_model_store: Union[NoiseModelStore, None] = None):
         # convert to dictionary
-        est_cal_dict = self.to_dict()
+        # (read-only view, only the option dictionaries are copied to replace the noise model, i.e., the noise model is not deep-copied)
+        est_cal_dict = self.to_dict(deep_copy=False)
+        est_cal_dict["estimator_options"] = {key: copy.copy(val) if isinstance(val, Dict) else val for key, val in est_cal_dict["estimator_options"].items()}
         # search for noise_model (should not be contained in the yaml but pickled 
+        # if a noise_model_store is given, the noise model is added to the store and referenced by its content hash, otherwise it is pickled next to the yaml file
         for key in est_cal_dict["estimator_options"].keys():
             # check only the dictionaries in estimator options
             if isinstance(est_cal_dict["estimator_options"][key], Dict):
                 # check if noise_model key exists
                 noise_model = est_cal_dict["estimator_options"][key].pop("noise_model", None)
                 # if noise_model is not None, replace with noise_model_str in yaml (when loaded this will be again replaced by pickled noise_model)
-                if noise_model is not None:
+                if noise_model is not None and noise_model_store is not None:
+                    est_cal_dict["estimator_options"][key]["noise_model"] = noise_model_store.get_reference(noise_model_store.add(noise_model))
+                elif noise_model is not None:
 
                     fname_noise_model, yaml_ext = os.path.splitext(fname)
                     fname_noise_model = fname_noise_model + "_noise_model.pickle"
                     
                     if os.path.isfile(fname_noise_model):
                         raise ValueError("file for saving noise_model {} does already exist!".format(fname_noise_model))
-                    with open(fname_noise_model, "wb") as f:
-                        pickle.dump(noise_model, f)
+                    # the matrices of the noise model are written as out-of-band buffers
+                    Serialization.to_pickle(noise_model, fname_noise_model)
 
                     # est_cal_dict["estimator_options"][key]["noise_model"] = est_cal_dict["noise_model_str"]
                     est_cal_dict["estimator_options"][key]["noise_model"] = fname_noise_model
@@ -349,10 +487,14 @@ def get_EstimatorCalibration_from_yaml(fname: str) -> EstimatorCalibration:
     with open(fname, "r") as f:
         raw_data = f.read()
 
-    est_cal_dict = yaml.load(raw_data, Loader=yaml.Loader)
+    est_cal_dict = cal.load_yaml(raw_data)
     if est_cal_dict is None:
         raise ValueError("Something went wrong while reading in yml text file! resulting dictionary is empty!")
-    
+
+    return get_EstimatorCalibration_from_yaml_dict(est_cal_dict)
+
+def get_EstimatorCalibration_from_yaml_dict(est_cal_dict: dict) -> EstimatorCalibration:
+    # dictionary of a yaml file (see EstimatorCalibration.to_yaml), the noise models are given by the file names of their pickle files or by references to a NoiseModelStore
     est_opt = est_cal_dict.get("estimator_options", None)
     if est_opt is None:
         raise ValueError("could not retrieve estimator options!")
@@ -361,13 +503,19 @@ def get_EstimatorCalibration_from_yaml(fname: str) -> EstimatorCalibration:
     for key in est_opt.keys():
         if isinstance(est_opt[key], Dict):
             fname_noise_model = est_opt[key].get("noise_model", None)
-            if fname_noise_model is not None:
+            if isinstance(fname_noise_model, Dict):
+                # reference to a noise model store (loaded once per process)
+                store_path = fname_noise_model.get("noise_model_store", None)
+                if store_path is None or not os.path.isdir(store_path):
+                    raise ValueError("Unable to find noise model store to load noise_model for estimator option {}. Looked for directory {}.".format(key, store_path))
+                est_cal_dict["estimator_options"][key]["noise_model"] = NoiseModelStore(store_path).get(fname_noise_model.get("noise_model_hash"))
+            elif fname_noise_model is not None:
                 
                 if not os.path.isfile(fname_noise_model):
                     raise ValueError("Unable to find pickle file to load noise_model for estimator option {}. Looked for file {}.".format(key, fname_noise_model))
                 
-                with open(fname_noise_model, "rb") as f:
-                    noise_model = pickle.load(f)
+                # plain pickle files and pickle files with out-of-band buffers, the arrays are read at once (and writable), since they are converted by the simulator anyway
+                noise_model = Serialization.get_object_from_pickle(fname_noise_model, mmap_mode=False)
 
                 if not isinstance(noise_model, NoiseModel):
                     raise ValueError("Loaded noise model is no qiskit_aer NoiseModel!")
@@ -381,9 +529,8 @@ def get_EstimatorCalibration_from_pickle(fname: str) -> EstimatorCalibration:
     if not os.path.isfile(fname):
         raise ValueError("file {} does not exist!".format(fname))
 
-    est_cal = None
-    with open(fname, "rb") as f:
-        est_cal = pickle.load(f)
+    # plain pickle files and pickle files with out-of-band buffers (see Calibration.to_pickle)
+    est_cal = Serialization.get_object_from_pickle(fname)
 
     if not isinstance(est_cal, EstimatorCalibration):
         raise ValueError("loaded pickle object is no EstimatorCalibration!")
@@ -401,6 +548,8 @@ class VQEEstimator:
                 raise ValueError("session must be a runtime session for ibm runtime estimator!")
         self._session = session
         self._estimator = self._get_estimator()
+        # sampler primitive with the same options, generated on demand (e.g. for fidelities of the QNSPSA optimizer)
+        self._sampler = None
 
     @property
     def parameters(self):
@@ -426,6 +575,12 @@ class VQEEstimator:
     def estimator(self):
         return self._estimator
 
+    @property
+    def sampler(self):
+        if self._sampler is None:
+            self._sampler = self._get_sampler()
+        return self._sampler
+
     def __repr__(self):
         out = "VQEEstimator(estimator_parameters={}, session={})".format(self.parameters, self.session)
 
@@ -445,19 +600,40 @@ class VQEEstimator:
 
     def _update_estimator(self) -> None:
         self._estimator = self._get_estimator()
+        self._sampler = None
+
+    def _get_runtime_options(self) -> qir.options.Options:
+        options_dict = self._parameters.estimator_options
+        options = qir.options.Options(optimization_level=options_dict["optimization_level"], resilience_level=options_dict["resilience_level"], max_execution_time=options_dict["max_execution_time"], transpilation=options_dict["transpilation_options"], resilience=options_dict["resilience_options"], execution=options_dict["execution_options"], environment=options_dict["environment_options"], simulator=options_dict["simulator_options"])
+        return options
 
     def _get_estimator(self) -> BaseEstimator:
         options_dict = self._parameters.estimator_options
         if self._parameters.estimator_str == "aer":
             est = AerEstimator(backend_options=options_dict["backend_options"], transpile_options=options_dict["transpilation_options"], run_options=options_dict["run_options"], approximation=options_dict["approximation"], skip_transpilation=options_dict["skip_transpilation"], abelian_grouping=options_dict["abelian_grouping"])
         elif self._parameters.estimator_str == "ibm_runtime":
-            options = qir.options.Options(optimization_level=options_dict["optimization_level"], resilience_level=options_dict["resilience_level"], max_execution_time=options_dict["max_execution_time"], transpilation=options_dict["transpilation_options"], resilience=options_dict["resilience_options"], execution=options_dict["execution_options"], environment=options_dict["environment_options"], simulator=options_dict["simulator_options"])
-            est = qir.Estimator(session=self._session, options=options)
+            est = qir.Estimator(session=self._session, options=self._get_runtime_options())
         elif self._parameters.estimator_str == "terra":
             est = TerraEstimator(options=options_dict["run_options"])
         else:
             raise ValueError("estimator string {} in parameters does not match any known string!".format(self._parameters.estimator_str))
         return est
+
+    def _get_sampler(self) -> BaseSampler:
+        options_dict = self._parameters.estimator_options
+        if self._parameters.estimator_str == "aer":
+            # the aer sampler calculates exact probabilities if shots is None (like the estimator in approximation mode)
+            run_options = copy.copy(options_dict["run_options"])
+            if options_dict["approximation"]:
+                run_options["shots"] = None
+            sam = AerSampler(backend_options=options_dict["backend_options"], transpile_options=options_dict["transpilation_options"], run_options=run_options, skip_transpilation=options_dict["skip_transpilation"])
+        elif self._parameters.estimator_str == "ibm_runtime":
+            sam = qir.Sampler(session=self._session, options=self._get_runtime_options())
+        elif self._parameters.estimator_str == "terra":
+            sam = TerraSampler(options=options_dict["run_options"])
+        else:
+            raise ValueError("estimator string {} in parameters does not match any known string!".format(self._parameters.estimator_str))
+        return sam
         
                 
                 
@@ -4,22 +4,38 @@ from typing import Callable, Dict, List, Optional, Tuple, Union
 from collections.abc import Iterable, Sequence
 from . import TerminationChecker as tc
 from . import Calibration as cal
+from . import Serialization
 import qiskit.algorithms.optimizers as optimizers
-from qiskit.algorithms.gradients import BaseEstimatorGradient
-from qiskit.primitives import BaseEstimator
-# from qiskit.algorithms.gradients import DerivativeType
+from qiskit.algorithms.optimizers.spsa import powerseries
+from qiskit.algorithms.gradients import BaseEstimatorGradient, ParamShiftEstimatorGradient, FiniteDiffEstimatorGradient, SPSAEstimatorGradient, ReverseEstimatorGradient
+from qiskit.primitives import BaseEstimator, BaseSampler
+from qiskit import QuantumCircuit
+from qiskit.primitives import Estimator as TerraEstimator
+from qiskit_aer.primitives import Estimator as AerEstimator
+from . import VQEEstimator as VQEE
+from qiskit.algorithms.gradients import DerivativeType
 import copy
 import os
-import pickle
 import yaml
 
+# supported gradient method strings for gradient-based optimizers
+GRADIENT_METHODS = ["param_shift", "fin_diff", "spsa", "adjoint"]
+# gradient-based optimizers, which use the gradient object from VQEOptimizer.get_gradient
+GRADIENT_OPTIMIZERS = ["L_BFGS_B", "ADAM", "GradientDescent"]
+# SPSA-type optimizers, which calculate their gradient intrinsically via finite differences
+SPSA_OPTIMIZERS = ["SPSA", "2SPSA", "QNSPSA"]
+# maximal number of points of the second-order SPSA optimizers that are evaluated in one batched primitive job
+SPSA_MAX_EVALS_GROUPED = 50
+
 class OptimizerCalibration(cal.Calibration):
     def __init__(self,
                  name_str: str,
                  maxiter: int,
                  grad_meth: str,
                  param_map_init: Union[Sequence[float], Dict[str, float], None] = None,
-                 termination_checker: Union[tc.TerminationChecker, None] = None) -> None:
+                 termination_checker: Union[tc.TerminationChecker, None] = None,
+                 grad_epsilon: float = 1e-02,
+                 optimizer_options: Union[Dict, None] = None) -> None:
         super().__init__("OptimizerCalibration")
         self.optimizer_name = name_str
 
@@ -30,6 +46,11 @@ class OptimizerCalibration(cal.Calibration):
 
         self.grad_meth = grad_meth
 
+        if grad_epsilon > 0.0:
+            self.grad_epsilon = grad_epsilon
+        else:
+            raise ValueError("gradient epsilon must be positive!")
+
         self._param_map_init = param_map_init
 
         if self.param_map_init is None:
@@ -38,6 +59,12 @@ class OptimizerCalibration(cal.Calibration):
             self._use_custom_param_init = True
 
         self.termination_checker = termination_checker
+
+        if optimizer_options is not None:
+            for key in ["maxiter", "termination_checker", "fidelity"]:
+                if key in optimizer_options:
+                    raise ValueError("optimizer option {} can't be set via the optimizer options!".format(key))
+        self.optimizer_options = optimizer_options
     
     @property
     def param_map_init(self):
@@ -56,13 +83,20 @@ class OptimizerCalibration(cal.Calibration):
     def use_custom_param_init(self):
         return self._use_custom_param_init
 
+    def __setstate__(self, state):
+        # calibrations pickled before the gradient epsilon and the optimizer options were added get their default values
+        state.setdefault("grad_epsilon", 1e-02)
+        state.setdefault("optimizer_options", None)
+        self.__dict__.update(state)
+
     def __repr__(self):
-        out = "OptimizerCalibration(name_str={}, maxiter={}, grad_meth={}, param_map_init={}, termination_checker={})".format(self.optimizer_name, self.maxiter, self.grad_meth, self.param_map_init, self.termination_checker)
+        out = "OptimizerCalibration(name_str={}, maxiter={}, grad_meth={}, param_map_init={}, termination_checker={}, grad_epsilon={}, optimizer_options={})".format(self.optimizer_name, self.maxiter, self.grad_meth, self.param_map_init, self.termination_checker, self.grad_epsilon, self.optimizer_options)
 
         return out
 
-    def to_dict(self):
-        opt_cal_dict = super().to_dict()
+    def to_dict(self,
+                deep_copy: bool = True):
+        opt_cal_dict = super().to_dict(deep_copy)
         param_map_init = opt_cal_dict.pop("_param_map_init")
         opt_cal_dict["param_map_init"] = param_map_init
 
@@ -76,13 +110,7 @@ class OptimizerCalibration(cal.Calibration):
         opt_cal_dict = self.to_dict()
         term_checker = opt_cal_dict.pop("termination_checker", None)
         if term_checker is not None:
-            term_checker_dict = term_checker.to_dict()
-            vals = term_checker_dict.pop("values", [])
-            if isinstance(vals, np.ndarray):
-                term_checker_dict["values"] = vals.tolist()
-            else:
-                term_checker_dict["values"] = []
-            opt_cal_dict["termination_checker"] = term_checker_dict
+            opt_cal_dict["termination_checker"] = _get_termination_checker_yaml_dict(term_checker.to_dict())
 
         if os.path.isfile(fname):
             raise ValueError("file {} does already exist!".format(fname))
@@ -109,6 +137,9 @@ class OptimizerCalibration(cal.Calibration):
         header.append("grad_method")
         data.append(self.grad_meth)
 
+        header.append("grad_epsilon")
+        data.append(self.grad_epsilon)
+
         header.append("use_custom_param_init")
         data.append(self.use_custom_param_init)
 
@@ -120,6 +151,20 @@ class OptimizerCalibration(cal.Calibration):
 
         return header, data
     
+def _get_termination_checker_yaml_dict(term_checker_dict: dict) -> dict:
+    # history buffer values are not written to yaml files (also not the ones of combined termination checkers)
+    vals = term_checker_dict.pop("values", [])
+    if isinstance(vals, np.ndarray):
+        term_checker_dict["values"] = vals.tolist()
+    else:
+        term_checker_dict["values"] = []
+    if "checkers" in term_checker_dict:
+        term_checker_dict["checkers"] = [_get_termination_checker_yaml_dict(checker_dict) for checker_dict in term_checker_dict["checkers"]]
+    return term_checker_dict
+
+# termination checkers are part of the fingerprint of an optimizer calibration without their history buffer (see Calibration.get_fingerprint)
+cal.FINGERPRINT_TYPES[tc.TerminationChecker] = lambda term_checker: _get_termination_checker_yaml_dict(term_checker.to_dict())
+
 def get_OptimizerCalibration_from_dict(opt_cal_dict: dict) -> OptimizerCalibration:
     
     name_str = opt_cal_dict.pop("optimizer_name", None)
@@ -149,11 +194,15 @@ def get_OptimizerCalibration_from_yaml(fname: str) -> OptimizerCalibration:
     with open(fname, "r") as f:
         raw_data = f.read()
 
-    opt_cal_dict = yaml.load(raw_data, Loader=yaml.Loader)
+    opt_cal_dict = cal.load_yaml(raw_data)
     if opt_cal_dict is None:
         raise ValueError("Something went wrong while reading in yml text file! resulting dictionary is empty!")
-    
-    term_checker_dict = opt_cal_dict.pop("termination_checker")
+
+    return get_OptimizerCalibration_from_yaml_dict(opt_cal_dict)
+
+def get_OptimizerCalibration_from_yaml_dict(opt_cal_dict: dict) -> OptimizerCalibration:
+    # dictionary of a yaml file (see OptimizerCalibration.to_yaml), the termination checker is given by its dictionary
+    term_checker_dict = opt_cal_dict.pop("termination_checker", None)
     if term_checker_dict is not None:
         term_checker_name = term_checker_dict.pop("name")
         term_checker = tc.get_termination_checker_from_name(term_checker_name, **term_checker_dict)
@@ -165,9 +214,8 @@ def get_OptimizerCalibration_from_pickle(fname: str) -> OptimizerCalibration:
     if not os.path.isfile(fname):
         raise ValueError("file {} does not exist!".format(fname))
 
-    opt_cal = None
-    with open(fname, "rb") as f:
-        opt_cal = pickle.load(f)
+    # plain pickle files and pickle files with out-of-band buffers (see Calibration.to_pickle)
+    opt_cal = Serialization.get_object_from_pickle(fname)
 
     if not isinstance(opt_cal, OptimizerCalibration):
         raise ValueError("loaded pickle object is no OptimizerCalibration!")
@@ -180,6 +228,10 @@ class VQEOptimizer:
                  optimizer_parameters: OptimizerCalibration) -> None:
         self._parameters = optimizer_parameters
         self._optimizer = self._get_optimizer()
+        # gradient objects of get_gradient, they are reused for the same estimator (and thus their gradient circuits)
+        self._gradient_cache = {}
+        # fidelity function of the QNSPSA optimizer of set_fidelity
+        self._fidelity_cache = None
         #self._parameters_updated = False
 
     @property
@@ -214,18 +266,202 @@ class VQEOptimizer:
         self._optimizer = self._get_optimizer()
 
     def _get_optimizer(self) -> optimizers.optimizer.Optimizer:
-        if self.parameters.optimizer_name == "SPSA":
+        # additional keyword arguments of the qiskit optimizer class (e.g. learning_rate, perturbation or regularization of the SPSA optimizers)
+        opt_kwargs = self.parameters.optimizer_options
+        if opt_kwargs is None:
+            opt_kwargs = {}
+        if self.parameters.optimizer_name in SPSA_OPTIMIZERS:
             if self.parameters.grad_meth != "fin_diff":
                 raise ValueError("assigned gradient method string {} is not compatible with {} optimizer, since finite difference gradient is intrinsically used!".format(self.parameters.grad_meth, self.parameters.optimizer_name))
-            return optimizers.SPSA(maxiter = self.parameters.maxiter, termination_checker=self.parameters.termination_checker)
+            if self.parameters.optimizer_name == "SPSA":
+                return optimizers.SPSA(maxiter = self.parameters.maxiter, termination_checker=self.parameters.termination_checker, **opt_kwargs)
+
+            if self.parameters.optimizer_name == "2SPSA":
+                optimizer = optimizers.SPSA(maxiter = self.parameters.maxiter, second_order=True, termination_checker=self.parameters.termination_checker, **opt_kwargs)
+            else:
+                # the fidelity of the ansatz circuit is set via set_fidelity before running the optimizer
+                optimizer = optimizers.QNSPSA(None, maxiter = self.parameters.maxiter, termination_checker=self.parameters.termination_checker, **opt_kwargs)
+            # the loss (and fidelity) points of an iteration are evaluated in one batched job each
+            optimizer.set_max_evals_grouped(SPSA_MAX_EVALS_GROUPED)
+            return optimizer
+        elif self.parameters.optimizer_name in GRADIENT_OPTIMIZERS:
+            if self.parameters.grad_meth not in GRADIENT_METHODS:
+                raise ValueError("assigned gradient method string {} is not compatible with {} optimizer! Supported gradient methods are {}.".format(self.parameters.grad_meth, self.parameters.optimizer_name, GRADIENT_METHODS))
+            if self.parameters.termination_checker is not None:
+                raise ValueError("{} optimizer does not support a termination checker, but termination checker {} was assigned!".format(self.parameters.optimizer_name, self.parameters.termination_checker))
+
+            if self.parameters.optimizer_name == "L_BFGS_B":
+                return optimizers.L_BFGS_B(maxiter = self.parameters.maxiter, **opt_kwargs)
+            elif self.parameters.optimizer_name == "ADAM":
+                return optimizers.ADAM(maxiter = self.parameters.maxiter, **opt_kwargs)
+            else:
+                return optimizers.GradientDescent(maxiter = self.parameters.maxiter, **opt_kwargs)
         else:
             raise ValueError("optimizer name string {} does not match any supported optimizer class!".format(self.parameters.optimizer_name))
                  
 
+    def set_fidelity(self,
+                     circuit: QuantumCircuit,
+                     sampler: BaseSampler) -> None:
+        # QNSPSA estimates the Fubini-Study metric of the ansatz from fidelities of the ansatz state with itself (compute-uncompute circuits run by the sampler).
+        # The metric estimate is smoothed over the iterations by QNSPSA. The fidelity object is kept for the same circuit and sampler, such that its circuits are cached.
+        # Nothing is done for other optimizers.
+        if not isinstance(self._optimizer, optimizers.QNSPSA):
+            return
+        if self._fidelity_cache is None or self._fidelity_cache[0] is not circuit or self._fidelity_cache[1] is not sampler:
+            self._fidelity_cache = (circuit, sampler, optimizers.QNSPSA.get_fidelity(circuit, sampler))
+        self._optimizer.fidelity = self._fidelity_cache[2]
+
     def get_gradient(self,
                      estimator: BaseEstimator,
                      options: Union[Dict, None] = None,
-                     derivative_type: None = None) -> Union[BaseEstimatorGradient, None]:
-        # To-do: implement gradient objects properly
-        return None
-        
+                     derivative_type: DerivativeType = DerivativeType.REAL,
+                     estimator_cal: Union[VQEE.EstimatorCalibration, None] = None) -> Union[BaseEstimatorGradient, None]:
+        # SPSA calculates its gradient intrinsically via finite differences
+        if self.parameters.optimizer_name not in GRADIENT_OPTIMIZERS:
+            return None
+        key = (id(estimator), self.parameters.grad_meth, self.parameters.grad_epsilon, repr(options), derivative_type, repr(estimator_cal))
+        cached = self._gradient_cache.get(key, None)
+        if cached is not None and cached[0] is estimator:
+            return cached[1]
+        gradient = self._get_gradient(estimator, options, derivative_type, estimator_cal)
+        self._gradient_cache[key] = (estimator, gradient)
+        return gradient
+
+    def _get_gradient(self,
+                      estimator: BaseEstimator,
+                      options: Union[Dict, None],
+                      derivative_type: DerivativeType,
+                      estimator_cal: Union[VQEE.EstimatorCalibration, None]) -> BaseEstimatorGradient:
+        # all gradient objects evaluate the shifted parameter sets of one gradient in a single batched estimator job.
+        # The same (unbound) circuit object is used for all shifted parameter sets, such that the estimator only processes it once.
+        if self.parameters.grad_meth == "param_shift":
+            return ParamShiftEstimatorGradient(estimator, options=options, derivative_type=derivative_type)
+        elif self.parameters.grad_meth == "fin_diff":
+            return FiniteDiffEstimatorGradient(estimator, self.parameters.grad_epsilon, options=options)
+        elif self.parameters.grad_meth == "spsa":
+            return SPSAEstimatorGradient(estimator, self.parameters.grad_epsilon, options=options)
+        elif self.parameters.grad_meth == "adjoint":
+            # adjoint differentiation computes the full gradient with one forward and one backward sweep over the bound circuit on a statevector.
+            # The gradient is calculated by qiskit's own statevector simulation and not by the given estimator, i.e., its options, transpilation, abelian grouping and job accounting are not used.
+            # It is therefore only valid if the estimator itself calculates exact (noiseless) expectation values.
+            if not is_exact_estimator(estimator, estimator_cal):
+                raise ValueError("adjoint gradient method requires an exact (noiseless statevector) estimator, but estimator {} uses shots or a noise model!".format(estimator))
+            return ReverseEstimatorGradient(derivative_type=derivative_type)
+        else:
+            raise ValueError("gradient method string {} does not match any supported gradient method!".format(self.parameters.grad_meth))
+
+def is_exact_estimator(estimator: BaseEstimator,
+                       estimator_cal: Union[VQEE.EstimatorCalibration, None] = None) -> bool:
+    """Check if an estimator primitive calculates exact (noiseless) expectation values, i.e., a terra Estimator without shots or an Aer Estimator in approximation mode without shots and without noise model.
+
+    Args:
+        estimator: Estimator primitive that should be checked.
+        estimator_cal: Optional calibration the estimator was generated from. If given, shots and noise models set in its estimator options are checked as well.
+
+    Returns:
+        Bool flag that is True if the expectation values of the estimator are exact and False otherwise.
+    """
+    if estimator_cal is not None:
+        for key, val in estimator_cal.estimator_options.items():
+            if isinstance(val, Dict):
+                if val.get("noise_model", None) is not None:
+                    return False
+                if val.get("shots", None) is not None:
+                    return False
+
+    if isinstance(estimator, AerEstimator):
+        if estimator._backend.options.noise_model is not None:
+            return False
+        return estimator._approximation and estimator._run_options.get("shots", None) is None
+    if isinstance(estimator, TerraEstimator):
+        return getattr(estimator.options, "shots", None) is None
+
+    return False
+
+class SPSACalibrationCache:
+    """Cache of the calibrated SPSA learning rate and perturbation per problem fingerprint (see Calibration.get_fingerprint).
+    The SPSA calibration costs 50 additional cost function evaluations at the start of every run, with the cache it is only done once per problem.
+    The cache can optionally be persisted in a yaml file.
+    """
+    def __init__(self,
+                 fname: Union[str, None] = None) -> None:
+        """
+        Args:
+            fname: Optional yaml file of the cache. If the file exists, the cache is loaded from it and every new entry is written to it.
+        """
+        self.fname = fname
+        self.entries = {}
+        if fname is not None and os.path.isfile(fname):
+            with open(fname, "r") as f:
+                entries = cal.load_yaml(f.read())
+            if entries is not None:
+                self.entries = entries
+
+    def __repr__(self):
+        out = "SPSACalibrationCache(fname={}, entries={})".format(self.fname, len(self.entries))
+        return out
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def get(self,
+            key: str) -> Union[Dict, None]:
+        """
+        Args:
+            key: Problem fingerprint.
+
+        Returns:
+            Dictionary with the calibrated learning rate a and perturbation c (None if key is not cached).
+        """
+        return self.entries.get(key, None)
+
+    def set(self,
+            key: str,
+            a: float,
+            c: float) -> None:
+        """Add the calibrated learning rate a and perturbation c of a problem to the cache and write the cache file (if given).
+        """
+        self.entries[key] = {"a": float(a), "c": float(c)}
+        if self.fname is not None:
+            fname_tmp = self.fname + ".tmp"
+            with open(fname_tmp, "w") as f:
+                yaml.dump(self.entries, f)
+            os.replace(fname_tmp, self.fname)
+
+    def install(self,
+                vqe_optimizer: VQEOptimizer,
+                key: str) -> bool:
+        """Use the cached calibration for the SPSA optimizer of vqe_optimizer or, if key is not cached, add the calibration of its next run to the cache.
+        Nothing is done for other optimizers or if the learning rate and perturbation of the SPSA optimizer are already set.
+
+        Args:
+            vqe_optimizer: VQEOptimizer object.
+            key: Problem fingerprint.
+
+        Returns:
+            Bool flag that is True if a cached calibration is used and False otherwise.
+        """
+        optimizer = vqe_optimizer.optimizer
+        if not isinstance(optimizer, optimizers.SPSA) or isinstance(optimizer, optimizers.QNSPSA):
+            return False
+        if optimizer.learning_rate is not None or optimizer.perturbation is not None:
+            return False
+
+        entry = self.get(key)
+        if entry is not None:
+            # same power series as returned by SPSA.calibrate (with its default exponents and no stability constant)
+            a = entry["a"]
+            c = entry["c"]
+            optimizer.learning_rate = lambda: powerseries(a, 0.602, 0)
+            optimizer.perturbation = lambda: powerseries(c, 0.101)
+            return True
+
+        calibrate_fctn = optimizer.calibrate
+        def calibrate(loss, initial_point, **kwargs):
+            get_eta, get_eps = calibrate_fctn(loss, initial_point, **kwargs)
+            # first elements of the power series are a and c
+            self.set(key, next(get_eta()), next(get_eps()))
+            return get_eta, get_eps
+        optimizer.calibrate = calibrate
+        return False
@@ -23,18 +23,20 @@ class ResultData:
     def to_dict(self):
         return copy.copy(self.__dict__)
 
-    def get_filevector(self):
+    def get_filevector(self,
+                       exclude_keys: Sequence[str] = ()):
         """
         Define method to write the result data in a list format
+        The attributes in exclude_keys are skipped (without copying the result data).
 
         output: (header, data)
         """
         header = []
         data = []
 
-        res_dict = self.to_dict()
-
-        for key, val in res_dict.items():
+        for key, val in self.__dict__.items():
+            if key in exclude_keys:
+                continue
             if isinstance(val, Sequence):
                 for i in range(len(val)):
                     header.append(key+str(i))
@@ -45,7 +47,27 @@ class ResultData:
 
         return header, data
 
-class ReferenceResult:
+class _CompactResult:
+    # results store their attributes in __slots__ (no instance dictionary per result), pickles of results with an instance dictionary can still be loaded
+    __slots__ = ()
+    # values of attributes that were added to a result class later, used for pickles of results without these attributes (other missing attributes are None)
+    _STATE_DEFAULTS = {}
+
+    def __getstate__(self):
+        return {key: getattr(self, key) for cls in type(self).__mro__ for key in getattr(cls, "__slots__", ())}
+
+    def __setstate__(self, state):
+        if isinstance(state, tuple):
+            # (instance dictionary, slots) state of the default pickling of objects with slots
+            state = dict(state[0] or {}, **(state[1] or {}))
+        slots = [key for cls in type(self).__mro__ for key in getattr(cls, "__slots__", ())]
+        state = {**dict.fromkeys(slots), **self._STATE_DEFAULTS, **state}
+        for key, val in state.items():
+            setattr(self, key, val)
+
+class ReferenceResult(_CompactResult):
+    __slots__ = ("_data", "_calibration_list")
+
     def __init__(self,
                  data: ResultData,
                  cal_list: List[cal.Calibration]):
@@ -64,11 +86,13 @@ class ReferenceResult:
         out = "ReferenceResult(data={}, cal_list={})".format(self._data, self._calibration_list)
         return out
     
-    def to_dict(self):
+    def to_dict(self,
+                deep_copy: bool = True):
+        # deep_copy = False returns a read-only view, i.e., the calibration dictionaries share their values (e.g. noise models) with the calibrations
         result_dict = self._data.to_dict()
         cnt = 0
         for cal in self._calibration_list:
-            cal_dict = cal.to_dict()
+            cal_dict = cal.to_dict(deep_copy)
             cal_name = cal_dict.pop("name", None)
             if cal_name is None:
                 cal_name = "unknown_cal"+str(cnt)
@@ -97,14 +121,19 @@ class ReferenceResult:
         
         return header, data
 
-class VQEResult:
+class VQEResult(_CompactResult):
+    __slots__ = ("_data", "_calibration_list", "_reference", "_metadata")
+    _STATE_DEFAULTS = {"_reference": None, "_metadata": None}
+
     def __init__(self,
                  vqe_data: ResultData,
                  vqe_cal_list: List[cal.Calibration],
-                 reference_result: Union[ReferenceResult, None] = None) -> None:
+                 reference_result: Union[ReferenceResult, None] = None,
+                 metadata: Union[Dict, None] = None) -> None:
         self._data = vqe_data
         self._calibration_list = vqe_cal_list
         self._reference = reference_result
+        self._metadata = metadata
 
     @property
     def calibration_list(self):
@@ -118,15 +147,23 @@ class VQEResult:
     def reference(self):
         return self._reference
 
+    @property
+    def metadata(self):
+        return self._metadata
+
     def __repr__(self):
         out = "VQEResult(vqe_data={}, vqe_cal_list={}, reference_result={})".format(self._data, self._calibration_list, self._reference)
+        if self._metadata is not None:
+            out = out[:-1] + ", metadata={})".format(self._metadata)
         return out
 
-    def to_dict(self):
+    def to_dict(self,
+                deep_copy: bool = True):
+        # deep_copy = False returns a read-only view, i.e., the calibration dictionaries share their values (e.g. noise models) with the calibrations
         result_dict = self._data.to_dict()
         cnt = 0
         for cal in self._calibration_list:
-            cal_dict = cal.to_dict()
+            cal_dict = cal.to_dict(deep_copy)
             cal_name = cal_dict.pop("name", None)
             if cal_name is None:
                 cal_name = "unknown_cal"+str(cnt)
@@ -136,7 +173,11 @@ class VQEResult:
         if self._reference is None:
             result_dict["reference"] = None
         else:
-            result_dict["reference"] = self._reference.to_dict()
+            result_dict["reference"] = self._reference.to_dict(deep_copy)
+
+        # metadata (e.g. per-start data of a multi-start run) is not part of the file vector
+        if self._metadata is not None:
+            result_dict["metadata"] = self._metadata
 
         return result_dict
 
@@ -171,7 +212,10 @@ class VQEResult:
         
         return header, data
 
-class InferenceResult:
+class InferenceResult(_CompactResult):
+    __slots__ = ("_data", "_calibration_list", "_vqe_reference", "_metadata")
+    _STATE_DEFAULTS = {"_metadata": None}
+
     def __init__(self,
                  inference_data: ResultData,
                  inference_cal_list: List[cal.Calibration],
@@ -202,18 +246,20 @@ class InferenceResult:
         out = "InferenceResult(inference_data={}, inference_cal_list={}, vqe_result={}, metadata={})".format(self._data, self._calibration_list, self._vqe_reference, self._metadata)
         return out
     
-    def to_dict(self):
+    def to_dict(self,
+                deep_copy: bool = True):
+        # deep_copy = False returns a read-only view, i.e., the calibration dictionaries share their values (e.g. noise models) with the calibrations
         result_dict = self._data.to_dict()
         cnt = 0
         for cal in self._calibration_list:
-            cal_dict = cal.to_dict()
+            cal_dict = cal.to_dict(deep_copy)
             cal_name = cal_dict.pop("name", None)
             if cal_name is None:
                 cal_name = "unknown_cal"+str(cnt)
                 cnt += 1
             result_dict[cal_name] = cal_dict
 
-        result_dict["vqe_reference"] = self._vqe_reference.to_dict()
+        result_dict["vqe_reference"] = self._vqe_reference.to_dict(deep_copy)
         result_dict["metadata"] = self._metadata
 
         return result_dict
@@ -232,12 +278,9 @@ class InferenceResult:
             header.extend(cal_header)
             data.extend(cal_data)
 
-        vqe_ref_data_no_angles = copy.deepcopy(self._vqe_reference.data)
-        #print(vqe_ref_data_no_angles)
         # remove double display of angles in filevector
-        if hasattr(self._data, "angles"):
-            delattr(vqe_ref_data_no_angles, "angles")
-        curr_header, curr_data = vqe_ref_data_no_angles.get_filevector()
+        exclude_keys = ["angles"] if hasattr(self._data, "angles") else []
+        curr_header, curr_data = self._vqe_reference.data.get_filevector(exclude_keys)
         curr_header = [s + "_vqe" for s in curr_header]
         header.extend(curr_header)
         data.extend(curr_data)
@@ -247,4 +290,50 @@ class InferenceResult:
         header.extend(curr_header)
         data.extend(curr_data)
         
-        return header, data
\ No newline at end of file
+        return header, data
+
+# results (e.g. the reference of a run) are part of a fingerprint by their dictionary (see Calibration.get_fingerprint)
+for _result_type in [ReferenceResult, VQEResult, InferenceResult]:
+    cal.FINGERPRINT_TYPES[_result_type] = lambda result: result.to_dict(deep_copy=False)
+
+def intern_results(results: Iterable[Union[ReferenceResult, VQEResult, InferenceResult]],
+                   registry: Union[cal.CalibrationRegistry, None] = None) -> None:
+    """Replaces the calibrations of results (and of their reference results) by the shared instances of a calibration registry, and nested results with identical content
+    (e.g. the same exact diagonalization reference of many VQE results, the VQE result of many inference results) by one shared result. The results are modified in place.
+    Afterwards, the calibrations and nested results of the results are shared and must not be modified.
+
+    Args:
+        results: Results, e.g. loaded from pickle files.
+        registry: Calibration registry (Calibration.CALIBRATION_REGISTRY if None).
+    """
+    if registry is None:
+        registry = cal.CALIBRATION_REGISTRY
+    # fingerprints of the objects of this call by id, the objects are kept alive such that their ids stay unique, i.e., shared objects are only hashed once
+    fingerprints = {}
+    nested_results = {}
+
+    def get_fingerprint(calibration):
+        if id(calibration) not in fingerprints:
+            fingerprints[id(calibration)] = (calibration, registry.get_fingerprint(calibration))
+        return fingerprints[id(calibration)][1]
+
+    def intern_nested(result):
+        if id(result) not in fingerprints:
+            fingerprints[id(result)] = (result, intern_result(result))
+        fingerprint = fingerprints[id(result)][1]
+        return nested_results.setdefault(fingerprint, result), fingerprint
+
+    def intern_result(result) -> str:
+        # interns the calibrations and the nested result of a result and returns the fingerprint of the result (built from the fingerprints of its parts)
+        cal_fingerprints = [get_fingerprint(c) for c in result._calibration_list]
+        result._calibration_list = [registry.intern(c, fingerprint) for c, fingerprint in zip(result._calibration_list, cal_fingerprints)]
+        nested_fingerprint = None
+        if isinstance(result, VQEResult) and result._reference is not None:
+            result._reference, nested_fingerprint = intern_nested(result._reference)
+        elif isinstance(result, InferenceResult):
+            result._vqe_reference, nested_fingerprint = intern_nested(result._vqe_reference)
+        metadata = None if isinstance(result, ReferenceResult) else result._metadata
+        return cal.get_fingerprint([], {"type": type(result).__name__, "data": result._data.to_dict(), "calibrations": cal_fingerprints, "nested": nested_fingerprint, "metadata": metadata})
+
+    for result in results:
+        intern_result(result)
@@ -5,10 +5,10 @@ from collections.abc import Iterable, Sequence
 from qiskit.quantum_info import PauliList, SparsePauliOp
 from qiskit.opflow import PauliSumOp
 from . import Calibration as cal
+from . import Serialization
 import copy
 import abc
 import os
-import pickle
 import yaml
 
 class ModelCalibration(cal.Calibration):
@@ -19,7 +19,7 @@ class ModelCalibration(cal.Calibration):
 
     def __repr__(self):
         string_list = []
-        attr_dict = self.to_dict()
+        attr_dict = self.to_dict(deep_copy=False)
         cal_name = attr_dict.pop("name", None)
         for k, v in attr_dict.items():
             string_list.append(f"{k}={v}")
@@ -28,8 +28,9 @@ class ModelCalibration(cal.Calibration):
 
         return out
 
-    def to_dict(self) -> Dict:
-        attr_dict = super().to_dict()
+    def to_dict(self,
+                deep_copy: bool = True) -> Dict:
+        attr_dict = super().to_dict(deep_copy)
         #cal_name = attr_dict.pop("name", None)
 
         return attr_dict
@@ -53,7 +54,7 @@ class ModelCalibration(cal.Calibration):
         header = []
         data = []
 
-        attr_dict = self.to_dict()
+        attr_dict = self.to_dict(deep_copy=False)
         cal_name = attr_dict.pop("name", None)
 
         for key, val in attr_dict.items():
@@ -92,7 +93,7 @@ def get_ModelCalibration_from_yaml(fname: str) -> ModelCalibration:
     with open(fname, "r") as f:
         raw_data = f.read()
 
-    model_cal_dict = yaml.load(raw_data, Loader=yaml.Loader)
+    model_cal_dict = cal.load_yaml(raw_data)
     if model_cal_dict is None:
         raise ValueError("Something went wrong while reading in yml text file! resulting dictionary is empty!")
 
@@ -102,9 +103,8 @@ def get_ModelCalibration_from_pickle(fname: str) -> ModelCalibration:
     if not os.path.isfile(fname):
         raise ValueError("file {} does not exist!".format(fname))
 
-    model_cal = None
-    with open(fname, "rb") as f:
-        model_cal = pickle.load(f)
+    # plain pickle files and pickle files with out-of-band buffers (see Calibration.to_pickle)
+    model_cal = Serialization.get_object_from_pickle(fname)
 
     if not isinstance(model_cal, ModelCalibration):
         raise ValueError("loaded pickle object is no ModelCalibration!")
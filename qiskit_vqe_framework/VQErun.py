@@ -2,13 +2,25 @@ from __future__ import annotations
 import numpy as np
 from typing import Callable, Dict, List, Optional, Tuple, Union
 from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+import multiprocessing
 import copy
+import csv
+import hashlib
+import os
+import struct
+import warnings
 
+from . import Calibration as cal
 from . import VQEAnsatz as VQEA
 from . import VQETargetModel as VQETM
 from . import VQEOptimizer as VQEO
 from . import VQEEstimator as VQEE
 from . import VQEResult as VQER
+from . import VQECheckpoint as VQECP
+from . import TerminationChecker as tc
+from . import ResultStore as RS
+from . import Serialization
 from qiskit.algorithms.minimum_eigensolvers import VQE, NumPyMinimumEigensolver, VQEResult, NumPyMinimumEigensolverResult
 #from qiskit.algorithms.algorithm_result.AlgorithmResult import MinimumEigensolverResult
 from qiskit.quantum_info import Statevector
@@ -16,6 +28,14 @@ from qiskit import Aer, IBMQ, execute
 from qiskit.primitives import BaseEstimator
 from qiskit.quantum_info import PauliList, SparsePauliOp
 from qiskit.opflow import PauliSumOp
+from qiskit.utils import algorithm_globals
+
+# binary statevector files: fixed-size little-endian header (magic, format version, number of qubits, data type, qubit ordering) followed by the raw amplitudes
+STATEVECTOR_MAGIC = b"VQESTATE"
+STATEVECTOR_VERSION = 1
+STATEVECTOR_HEADER_FORMAT = "<8sII16s8s"
+STATEVECTOR_HEADER_SIZE = 64
+STATEVECTOR_DTYPES = {"complex128": "<c16", "complex64": "<c8"}
 
 def get_data_from_VQEResult(result: VQEResult,
                             opt_converged: bool,
@@ -75,49 +95,302 @@ def get_data_from_MinimumEigensolverResult(result: NumPyMinimumEigensolverResult
         
     return result_out
 
-def get_overlap(psi_vqs: Statevector,
-               psi_ref: Statevector):
+def get_overlap(psi_vqs: Union[Statevector, np.ndarray],
+               psi_ref: Union[Statevector, np.ndarray],
+               chunk_size: Union[int, None] = None):
     # Input data types
-    # - psi_vqs = qiskit.quantum_info.Statevector
-    # - psi_ED = qiskit.quantum_info.Statevector
-    
-    return np.abs(psi_vqs.inner(psi_ref))
+    # - psi_vqs = qiskit.quantum_info.Statevector or array of amplitudes (e.g. memory-mapped, see get_statevector_memmap)
+    # - psi_ED = qiskit.quantum_info.Statevector or array of amplitudes
+    # - chunk_size = number of amplitudes per chunk of the inner product, if given both vectors are streamed chunk by chunk (memory-mapped vectors are never loaded completely)
+    # Both states must have the same qubit ordering.
+    vec_vqs = psi_vqs.data if isinstance(psi_vqs, Statevector) else psi_vqs
+    vec_ref = psi_ref.data if isinstance(psi_ref, Statevector) else psi_ref
+    if vec_vqs.shape != vec_ref.shape:
+        raise ValueError("states with shapes {} and {} have different dimensions!".format(vec_vqs.shape, vec_ref.shape))
+    if chunk_size is None:
+        return np.abs(np.vdot(vec_vqs, vec_ref))
+    if chunk_size <= 0:
+        raise ValueError("chunk size {} must be a positive integer!".format(chunk_size))
+
+    inner = 0.0
+    for start in range(0, len(vec_vqs), chunk_size):
+        inner += np.vdot(vec_vqs[start:start+chunk_size], vec_ref[start:start+chunk_size])
+    return np.abs(inner)
+
+def get_state_hash(state: Union[Statevector, np.ndarray]) -> str:
+    # content hash of the complex128 amplitudes of a state, e.g. to identify the reference state of a run (see RunRegistry)
+    vec = state.data if isinstance(state, Statevector) else state
+    vec = np.ascontiguousarray(vec, dtype=np.complex128)
+    return hashlib.sha256(vec.tobytes()).hexdigest()
+
+def _get_row_index_fname(filename: str) -> str:
+    # sidecar file of the byte-offset row index of a result file
+    return filename + ".idx.npy"
+
+def _build_row_index(filename: str,
+                     block_size: int = 2**24) -> np.ndarray:
+    # scan the file in blocks for line breaks, index = [file size, modification time, start offsets of the lines..., file size]
+    stat = os.stat(filename)
+    line_starts = [np.zeros(1, dtype=np.int64)]
+    with open(filename, "rb") as f:
+        offset = 0
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            line_starts.append(np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord("\n")).astype(np.int64) + offset + 1)
+            offset += len(block)
+    line_starts = np.concatenate(line_starts)
+    # no empty line after the last line break
+    line_starts = line_starts[line_starts < stat.st_size]
+    return np.concatenate([[stat.st_size, stat.st_mtime_ns], line_starts, [stat.st_size]]).astype(np.int64)
+
+def get_row_offsets(filename: str) -> np.ndarray:
+    # Byte offsets of the lines of a result file (the last entry is the file size), i.e., line i is the byte range [offsets[i], offsets[i+1]).
+    # The index is built once per file and persisted as a sidecar file (filename + ".idx.npy"), it is rebuilt if the file was modified.
+    if not os.path.isfile(filename):
+        raise ValueError("file {} does not exist!".format(filename))
+    stat = os.stat(filename)
+    fname_idx = _get_row_index_fname(filename)
+    if os.path.isfile(fname_idx):
+        index = np.load(fname_idx, mmap_mode="r")
+        if index[0] == stat.st_size and index[1] == stat.st_mtime_ns:
+            return index[2:]
+
+    index = _build_row_index(filename)
+    try:
+        fname_tmp = fname_idx + ".{}.tmp".format(os.getpid())
+        with open(fname_tmp, "wb") as f:
+            np.save(f, index)
+        os.replace(fname_tmp, fname_idx)
+    except OSError:
+        # the index is only kept in memory if the sidecar file can't be written
+        pass
+    return index[2:]
+
+def _parse_value(value: str) -> Union[int, float, complex, bool, str, None]:
+    # convert a value of a result file to the python type it was written from
+    if value in ["True", "False"]:
+        return value == "True"
+    # csv writers write None as an empty string
+    if value in ["None", ""]:
+        return None
+    for value_type in [int, float, complex]:
+        try:
+            return value_type(value)
+        except ValueError:
+            pass
+    return value
+
+def _read_line(f, offsets: np.ndarray, line_idx: int, delimiter: str) -> List[str]:
+    # read and split one line of a result file (values may be quoted)
+    f.seek(int(offsets[line_idx]))
+    line = f.read(int(offsets[line_idx+1] - offsets[line_idx])).decode("utf-8").rstrip("\r\n")
+    return next(csv.reader([line], delimiter=delimiter, skipinitialspace=True))
 
 def get_data_from_file(filename: str,
                        data_row_idx: int,
-                       data_col_idcs: List[int]) -> Tuple[List,List]:
-    ## To-Do: implement this function. It should open a vqe/ed result file and extract the data defined via the row index data_row_idx and the collum indices in data_col_idcs. The data structure in the file is assumed to be a header row following several (or just one) data row in csv format. It should return the relevant data collumns as one list and the corresponding header collumns as another List (return header, data)
-    raise NotImplementedError
+                       data_col_idcs: List[Union[int, str]],
+                       delimiter: str = ",") -> Tuple[List,List]:
+    # Open a vqe/ed result file and extract the data defined via the row index data_row_idx (negative indices count from the last row) and the column indices or column names in data_col_idcs.
+    # The data structure in the file is assumed to be a header row (a leading "#" is ignored) following several (or just one) data rows in csv format, one row per line.
+    # Rows are read via the byte-offset row index of the file (see get_row_offsets), i.e., only the header and the requested row are read.
+    # Returns the header of the relevant data columns and the data (converted to int, float, complex, bool, None or str) as lists (return header, data)
+    offsets = get_row_offsets(filename)
+    num_rows = len(offsets) - 2
+    if num_rows < 0:
+        raise ValueError("file {} does not contain a header row!".format(filename))
+    if data_row_idx < -num_rows or data_row_idx >= num_rows:
+        raise ValueError("row index {} is out of range for file {} with {} data rows!".format(data_row_idx, filename, num_rows))
+    if data_row_idx < 0:
+        data_row_idx += num_rows
+
+    with open(filename, "rb") as f:
+        file_header = [name.strip() for name in _read_line(f, offsets, 0, delimiter)]
+        if len(file_header) > 0 and file_header[0].startswith("#"):
+            file_header[0] = file_header[0][1:].strip()
+        row = _read_line(f, offsets, data_row_idx+1, delimiter)
+    if len(row) != len(file_header):
+        raise ValueError("row {} of file {} has {} values, but the header has {} columns!".format(data_row_idx, filename, len(row), len(file_header)))
+
+    header = []
+    data = []
+    for col in data_col_idcs:
+        if isinstance(col, str):
+            name = col.lstrip("#").strip()
+            if name not in file_header:
+                raise ValueError("column {} does not exist in file {}!".format(col, filename))
+            col = file_header.index(name)
+        if col < -len(file_header) or col >= len(file_header):
+            raise ValueError("column index {} is out of range for file {} with {} columns!".format(col, filename, len(file_header)))
+        header.append(file_header[col])
+        data.append(_parse_value(row[col].strip()))
+
+    return header, data
+
+def _get_statevector_text_chunks(filename: str,
+                                 chunk_size: int) -> Iterable[np.ndarray]:
+    # read a txt state vector file (column 1: real(state[:]), column 2: imag(state[:])) in chunks of complex amplitudes
+    with open(filename, "r") as f:
+        while True:
+            with warnings.catch_warnings():
+                # comment lines are not counted as rows by max_rows (numpy >= 1.23) and the file may end exactly after a chunk, both is intended here
+                warnings.filterwarnings("ignore", message="Input line", category=UserWarning)
+                warnings.filterwarnings("ignore", message="loadtxt: input contained no data", category=UserWarning)
+                tmp_data = np.loadtxt(f, comments='#', delimiter='\t', ndmin=2, max_rows=chunk_size)
+            if tmp_data.shape[0] == 0:
+                break
+            if tmp_data.shape[1] != 2:
+                raise ValueError("data from file does not have expected shape")
+            # the (real, imag) pairs of a C-contiguous float array are reinterpreted as complex numbers without copying
+            yield np.ascontiguousarray(tmp_data).view(np.complex128)[:, 0]
+            if tmp_data.shape[0] < chunk_size:
+                break
+
+def _get_reversed_qargs_indices(indices: np.ndarray,
+                                num_qubits: int) -> np.ndarray:
+    # reverse the bit order of basis state indices, i.e., the index permutation of Statevector.reverse_qargs()
+    rev_indices = np.zeros_like(indices)
+    for bit in range(num_qubits):
+        rev_indices |= ((indices >> bit) & 1) << (num_qubits - 1 - bit)
+    return rev_indices
+
+def _write_statevector_header(f,
+                              num_qubits: int,
+                              dtype: str,
+                              rev_qargs: bool) -> None:
+    header = struct.pack(STATEVECTOR_HEADER_FORMAT, STATEVECTOR_MAGIC, STATEVECTOR_VERSION, num_qubits, dtype.encode("ascii"), b"big" if rev_qargs else b"little")
+    f.write(header.ljust(STATEVECTOR_HEADER_SIZE, b"\0"))
+
+def get_statevector_header(filename: str) -> Dict:
+    # read the header of a binary state vector file
+    # returns a dictionary with the number of qubits "num_qubits", the data type "dtype" ("complex128" or "complex64") and "rev_qargs" (True if the amplitudes are stored in reversed, i.e., big-endian, qubit ordering)
+    if not os.path.isfile(filename):
+        raise ValueError("could not find state vector file!")
+    with open(filename, "rb") as f:
+        header = f.read(STATEVECTOR_HEADER_SIZE)
+    if len(header) < STATEVECTOR_HEADER_SIZE or not header.startswith(STATEVECTOR_MAGIC):
+        raise ValueError("file {} is no binary state vector file!".format(filename))
+    _, version, num_qubits, dtype, ordering = struct.unpack_from(STATEVECTOR_HEADER_FORMAT, header)
+    if version != STATEVECTOR_VERSION:
+        raise ValueError("binary state vector file version {} is not supported!".format(version))
+    dtype = dtype.rstrip(b"\0").decode("ascii")
+    if dtype not in STATEVECTOR_DTYPES:
+        raise ValueError("state vector data type {} is not supported!".format(dtype))
+    return {"num_qubits": num_qubits, "dtype": dtype, "rev_qargs": ordering.rstrip(b"\0") == b"big"}
+
+def write_statevector_to_file(filename: str,
+                              state: Union[Statevector, np.ndarray],
+                              dtype: str = "complex128",
+                              rev_qargs: bool = False,
+                              chunk_size: int = 2**20) -> None:
+    # write a state vector into a binary state vector file (header + raw amplitudes), the file is written to a temporary file and renamed when it is complete
+    # rev_qargs = True records that the amplitudes of state are given in reversed (big-endian) qubit ordering
+    if dtype not in STATEVECTOR_DTYPES:
+        raise ValueError("state vector data type {} is not supported, use one of {}!".format(dtype, list(STATEVECTOR_DTYPES.keys())))
+    vec = state.data if isinstance(state, Statevector) else state
+    num_qubits = int(np.log2(len(vec)))
+    if len(vec) != 2**num_qubits:
+        raise ValueError("state vector length {} is not a power of 2!".format(len(vec)))
+
+    fname_tmp = filename + ".{}.tmp".format(os.getpid())
+    with open(fname_tmp, "wb") as f:
+        _write_statevector_header(f, num_qubits, dtype, rev_qargs)
+        for start in range(0, len(vec), chunk_size):
+            f.write(np.ascontiguousarray(vec[start:start+chunk_size], dtype=STATEVECTOR_DTYPES[dtype]).tobytes())
+    os.replace(fname_tmp, filename)
+
+def get_statevector_memmap(filename: str) -> Tuple[np.memmap, Dict]:
+    # memory-map the amplitudes of a binary state vector file without reading them (the amplitudes are in the qubit ordering given by the header)
+    # returns the read-only memory-mapped amplitudes and the header dictionary (see get_statevector_header)
+    header = get_statevector_header(filename)
+    dim = 2**header["num_qubits"]
+    if os.path.getsize(filename) != STATEVECTOR_HEADER_SIZE + dim*np.dtype(STATEVECTOR_DTYPES[header["dtype"]]).itemsize:
+        raise ValueError("binary state vector file {} does not have the expected size for {} qubits!".format(filename, header["num_qubits"]))
+    state = np.memmap(filename, dtype=STATEVECTOR_DTYPES[header["dtype"]], mode="r", offset=STATEVECTOR_HEADER_SIZE, shape=(dim,))
+    return state, header
+
+def convert_statevector_file(txt_filename: str,
+                             filename: str,
+                             num_qubits: int,
+                             rev_qargs: bool = False,
+                             dtype: str = "complex128",
+                             chunk_size: int = 2**20) -> None:
+    # convert a txt state vector file (see get_statevector_from_file) into a binary state vector file
+    # The text file is converted in chunks of chunk_size amplitudes into the memory-mapped output file, i.e., it is never loaded completely.
+    # If rev_qargs is True, the qubit labeling of the text file is reversed (e.g. ED results generated outside of qiskit), the binary file is always written in qiskit's qubit ordering.
+    if not txt_filename.endswith('.txt'):
+        raise ValueError("only txt files can be converted!")
+    if not os.path.isfile(txt_filename):
+        raise ValueError("could not find state vector file!")
+    if dtype not in STATEVECTOR_DTYPES:
+        raise ValueError("state vector data type {} is not supported, use one of {}!".format(dtype, list(STATEVECTOR_DTYPES.keys())))
+
+    dim = 2**num_qubits
+    fname_tmp = filename + ".{}.tmp".format(os.getpid())
+    try:
+        with open(fname_tmp, "wb") as f:
+            _write_statevector_header(f, num_qubits, dtype, False)
+        state = np.memmap(fname_tmp, dtype=STATEVECTOR_DTYPES[dtype], mode="r+", offset=STATEVECTOR_HEADER_SIZE, shape=(dim,))
+        num_values = 0
+        for chunk in _get_statevector_text_chunks(txt_filename, chunk_size):
+            if num_values + len(chunk) > dim:
+                raise ValueError("data from file does not have expected shape")
+            indices = np.arange(num_values, num_values + len(chunk))
+            if rev_qargs:
+                state[_get_reversed_qargs_indices(indices, num_qubits)] = chunk
+            else:
+                state[num_values:num_values + len(chunk)] = chunk
+            num_values += len(chunk)
+        if num_values != dim:
+            raise ValueError("data from file does not have expected shape")
+        state.flush()
+        del state
+        os.replace(fname_tmp, filename)
+    finally:
+        if os.path.isfile(fname_tmp):
+            os.remove(fname_tmp)
 
 def get_statevector_from_file(filename: str,
                               num_qubits: int,
                               rev_qargs: bool = False) -> Statevector:
-    # read in state vector from txt file
-    # assume data structure collum 1: real(state[:]), collum 2: imag(state[:])
+    # read in state vector from a txt file or a binary state vector file (see write_statevector_to_file and convert_statevector_file)
+    # txt files: assume data structure collum 1: real(state[:]), collum 2: imag(state[:]); rev_qargs reverses the qubit labeling
+    # binary files: the amplitudes are memory-mapped, i.e., the Statevector wraps the file without copying for complex128 files in qiskit's qubit ordering. The qubit ordering is taken from the file header and rev_qargs is ignored.
     if not filename.endswith('.txt'):
-        raise ValueError("currently only txt files are supported!")
-    try:
-        # read in raw data format from txt file
-        tmp_data = np.loadtxt(filename, comments='#', delimiter='\t')
-        # check if data has correct shape
-        if tmp_data.shape != (2**num_qubits, 2):
-            raise ValueError("data from file does not have expected shape")
-        # declare a complex state vector of correct size
-        state = np.zeros(tmp_data.shape[0], dtype='complex')
-        # write data in correct complex format into state
-        for i in range(0, tmp_data.shape[0]):
-            state[i] = complex(tmp_data[i, 0], tmp_data[i, 1])
-        
-        if rev_qargs:
-            # if ED results are generated outside of qiskit, e.g. julia the qubit labeling can be reversed
-            return Statevector(state).reverse_qargs()
-        else:
-            return Statevector(state)
-            
-    except FileNotFoundError:
+        state, header = get_statevector_memmap(filename)
+        if header["num_qubits"] != num_qubits:
+            raise ValueError("state vector file has {} qubits, but {} qubits are expected!".format(header["num_qubits"], num_qubits))
+        if header["rev_qargs"]:
+            return Statevector(np.asarray(state)).reverse_qargs()
+        return Statevector(np.asarray(state))
+
+    if not os.path.isfile(filename):
         raise ValueError("could not find state vector file!")
-    
-def run_exact_diagonalization(target_model: VQETM.VQETargetModel) -> Tuple[VQER.ReferenceResult, Statevector]:
+    # read in the raw data from the txt file and reinterpret the (real, imag) pairs as complex numbers
+    # (one row more than expected is read to detect files with too many rows)
+    chunks = list(_get_statevector_text_chunks(filename, 2**num_qubits + 1))
+    state = chunks[0] if len(chunks) == 1 else np.zeros(0, dtype=complex)
+    # check if data has correct shape
+    if state.shape != (2**num_qubits,):
+        raise ValueError("data from file does not have expected shape")
+
+    if rev_qargs:
+        # if ED results are generated outside of qiskit, e.g. julia the qubit labeling can be reversed
+        return Statevector(state).reverse_qargs()
+    else:
+        return Statevector(state)
+
+def run_exact_diagonalization(target_model: VQETM.VQETargetModel,
+                              run_registry: Union[RS.RunRegistry, None] = None) -> Tuple[VQER.ReferenceResult, Statevector]:
+    # if a run registry is given, the result of an exact diagonalization of the same model calibration is returned from the registry instead of running it again
+    run_key = None
+    if run_registry is not None:
+        run_key = run_registry.get_key("ed", [target_model.parameters])
+        output = run_registry.get(run_key)
+        if output is not None:
+            return output
+
     # generate hamiltonian with all penalties
     H = target_model.hamiltonian
 
@@ -143,6 +416,9 @@ def run_exact_diagonalization(target_model: VQETM.VQETargetModel) -> Tuple[VQER.
     # extract eigenstate
     psi_gs = Statevector(result.eigenstate)
 
+    if run_key is not None:
+        run_registry.add(run_key, (result_out, psi_gs))
+
     return result_out, psi_gs
     
 def get_vqe_cal_from_file(fname_ansatz_cal: str,
@@ -156,6 +432,125 @@ def get_vqe_cal_from_file(fname_ansatz_cal: str,
 
     return ansatz_cal, target_model_cal, estimator_cal, optimizer_cal
 
+# constructors of the calibrations from the dictionaries of their yaml files (see to_yaml of the calibration classes), selected by the name of the calibration
+CALIBRATION_FROM_YAML_DICT = {"ModelCalibration": VQETM.get_ModelCalibration_from_dict,
+                              "AnsatzCalibration": VQEA.get_AnsatzCalibration_from_dict,
+                              "EstimatorCalibration": VQEE.get_EstimatorCalibration_from_yaml_dict,
+                              "OptimizerCalibration": VQEO.get_OptimizerCalibration_from_yaml_dict}
+
+def _read_text_file(fname: str) -> str:
+    with open(fname, "r") as f:
+        return f.read()
+
+def _load_yaml_cache(cache_file: Union[str, None]) -> Dict:
+    # cache of parsed calibration yaml files: {absolute file name: (file size, modification time, parsed dictionary)}
+    if cache_file is None or not os.path.isfile(cache_file):
+        return {}
+    cache = Serialization.get_object_from_pickle(cache_file, mmap_mode=False)
+    if not isinstance(cache, dict):
+        raise ValueError("loaded cache file {} is no calibration cache!".format(cache_file))
+    return cache
+
+def get_calibrations_from_yaml(fnames: Sequence[str],
+                               max_threads: int = 16,
+                               max_workers: Union[int, None] = None,
+                               min_files_per_worker: int = 1000,
+                               cache_file: Union[str, None] = None) -> List[cal.Calibration]:
+    # Bulk loader of calibration yaml files (any mix of model, ansatz, estimator and optimizer calibrations, the type is taken from the name in the file).
+    # Every distinct file is read once on a thread pool (max_threads threads) and parsed with the libyaml C loader (if available, see Calibration.YAML_LOADER).
+    # The parsing is distributed over a process pool with up to max_workers processes (default: number of cpus), at least min_files_per_worker files per process,
+    # i.e., small sets of files are parsed in the calling process (starting a worker process costs about as much as parsing 1000 files). The calibration objects are created (and validated) in the calling process.
+    # If a cache_file is given, the parsed dictionaries are stored in one binary file (pickle with out-of-band buffers, see Serialization.to_pickle)
+    # and files with unchanged size and modification time are neither read nor parsed again.
+    # Returns the calibration objects in the order of fnames (a separate object for every entry, also for repeated files).
+    for fname in fnames:
+        if not os.path.isfile(fname):
+            raise ValueError("file {} does not exist!".format(fname))
+
+    cache = _load_yaml_cache(cache_file)
+    parsed = {}
+    stats = {}
+    to_read = []
+    for fname in dict.fromkeys(os.path.abspath(fname) for fname in fnames):
+        stat = os.stat(fname)
+        stats[fname] = (stat.st_size, stat.st_mtime_ns)
+        entry = cache.get(fname, None)
+        if entry is not None and entry[:2] == stats[fname]:
+            parsed[fname] = entry[2]
+        else:
+            to_read.append(fname)
+
+    if len(to_read) > 0:
+        # read the files on a thread pool (I/O bound)
+        with ThreadPoolExecutor(max_workers=max_threads) as executor:
+            files = list(zip(to_read, executor.map(_read_text_file, to_read)))
+
+        # parse the files on a process pool (CPU bound)
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        num_workers = min(max_workers, -(-len(files) // min_files_per_worker))
+        if num_workers <= 1:
+            parsed_files = cal._load_yaml_files(files)
+        else:
+            chunk_size = -(-len(files) // (4*num_workers))
+            chunks = [files[i:i+chunk_size] for i in range(0, len(files), chunk_size)]
+            with ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                parsed_files = [item for chunk in executor.map(cal._load_yaml_files, chunks) for item in chunk]
+
+        for fname, cal_dict in parsed_files:
+            if not isinstance(cal_dict, dict):
+                raise ValueError("Something went wrong while reading in yml text file {}! resulting dictionary is empty!".format(fname))
+            parsed[fname] = cal_dict
+            cache[fname] = (*stats[fname], cal_dict)
+
+        if cache_file is not None:
+            Serialization.to_pickle(cache, cache_file)
+
+    calibration_list = []
+    for fname in fnames:
+        # the constructors consume the dictionaries, so every calibration gets its own copy
+        cal_dict = copy.deepcopy(parsed[os.path.abspath(fname)])
+        cal_name = cal_dict.get("name", None)
+        if cal_name not in CALIBRATION_FROM_YAML_DICT:
+            raise ValueError("file {} does not contain a known calibration, but calibration name {}!".format(fname, cal_name))
+        calibration_list.append(CALIBRATION_FROM_YAML_DICT[cal_name](cal_dict))
+
+    return calibration_list
+
+def get_vqe_cals_from_files(fname_list: Sequence[Tuple[str, str, str, str]],
+                            **kwargs) -> List[Tuple[VQEA.AnsatzCalibration, VQETM.ModelCalibration, VQEE.EstimatorCalibration, VQEO.OptimizerCalibration]]:
+    # bulk version of get_vqe_cal_from_file for the calibration sets of many runs
+    # fname_list contains the (ansatz, estimator, optimizer, target model) calibration file names of every run, the keyword arguments are passed to get_calibrations_from_yaml
+    # returns the (ansatz, target model, estimator, optimizer) calibrations of every run
+    cal_types = [VQEA.AnsatzCalibration, VQEE.EstimatorCalibration, VQEO.OptimizerCalibration, VQETM.ModelCalibration]
+    for fnames in fname_list:
+        if len(fnames) != len(cal_types):
+            raise ValueError("calibration set {} must contain an ansatz, estimator, optimizer and target model calibration file!".format(fnames))
+    calibration_list = get_calibrations_from_yaml([fname for fnames in fname_list for fname in fnames], **kwargs)
+
+    vqe_cals = []
+    for idx, fnames in enumerate(fname_list):
+        ansatz_cal, estimator_cal, optimizer_cal, target_model_cal = calibration_list[4*idx:4*idx+4]
+        for calibration, cal_type, fname in zip([ansatz_cal, estimator_cal, optimizer_cal, target_model_cal], cal_types, fnames):
+            if not isinstance(calibration, cal_type):
+                raise ValueError("file {} does not contain a {}!".format(fname, cal_type.__name__))
+        vqe_cals.append((ansatz_cal, target_model_cal, estimator_cal, optimizer_cal))
+
+    return vqe_cals
+
+
+class _JobCountingEstimator(BaseEstimator):
+    # estimator primitive that forwards every job to estimator and reports it to the termination checker (see TerminationChecker.update_job)
+    def __init__(self,
+                 estimator: BaseEstimator,
+                 term_checker: tc.TerminationChecker):
+        super().__init__()
+        self._estimator = estimator
+        self._term_checker = term_checker
+
+    def _run(self, circuits, observables, parameter_values, **run_options):
+        self._term_checker.update_job()
+        return self._estimator.run(circuits, observables, parameter_values, **run_options)
 
 def run_vqe(vqe_estimator: VQEE.VQEEstimator,
             target_model: VQETM.VQETargetModel,
@@ -164,7 +559,58 @@ def run_vqe(vqe_estimator: VQEE.VQEEstimator,
             ref_result: Union[VQER.ReferenceResult, None] = None,
             ref_state: Union[Statevector, None] = None,
             save_iresults: bool = False,
-            print_status: bool = False) -> Tuple[VQER.VQEResult, Statevector, Dict]:
+            print_status: bool = False,
+            callback: Union[Callable[[int, Sequence[float], float, Dict], None], None] = None,
+            checkpoint_file: Union[str, None] = None,
+            checkpoint_interval: int = 1,
+            spsa_cal_cache: Union[VQEO.SPSACalibrationCache, None] = None,
+            iresults_file: Union[str, None] = None,
+            iresults_chunk_size: int = 1000,
+            run_registry: Union[RS.RunRegistry, None] = None,
+            reset_termination_checker: bool = True) -> Tuple[VQER.VQEResult, Statevector, Dict]:
+
+    # if a run registry is given, the output of a run with the same calibrations, reference and save_iresults flag is returned from the registry instead of running it again,
+    # in this case no callbacks are called and no checkpoints or intermediate results are written
+    run_key = None
+    if run_registry is not None:
+        ref_state_hash = None if ref_state is None else get_state_hash(ref_state)
+        run_key = run_registry.get_key("vqe", [target_model.parameters, vqe_ansatz.parameters, vqe_optimizer.parameters, vqe_estimator.parameters],
+                                       {"reference_result": ref_result, "ref_state": ref_state_hash, "save_iresults": save_iresults})
+        output = run_registry.get(run_key)
+        if output is not None:
+            return output
+
+    if spsa_cal_cache is not None or checkpoint_file is not None:
+        # the cache and the checkpointer are installed into a new optimizer object, such that the given one is not modified
+        vqe_optimizer = VQEO.VQEOptimizer(vqe_optimizer.parameters)
+
+    # reuse the SPSA calibration of the same problem (target model, ansatz and estimator) or add it to the cache
+    if spsa_cal_cache is not None:
+        spsa_cal_cache.install(vqe_optimizer, cal.get_fingerprint([target_model.parameters, vqe_ansatz.parameters, vqe_estimator.parameters]))
+
+    # write checkpoints of the optimizer state (SPSA only) every checkpoint_interval iterations to checkpoint_file, see resume_vqe
+    if checkpoint_file is not None:
+        checkpointer = VQECP.VQECheckpointer(checkpoint_file, checkpoint_interval)
+        checkpointer.install(vqe_optimizer, [target_model.parameters, vqe_ansatz.parameters, vqe_optimizer.parameters, vqe_estimator.parameters])
+        if callback is None:
+            callback = checkpointer.vqe_callback
+        else:
+            user_callback = callback
+            def callback(eval_count, params, mean, meta):
+                checkpointer.vqe_callback(eval_count, params, mean, meta)
+                user_callback(eval_count, params, mean, meta)
+
+    # stream the intermediate results in chunks of iresults_chunk_size evaluations to the directory iresults_file (read with ResultStore.IResultsReader)
+    iresults_sink = None
+    if iresults_file is not None:
+        iresults_sink = RS.IResultsSink(iresults_file, iresults_chunk_size)
+        if callback is None:
+            callback = iresults_sink.callback
+        else:
+            prev_callback = callback
+            def callback(eval_count, params, mean, meta):
+                iresults_sink.callback(eval_count, params, mean, meta)
+                prev_callback(eval_count, params, mean, meta)
 
     # store intermediate results via callback function
     iresults_dict = {}
@@ -225,14 +671,46 @@ def run_vqe(vqe_estimator: VQEE.VQEEstimator,
             raise ValueError("number of initial parameters does not match number of circuit parameters!")
 
     callback_fctn = None
-    if save_iresults:
+    if save_iresults and callback is None:
         callback_fctn = store_intermediate_cost_fctn_calls
+    elif callback is not None:
+        # additional user callback with the same signature as the vqe callback
+        def callback_fctn(eval_count, params, mean, meta):
+            if save_iresults:
+                store_intermediate_cost_fctn_calls(eval_count, params, mean, meta)
+            callback(eval_count, params, mean, meta)
+
+    # pass the result of every cost function evaluation to the termination checker (e.g. the estimator variances for the StatisticalTrendChecker)
+    # (the calibration holds the checker itself, the optimizer may hold the checkpointer wrapping it)
+    term_checker = vqe_optimizer.parameters.termination_checker
+    if isinstance(term_checker, tc.TerminationChecker):
+        vqe_callback = callback_fctn
+        def callback_fctn(eval_count, params, mean, meta):
+            term_checker.update_metadata(mean, meta)
+            if vqe_callback is not None:
+                vqe_callback(eval_count, params, mean, meta)
+
+    # fidelity of the ansatz for the QNSPSA optimizer
+    if vqe_optimizer.parameters.optimizer_name == "QNSPSA":
+        vqe_optimizer.set_fidelity(circ, vqe_estimator.sampler)
 
     # setup vqe object
-    vqe = VQE(estimator, circ, vqe_optimizer.optimizer, gradient=vqe_optimizer.get_gradient(estimator), initial_point=param_init, callback=callback_fctn)
+    vqe_estimator_primitive = estimator
+    if isinstance(term_checker, tc.TerminationChecker):
+        vqe_estimator_primitive = _JobCountingEstimator(estimator, term_checker)
+    vqe = VQE(vqe_estimator_primitive, circ, vqe_optimizer.optimizer, gradient=vqe_optimizer.get_gradient(estimator, estimator_cal=vqe_estimator.parameters), initial_point=param_init, callback=callback_fctn)
+
+    # the termination checker (history buffer and budget usage) starts from scratch, unless the optimization is continued (see resume_vqe)
+    if reset_termination_checker and isinstance(term_checker, tc.TerminationChecker):
+        term_checker.reset()
 
     # run vqe
-    result = vqe.compute_minimum_eigenvalue(operator=H_p, aux_operators=aux_ops)
+    try:
+        result = vqe.compute_minimum_eigenvalue(operator=H_p, aux_operators=aux_ops)
+    finally:
+        # the streamed intermediate results are also complete if the optimization fails
+        if iresults_sink is not None:
+            iresults_sink.close()
     opt_converged=True
     psi_vqe = get_state_from_VQEResult(result)
     if ref_state is None:
@@ -246,9 +724,11 @@ def run_vqe(vqe_estimator: VQEE.VQEEstimator,
 
     if print_status:
         print("optimization finished:")
-        ref_result_data_dict = ref_result.data.to_dict()
-        for key, val in ref_result_data_dict.items():
-            print("- {}_ref = {}".format(key, val))
+        # without reference result (e.g. sweeps without exact diagonalization) only the VQE result is printed
+        if ref_result is not None:
+            ref_result_data_dict = ref_result.data.to_dict()
+            for key, val in ref_result_data_dict.items():
+                print("- {}_ref = {}".format(key, val))
         result_data_dict = result_data.to_dict()
         for key, val in result_data_dict.items():
             print("- {} = {}".format(key, val))
@@ -260,39 +740,492 @@ def run_vqe(vqe_estimator: VQEE.VQEEstimator,
         iresults_dict["circ_params"] = circ_params
         iresults_dict["est_meta"] = est_meta
     
+    if run_key is not None:
+        run_registry.add(run_key, (result_out, psi_vqe, iresults_dict))
 
     return result_out, psi_vqe, iresults_dict
 
-def get_iresults_filevector(iresults_dict: Dict) -> Tuple[List, List]:
+def run_vqe_sweep(vqe_estimator: VQEE.VQEEstimator,
+                  target_model: VQETM.VQETargetModel,
+                  vqe_ansatz: VQEA.VQEAnsatz,
+                  vqe_optimizer: VQEO.VQEOptimizer,
+                  model_cal_list: Sequence[VQETM.ModelCalibration],
+                  run_ed: bool = False,
+                  save_iresults: bool = False,
+                  print_status: bool = False,
+                  spsa_cal_cache: Union[VQEO.SPSACalibrationCache, None] = None,
+                  run_registry: Union[RS.RunRegistry, None] = None) -> Tuple[List[VQER.VQEResult], List[Statevector], List[Dict]]:
+    # Parameter sweep over an ordered list of model calibrations with warm starts:
+    # the initial point of every point is the optimal angles of the previous point (the first point uses the initial point of the optimizer calibration).
+    # The estimator, the ansatz circuit and the gradient are shared by all points, such that circuits which are cached (transpiled) by the estimator primitive are reused.
+    # The target model is updated to the model calibration of each point, i.e., it holds the last one afterwards.
+    # If run_ed is True, an exact diagonalization is run for every point as reference.
+    # If a run registry is given, points (and exact diagonalizations) that were already run are taken from the registry (see run_vqe).
+    results = []
+    states = []
+    iresults_list = []
+
+    # a single optimizer object is used for all points, such that its gradient object (and gradient circuits) is reused as well
+    point_optimizer = VQEO.VQEOptimizer(vqe_optimizer.parameters)
+    param_init = vqe_optimizer.parameters.param_map_init
+    for idx, model_cal in enumerate(model_cal_list):
+        target_model.update_parameters(model_cal)
 
-    header = []
-    data = []
-    
-    num_cost_fctn_calls = iresults_dict["num_cost_fctn_calls"]
-    energy_values = iresults_dict["energy_values"]
-    circ_params = iresults_dict["circ_params"]
-    header = ["#num_cost_fctn_calls", "energy_values"]
-    for n in range(len(circ_params[0])):
-        header.append("circ_param"+str(n))
-
-    for i in range(len(num_cost_fctn_calls)):
-        curr_data = []
-        curr_data.append(num_cost_fctn_calls[i])
-        curr_data.append(energy_values[i])
-        curr_circ_params = circ_params[i]
-        for j in range(len(curr_circ_params)):
-            curr_data.append(curr_circ_params[j])
-
-        data.append(copy.copy(curr_data))
+        point_opt_cal = copy.deepcopy(vqe_optimizer.parameters)
+        point_opt_cal.param_map_init = param_init
+        point_optimizer.update_parameters(point_opt_cal)
+
+        ref_result = None
+        ref_state = None
+        if run_ed:
+            ref_result, ref_state = run_exact_diagonalization(target_model, run_registry=run_registry)
+
+        if print_status:
+            print("sweep point {}/{}: {}".format(idx+1, len(model_cal_list), model_cal))
+
+        result, psi_vqe, iresults = run_vqe(vqe_estimator, target_model, vqe_ansatz, point_optimizer, ref_result=ref_result, ref_state=ref_state, save_iresults=save_iresults, print_status=print_status, spsa_cal_cache=spsa_cal_cache, run_registry=run_registry)
+
+        results.append(result)
+        states.append(psi_vqe)
+        iresults_list.append(iresults)
+
+        # angle transfer to the next point
+        param_init = list(result.data.angles.values())
+
+    return results, states, iresults_list
+
+def run_vqe_layerwise(vqe_estimator: VQEE.VQEEstimator,
+                      target_model: VQETM.VQETargetModel,
+                      vqe_ansatz: VQEA.VQEAnsatz,
+                      vqe_optimizer: VQEO.VQEOptimizer,
+                      num_trainable_layers: Union[int, None] = None,
+                      ref_result: Union[VQER.ReferenceResult, None] = None,
+                      ref_state: Union[Statevector, None] = None,
+                      save_iresults: bool = False,
+                      print_status: bool = False) -> Tuple[VQER.VQEResult, Statevector, List[Dict]]:
+    # Layer-wise training of an ESU2 ansatz: the ansatz is optimized with 1 layer first, then the layers are added one at a time up to the num_layers of the ansatz calibration.
+    # Every stage starts from the optimal angles of the previous stage, the rotation angles of the new layer are initialized with zero, i.e., its rotation gates are identities.
+    # Without initial state (psi_start) the new layer is prepended: its entangling block acts on the all-zero state, so the new stage starts exactly at the state of the previous one.
+    # With initial state the new layer is appended (its entangling block changes the state).
+    # The initial point (param_map_init) is either given for the 1-layer ansatz or for the full ansatz, in the latter case only the values of the parameters of the first stage are used
+    # (the trailing ones without initial state, the leading ones with initial state).
+    # If num_trainable_layers is given, only the parameters of the newest num_trainable_layers (rotation) layers are optimized, all other parameters are frozen (see FrozenParameterAnsatz).
+    # The returned result has the full ansatz calibration and all angles, its counters are the sums over all stages. The per-stage data is stored in the result metadata.
+    if vqe_ansatz.parameters.ansatz_str != "ESU2":
+        raise ValueError("layer-wise training is only supported for the ESU2 ansatz, but ansatz {} was given!".format(vqe_ansatz.parameters.ansatz_str))
+    if num_trainable_layers is not None and num_trainable_layers <= 0:
+        raise ValueError("number of trainable layers must be a positive non-zero integer!")
+
+    num_layers = vqe_ansatz.parameters.num_layers
+    prepend = vqe_ansatz.parameters.psi_start is None
+    point_optimizer = VQEO.VQEOptimizer(vqe_optimizer.parameters)
+
+    layerwise_dict = {"num_layers": [], "num_trainable_parameters": [], "energies": [], "num_cost_fctn_calls": [], "opt_iterations": []}
+    iresults_list = []
+    angles = vqe_optimizer.parameters.param_map_init
+    if isinstance(angles, Dict):
+        # convert dict to list of values
+        angles = list(angles.values())
+    num_params_prev = 0
+    for stage_layers in range(1, num_layers+1):
+        stage_cal = copy.deepcopy(vqe_ansatz.parameters)
+        stage_cal.num_layers = stage_layers
+        stage_ansatz = copy.copy(vqe_ansatz)
+        stage_ansatz.update_parameters(stage_cal)
+        circ = stage_ansatz.circuit
+
+        num_layer_params = circ.num_parameters - num_params_prev
+        if stage_layers == 1 and angles is not None and len(angles) != circ.num_parameters:
+            if len(angles) != vqe_ansatz.circuit.num_parameters:
+                raise ValueError("number of initial parameters {} matches neither the 1-layer ansatz ({}) nor the full ansatz ({})!".format(len(angles), circ.num_parameters, vqe_ansatz.circuit.num_parameters))
+            angles = angles[len(angles)-circ.num_parameters:] if prepend else angles[:circ.num_parameters]
+        if stage_layers > 1:
+            if prepend:
+                angles = [0.0]*num_layer_params + list(angles)
+            else:
+                angles = list(angles) + [0.0]*num_layer_params
+
+        # the newest layers are the leading parameters (in circuit parameter order) if prepended and the trailing ones if appended
+        num_frozen = 0
+        num_trainable = circ.num_parameters
+        train_ansatz = stage_ansatz
+        train_angles = angles
+        if num_trainable_layers is not None and stage_layers > num_trainable_layers:
+            num_trainable = num_trainable_layers*num_layer_params
+            num_frozen = circ.num_parameters - num_trainable
+            if prepend:
+                train_ansatz = VQEA.FrozenParameterAnsatz(stage_ansatz, angles[num_trainable:], trailing=True)
+                train_angles = angles[:num_trainable]
+            else:
+                train_ansatz = VQEA.FrozenParameterAnsatz(stage_ansatz, angles[:num_frozen])
+                train_angles = angles[num_frozen:]
+
+        stage_opt_cal = copy.deepcopy(vqe_optimizer.parameters)
+        stage_opt_cal.param_map_init = None if angles is None else list(train_angles)
+        point_optimizer.update_parameters(stage_opt_cal)
+
+        if print_status:
+            print("layer-wise training stage {}/{}: {} of {} parameters are trained".format(stage_layers, num_layers, num_trainable, circ.num_parameters))
+
+        result, psi_vqe, iresults = run_vqe(vqe_estimator, target_model, train_ansatz, point_optimizer, ref_result=ref_result, ref_state=ref_state, save_iresults=save_iresults, print_status=print_status)
+
+        trained_angles = list(result.data.angles.values())
+        if prepend:
+            angles = trained_angles + list(angles[num_trainable:])
+        else:
+            angles = list(angles[:num_frozen]) + trained_angles
+        num_params_prev = circ.num_parameters
+
+        layerwise_dict["num_layers"].append(stage_layers)
+        layerwise_dict["num_trainable_parameters"].append(circ.num_parameters-num_frozen)
+        layerwise_dict["energies"].append(float(result.data.energy))
+        layerwise_dict["num_cost_fctn_calls"].append(int(result.data.tot_num_cost_fctn_calls))
+        layerwise_dict["opt_iterations"].append(int(result.data.opt_iterations))
+        iresults_list.append(iresults)
+
+    # result data of the last stage with all angles and the counters of all stages
+    result_data = result.data
+    result_data.angles = dict(zip(circ.parameters, angles))
+    result_data.tot_num_cost_fctn_calls = int(np.sum(layerwise_dict["num_cost_fctn_calls"]))
+    result_data.opt_iterations = int(np.sum(layerwise_dict["opt_iterations"]))
+
+    result_out = VQER.VQEResult(result_data, [target_model.parameters, vqe_ansatz.parameters, vqe_optimizer.parameters, vqe_estimator.parameters], reference_result = ref_result, metadata = {"layerwise": layerwise_dict})
+
+    return result_out, psi_vqe, iresults_list
+
+def resume_vqe(checkpoint_file: str,
+               vqe_estimator: VQEE.VQEEstimator,
+               target_model: VQETM.VQETargetModel,
+               vqe_ansatz: VQEA.VQEAnsatz,
+               vqe_optimizer: VQEO.VQEOptimizer,
+               ref_result: Union[VQER.ReferenceResult, None] = None,
+               ref_state: Union[Statevector, None] = None,
+               save_iresults: bool = False,
+               print_status: bool = False,
+               checkpoint_interval: int = 1) -> Tuple[VQER.VQEResult, Statevector, Dict]:
+    # Continue a VQE run from the last checkpoint written by run_vqe (the checkpoint file is updated further).
+    # The inputs have to be the ones of the interrupted run. Parameters, remaining learning rate and perturbation sequences, random number generator state and termination checker buffer are restored,
+    # such that the subsequent optimization is identical to the uninterrupted one (for a deterministic or seeded estimator).
+    checkpoint = VQECP.get_VQECheckpoint_from_file(checkpoint_file)
+    if checkpoint.finished:
+        raise ValueError("optimization of checkpoint {} has already finished after {} iterations!".format(checkpoint_file, checkpoint.iteration))
+
+    calibration_list = [target_model.parameters, vqe_ansatz.parameters, vqe_optimizer.parameters, vqe_estimator.parameters]
+    for calibration, cal_dict in zip(calibration_list, checkpoint.calibration_list):
+        curr_cal_dict = calibration.to_dict(deep_copy=False)
+        # the history buffer of a termination checker is part of the checkpoint and not of the calibration
+        if "termination_checker" in cal_dict:
+            cal_dict = copy.copy(cal_dict)
+            cal_dict["termination_checker"] = repr(cal_dict["termination_checker"])
+            curr_cal_dict["termination_checker"] = repr(curr_cal_dict["termination_checker"])
+        if curr_cal_dict != cal_dict:
+            raise ValueError("{} does not match the calibration of checkpoint {}!".format(calibration, checkpoint_file))
+
+    # optimizer that runs the remaining iterations
+    resume_opt_cal = copy.deepcopy(vqe_optimizer.parameters)
+    resume_opt_cal.maxiter = checkpoint.maxiter - checkpoint.iteration
+    resume_opt_cal.param_map_init = list(checkpoint.params)
+    resume_opt_cal.termination_checker = copy.deepcopy(checkpoint.termination_checker)
+    resume_optimizer = VQEO.VQEOptimizer(resume_opt_cal)
+    resume_optimizer.optimizer.learning_rate = checkpoint.learning_rate[checkpoint.iteration:]
+    resume_optimizer.optimizer.perturbation = checkpoint.perturbation[checkpoint.iteration:]
+
+    checkpointer = VQECP.VQECheckpointer(checkpoint_file, checkpoint_interval, previous_checkpoint=checkpoint)
+    checkpointer.install(resume_optimizer, calibration_list)
+
+    algorithm_globals.random.bit_generator.state = checkpoint.rng_state
+
+    if print_status:
+        print("Resuming VQE from checkpoint {} after {} iterations".format(checkpoint_file, checkpoint.iteration))
+
+    result, psi_vqe, _ = run_vqe(vqe_estimator, target_model, vqe_ansatz, resume_optimizer, ref_result=ref_result, ref_state=ref_state, print_status=print_status, callback=checkpointer.vqe_callback, reset_termination_checker=False)
+
+    # counters of the whole optimization
+    result_data = result.data
+    result_data.tot_num_cost_fctn_calls += checkpoint.opt_nfev
+    result_data.opt_iterations += checkpoint.iteration
+    result_out = VQER.VQEResult(result_data, calibration_list, reference_result = ref_result)
+
+    iresults_dict = {}
+    if save_iresults:
+        iresults_dict = checkpointer.iresults
+
+    return result_out, psi_vqe, iresults_dict
+
+def get_iresults_filevector(iresults_dict: Dict) -> Tuple[List[str], np.ndarray]:
+    # intermediate results (see run_vqe or IResultsReader.get_iresults_dict) as header and 2D array with one row per cost function evaluation:
+    # number of cost function calls, energy value and the circuit parameters (float64, the numbers of calls are exact up to 2**53)
+    num_cost_fctn_calls = np.asarray(iresults_dict["num_cost_fctn_calls"])
+    energy_values = np.asarray(iresults_dict["energy_values"])
+    circ_params = np.asarray(iresults_dict["circ_params"], dtype=np.float64)
+    num_evals = len(num_cost_fctn_calls)
+    num_params = circ_params.shape[1] if circ_params.ndim == 2 else 0
+
+    header = ["#num_cost_fctn_calls", "energy_values"] + ["circ_param"+str(n) for n in range(num_params)]
+
+    # preallocated array filled column block by column block
+    data = np.empty((num_evals, 2 + num_params), dtype=np.float64)
+    data[:, 0] = num_cost_fctn_calls
+    data[:, 1] = np.real(energy_values)
+    if num_params > 0:
+        data[:, 2:] = circ_params
 
     return header, data
-    
-        
+
+def write_iresults_to_npy(filename: str,
+                          iresults_dict: Dict) -> List[str]:
+    # write the array of get_iresults_filevector into a .npy file (read with np.load), the file is written to a temporary file and renamed when it is complete
+    # returns the header of the columns, which is not stored in the file
+    header, data = get_iresults_filevector(iresults_dict)
+    fname_tmp = filename + ".{}.tmp".format(os.getpid())
+    with open(fname_tmp, "wb") as f:
+        np.save(f, data)
+    os.replace(fname_tmp, filename)
+    return header
+
+def write_iresults_to_csv(filename: str,
+                          iresults_dict: Dict,
+                          delimiter: str = ",") -> None:
+    # write the header and the array of get_iresults_filevector into a delimited text file (header line starts with #, read with np.loadtxt or get_data_from_file)
+    # the numbers of cost function calls are written as integers, the floats with 17 significant digits (exact round trip)
+    header, data = get_iresults_filevector(iresults_dict)
+    fmt = ["%d"] + ["%.17g"]*(data.shape[1] - 1)
+    fname_tmp = filename + ".{}.tmp".format(os.getpid())
+    with open(fname_tmp, "w") as f:
+        np.savetxt(f, data, fmt=fmt, delimiter=delimiter, header=delimiter.join(header), comments="")
+    os.replace(fname_tmp, filename)
+
+class _StartCulled(Exception):
+    # raised from the vqe callback of a start that was culled by run_vqe_multistart
+    def __init__(self, eval_count: int, params: Sequence[float]):
+        super().__init__("start culled after {} cost function calls".format(eval_count))
+        self.eval_count = eval_count
+        self.params = params
+
+class _SuccessiveHalving:
+    # rung bookkeeping of run_vqe_multistart: the starts are ranked at the rungs cull_interval*2**k cost function calls by the mean of their last score_window energies before the rung.
+    # A rung is evaluated over the starts that are running or done, starts which are still queued (no energies yet) are compared at the evaluated rungs when they arrive,
+    # with the worst score that survived the rung.
+    def __init__(self,
+                 num_starts: int,
+                 cull_fraction: float,
+                 cull_interval: int,
+                 score_window: int) -> None:
+        self.culled_at = [None] * num_starts
+        self.rung = cull_interval
+        self._cull_fraction = cull_fraction
+        self._score_window = score_window
+        # (rung, worst surviving score) of the evaluated rungs and the number of evaluated rungs every start was compared at
+        self._rung_thresholds = []
+        self._num_checked_rungs = [0] * num_starts
+
+    @property
+    def active(self) -> List[int]:
+        return [idx for idx, rung in enumerate(self.culled_at) if rung is None]
+
+    def _get_score(self, trace, rung):
+        return float(np.mean(trace[:rung][-self._score_window:]))
+
+    def update(self,
+               traces: Sequence[Sequence[float]],
+               finished: Sequence[bool]) -> List[Tuple[int, int]]:
+        # traces = energies of all starts so far, finished = flags of the starts that are done
+        # returns the (start, rung) pairs of the starts culled by this update
+        culled = []
+
+        def reached(idx, rung):
+            return len(traces[idx]) >= rung or finished[idx]
+
+        # starts that arrive at rungs which were evaluated without them
+        for idx in self.active:
+            while self._num_checked_rungs[idx] < len(self._rung_thresholds) and len(self.active) > 1:
+                rung, threshold = self._rung_thresholds[self._num_checked_rungs[idx]]
+                if not reached(idx, rung):
+                    break
+                self._num_checked_rungs[idx] += 1
+                if self._get_score(traces[idx], rung) > threshold:
+                    self.culled_at[idx] = rung
+                    culled.append((idx, rung))
+                    break
+
+        # evaluate the next rungs, which every running or finished start has reached
+        while True:
+            started = [idx for idx in self.active if len(traces[idx]) > 0 or finished[idx]]
+            if len(started) < 2 or not all(reached(idx, self.rung) and self._num_checked_rungs[idx] == len(self._rung_thresholds) for idx in started):
+                break
+            ranking = sorted(started, key=lambda idx: self._get_score(traces[idx], self.rung))
+            num_culled = min(len(started) - 1, max(1, int(len(started)*self._cull_fraction)))
+            survivors = ranking[:len(started)-num_culled]
+            for idx in ranking[len(started)-num_culled:]:
+                self.culled_at[idx] = self.rung
+                culled.append((idx, self.rung))
+            self._rung_thresholds.append((self.rung, self._get_score(traces[survivors[-1]], self.rung)))
+            for idx in survivors:
+                self._num_checked_rungs[idx] = len(self._rung_thresholds)
+            self.rung *= 2
+        return culled
+
+def _run_vqe_start(estimator_cal: VQEE.EstimatorCalibration,
+                   target_model: VQETM.VQETargetModel,
+                   vqe_ansatz: VQEA.VQEAnsatz,
+                   optimizer_cal: VQEO.OptimizerCalibration,
+                   ref_result: Union[VQER.ReferenceResult, None],
+                   ref_state: Union[Statevector, None],
+                   seed: int,
+                   energy_trace: Sequence[float],
+                   stop_flag) -> Dict:
+    # worker function of run_vqe_multistart: runs one start in a separate process.
+    # The estimator primitive can't be shared between processes, so it is rebuilt from its calibration.
+    # Every energy is published to the shared energy_trace, the start is aborted as soon as the stop_flag is set.
+    algorithm_globals.random_seed = seed
+    np.random.seed(seed)
+    vqe_estimator = VQEE.VQEEstimator(estimator_cal)
+    vqe_optimizer = VQEO.VQEOptimizer(optimizer_cal)
+
+    def publish_energy(eval_count, params, mean, meta):
+        energy_trace.append(float(mean))
+        if stop_flag.is_set():
+            raise _StartCulled(eval_count, params)
+
+    start_dict = {}
+    try:
+        result, psi, iresults = run_vqe(vqe_estimator, target_model, vqe_ansatz, vqe_optimizer, ref_result=ref_result, ref_state=ref_state, save_iresults=True, callback=publish_energy)
+    except _StartCulled as culled:
+        start_dict["culled"] = True
+        start_dict["num_cost_fctn_calls"] = int(culled.eval_count)
+        start_dict["last_params"] = list(culled.params)
+        return start_dict
+
+    start_dict["culled"] = False
+    start_dict["num_cost_fctn_calls"] = int(result.data.tot_num_cost_fctn_calls)
+    start_dict["result"] = result
+    start_dict["psi"] = psi
+    start_dict["iresults"] = iresults
+    return start_dict
+
+def run_vqe_multistart(vqe_estimator: VQEE.VQEEstimator,
+                       target_model: VQETM.VQETargetModel,
+                       vqe_ansatz: VQEA.VQEAnsatz,
+                       vqe_optimizer: VQEO.VQEOptimizer,
+                       num_starts: int,
+                       cull_fraction: float = 0.5,
+                       cull_interval: int = 20,
+                       score_window: int = 10,
+                       max_workers: Union[int, None] = None,
+                       poll_interval: float = 0.1,
+                       ref_result: Union[VQER.ReferenceResult, None] = None,
+                       ref_state: Union[Statevector, None] = None,
+                       print_status: bool = False) -> Tuple[VQER.VQEResult, Statevector, Dict]:
+    # Multi-start VQE with successive halving:
+    # num_starts initial points are optimized concurrently on a (spawn) process pool, every start runs a single uninterrupted optimization, i.e., the optimizer state is never reset.
+    # The energy traces are compared at the rungs cull_interval*2**k cost function calls: the still active starts are ranked by the mean of the last score_window energies before the rung and the worst cull_fraction of them is killed mid-run.
+    # If there are more starts than workers, a rung is evaluated over the running and finished starts, queued starts are culled when they arrive at the rung with a worse score than the worst survivor.
+    # The workers of the culled starts are handed to the remaining (promising) starts, which run until the maxiter of the optimizer calibration.
+    # The per-start data is stored in the metadata of the returned VQEResult, the result data and the intermediate results are the ones of the survivor.
+    if num_starts <= 0:
+        raise ValueError("number of starts must be a positive non-zero integer!")
+    if cull_fraction <= 0.0 or cull_fraction >= 1.0:
+        raise ValueError("cull fraction {} must be in the open interval (0, 1)!".format(cull_fraction))
+    if cull_interval <= 0:
+        raise ValueError("cull interval must be a positive non-zero integer!")
+    if score_window <= 0:
+        raise ValueError("score window must be a positive non-zero integer!")
+    if vqe_estimator.parameters.estimator_str == "ibm_runtime":
+        raise ValueError("multi-start VQE can't share an ibm runtime session between processes!")
+
+    circ = vqe_ansatz.circuit
+    opt_cal = vqe_optimizer.parameters
+
+    # initial points, a custom initial point is used as the first start
+    # drawn from qiskit's algorithm_globals random number generator, such that algorithm_globals.random_seed makes the run reproducible
+    param_inits = algorithm_globals.random.random((num_starts, circ.num_parameters))*2*np.pi
+    if opt_cal.param_map_init is not None:
+        param_init = opt_cal.param_map_init
+        if isinstance(param_init, Dict):
+            param_init = list(param_init.values())
+        param_init = np.asarray(param_init)
+        if param_init.size != circ.num_parameters:
+            raise ValueError("number of initial parameters does not match number of circuit parameters!")
+        param_inits[0] = param_init
+
+    seeds = algorithm_globals.random.integers(0, 2**31, size=num_starts)
+
+    halving = _SuccessiveHalving(num_starts, cull_fraction, cull_interval, score_window)
+    start_dicts = [None] * num_starts
+
+    # fork is not safe once the estimator backends have started their (OpenMP) threads
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Manager() as manager, ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx) as executor:
+        energy_traces = [manager.list() for _ in range(num_starts)]
+        stop_flags = [manager.Event() for _ in range(num_starts)]
+
+        futures = {}
+        for idx in range(num_starts):
+            start_opt_cal = copy.deepcopy(opt_cal)
+            start_opt_cal.param_map_init = list(param_inits[idx])
+            future = executor.submit(_run_vqe_start, vqe_estimator.parameters, target_model, vqe_ansatz, start_opt_cal, ref_result, ref_state, int(seeds[idx]), energy_traces[idx], stop_flags[idx])
+            futures[future] = idx
+
+        pending = set(futures.keys())
+        while True:
+            if pending:
+                done, pending = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start_dicts[futures[future]] = future.result()
+
+            traces = [list(trace) for trace in energy_traces]
+            for idx, rung in halving.update(traces, [start_dict is not None for start_dict in start_dicts]):
+                stop_flags[idx].set()
+                if print_status:
+                    print("multi-start rung {}: culled start {}".format(rung, idx))
+
+            if not pending:
+                break
+
+        energy_traces = [list(trace) for trace in energy_traces]
+
+    culled_at = halving.culled_at
+    survivor = halving.active[0]
+    survivor_dict = start_dicts[survivor]
+    result = survivor_dict["result"]
+
+    num_cost_fctn_calls = [start_dict["num_cost_fctn_calls"] for start_dict in start_dicts]
+    final_energies = [float(trace[-1]) if len(trace) > 0 else None for trace in energy_traces]
+    final_energies[survivor] = float(result.data.energy)
+
+    multistart_dict = {}
+    multistart_dict["num_starts"] = num_starts
+    multistart_dict["survivor"] = survivor
+    multistart_dict["seeds"] = [int(seed) for seed in seeds]
+    multistart_dict["param_inits"] = [list(p) for p in param_inits]
+    multistart_dict["energy_traces"] = energy_traces
+    multistart_dict["culled_at"] = culled_at
+    multistart_dict["final_energies"] = final_energies
+    multistart_dict["num_cost_fctn_calls"] = num_cost_fctn_calls
+    multistart_dict["tot_num_cost_fctn_calls"] = int(np.sum(num_cost_fctn_calls))
+
+    # result data (including all counters) is the one of the survivor, the other starts are only recorded in the metadata
+    result_out = VQER.VQEResult(result.data, [target_model.parameters, vqe_ansatz.parameters, vqe_optimizer.parameters, vqe_estimator.parameters], reference_result = ref_result, metadata = {"multistart": multistart_dict})
+
+    if print_status:
+        print("multi-start optimization finished: survivor {} with energy {}".format(survivor, result.data.energy))
+
+    return result_out, survivor_dict["psi"], survivor_dict["iresults"]
+
 def inference_run(inf_estimator: VQEE.VQEEstimator,
                   target_model: VQETM.VQETargetModel,
                   inf_ansatz: VQEA.VQEAnsatz,
                   vqe_result: VQER.VQEResult,
-                  angles: Union[Sequence[float], Dict, None] = None) -> VQER.InferenceResult:
+                  angles: Union[Sequence[float], Dict, None] = None,
+                  run_registry: Union[RS.RunRegistry, None] = None) -> VQER.InferenceResult:
+    # if a run registry is given, the result of an inference run with the same calibrations, vqe result and angles is returned from the registry instead of running it again
+    run_key = None
+    if run_registry is not None:
+        run_key = run_registry.get_key("inference", [target_model.parameters, inf_ansatz.parameters, inf_estimator.parameters], {"vqe_result": vqe_result, "angles": angles})
+        output = run_registry.get(run_key)
+        if output is not None:
+            return output
+
     # get angles from vqe_result
     if angles == None:
         angles = vqe_result.data.angles
@@ -345,11 +1278,25 @@ def inference_run(inf_estimator: VQEE.VQEEstimator,
     else:
         observables_results = []
 
+    inf_result = get_InferenceResult_from_data(inf_estimator, target_model, inf_ansatz, vqe_result, energy, metadata_energy, list(observables.keys()), observables_results, angles_to_file)
+    if run_key is not None:
+        run_registry.add(run_key, inf_result)
+    return inf_result
+
+def get_InferenceResult_from_data(inf_estimator: VQEE.VQEEstimator,
+                        target_model: VQETM.VQETargetModel,
+                        inf_ansatz: VQEA.VQEAnsatz,
+                        vqe_result: VQER.VQEResult,
+                        energy: float,
+                        metadata_energy: Union[List[Dict], Dict],
+                        observables_keys: List[str],
+                        observables_results: List[Tuple[float, Dict]],
+                        angles_to_file: Union[Sequence[float], Dict]) -> VQER.InferenceResult:
     # construct result data object
     result_data = VQER.ResultData(energy.real)
 
     inf_result_metadata = {"energy_metadata": metadata_energy}
-    key_value_iterator = zip(observables.keys(), observables_results)
+    key_value_iterator = zip(observables_keys, observables_results)
     
     for key, value in key_value_iterator:
         setattr(result_data, key, value[0])
@@ -361,6 +1308,99 @@ def inference_run(inf_estimator: VQEE.VQEEstimator,
     inf_result = VQER.InferenceResult(result_data, [target_model.parameters, inf_ansatz.parameters, inf_estimator.parameters], vqe_result, inf_result_metadata)
     return inf_result
 
+def bulk_inference_run(inf_estimator: VQEE.VQEEstimator,
+                       target_models: Union[VQETM.VQETargetModel, Sequence[VQETM.VQETargetModel]],
+                       inf_ansatz: VQEA.VQEAnsatz,
+                       vqe_results: Sequence[VQER.VQEResult],
+                       angles_list: Union[Sequence[Union[Sequence[float], Dict, None]], None] = None,
+                       max_circuits_per_job: Union[int, None] = None) -> List[VQER.InferenceResult]:
+    # inference run for many vqe results sharing the same ansatz structure.
+    # All (circuit, observable, angles) triples of all runs are packed into as few primitive jobs as possible (max_circuits_per_job triples per job, None means a single job) and the results are split back into one InferenceResult per vqe result.
+    num_runs = len(vqe_results)
+    if isinstance(target_models, VQETM.VQETargetModel):
+        target_models = [target_models] * num_runs
+    if len(target_models) != num_runs:
+        raise ValueError("number of target models {} does not match number of vqe results {}!".format(len(target_models), num_runs))
+
+    if angles_list is None:
+        angles_list = [None] * num_runs
+    if len(angles_list) != num_runs:
+        raise ValueError("number of angle sets {} does not match number of vqe results {}!".format(len(angles_list), num_runs))
+
+    if max_circuits_per_job is not None and max_circuits_per_job <= 0:
+        raise ValueError("maximal number of circuits per job must be a positive integer!")
+
+    # the same circuit object is used for all triples, such that the primitive only has to process (transpile) it once
+    circ = inf_ansatz.circuit
+
+    circuit_list = []
+    observables_list = []
+    parameters_list = []
+    # observable keys of each run, energy is always the first observable of a run
+    run_keys = []
+    inf_ansatz_dict = inf_ansatz.parameters.to_dict(deep_copy=False)
+    for idx, (target_model, vqe_result, angles) in enumerate(zip(target_models, vqe_results, angles_list)):
+        # all runs must share the ansatz structure of inf_ansatz, otherwise the whole packed job would fail
+        for vqe_cal in vqe_result.calibration_list:
+            if isinstance(vqe_cal, VQEA.AnsatzCalibration) and vqe_cal.to_dict(deep_copy=False) != inf_ansatz_dict:
+                raise ValueError("ansatz calibration of vqe result {} does not match the inference ansatz calibration!".format(idx))
+
+        if angles is None:
+            angles = vqe_result.data.angles
+        # convert dictionary to list
+        if isinstance(angles, Dict):
+            angles = list(angles.values())
+        if len(angles) != circ.num_parameters:
+            raise ValueError("number of angles {} of vqe result {} does not match number of circuit parameters {}!".format(len(angles), idx, circ.num_parameters))
+
+        if target_model.parameters.meas_aux_ops:
+            observables = target_model.aux_ops
+        else:
+            observables = {}
+
+        run_observables = [target_model.hamiltonian]
+        if len(observables) > 0:
+            # convert all zero elements in operator list to a indentity PauliSumOp
+            run_observables.extend(handle_zero_ops(list(observables.values())))
+
+        run_keys.append(list(observables.keys()))
+        circuit_list.extend([circ] * len(run_observables))
+        observables_list.extend(run_observables)
+        parameters_list.extend([angles] * len(run_observables))
+
+    num_triples = len(circuit_list)
+    if max_circuits_per_job is None:
+        max_circuits_per_job = max(num_triples, 1)
+
+    expectation_values = []
+    metadata = []
+    for start in range(0, num_triples, max_circuits_per_job):
+        stop = start + max_circuits_per_job
+        try:
+            job = inf_estimator.estimator.run(circuit_list[start:stop], observables_list[start:stop], parameters_list[start:stop])
+            result = job.result()
+        except Exception as exc:
+            raise RuntimeError("The primitive job failed!") from exc
+
+        expectation_values.extend(result.values)
+        metadata.extend(result.metadata)
+
+    # split packed results back into the individual runs
+    inf_results = []
+    idx = 0
+    for target_model, vqe_result, keys in zip(target_models, vqe_results, run_keys):
+        energy = expectation_values[idx]
+        metadata_energy = [metadata[idx]]
+        idx += 1
+
+        observables_results = list(zip(expectation_values[idx:idx+len(keys)], metadata[idx:idx+len(keys)]))
+        idx += len(keys)
+
+        angles_to_file = copy.copy(vqe_result.data.angles)
+        inf_results.append(get_InferenceResult_from_data(inf_estimator, target_model, inf_ansatz, vqe_result, energy, metadata_energy, keys, observables_results, angles_to_file))
+
+    return inf_results
+
 def handle_zero_ops(observables_list: List[Union[SparsePauliOp, PauliSumOp]]) -> List[Union[SparsePauliOp, PauliSumOp]]:
     
     """Replaces all occurrence of operators equal to 0 in the list with an equivalent ``PauliSumOp``
@@ -0,0 +1,265 @@
+import unittest
+import qiskit_vqe_framework
+import qiskit_vqe_framework.ResultStore as RS
+import qiskit_vqe_framework.VQEResult as VQER
+import qiskit_vqe_framework.VQETargetModel as VQETM
+import qiskit_vqe_framework.VQEOptimizer as VQEO
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+import os
+import tempfile
+
+def get_results(num_results, offset=0):
+    model_cal = VQETM.ModelCalibration("transverse_field_Ising_model", num_spins=4, J=1.0, g=-0.5)
+    opt_cal = VQEO.OptimizerCalibration("SPSA", 100, "fin_diff")
+    ref_result = VQER.ReferenceResult(VQER.ResultData(-2.0, Qtot=0.0), [model_cal])
+    results = []
+    for i in range(offset, offset+num_results):
+        data = VQER.ResultData(-1.0 - 0.001*i, opt_converged=True, tot_num_cost_fctn_calls=200+i, overlap=None, angles=[0.1*i, 0.2])
+        results.append(VQER.VQEResult(data, [model_cal, opt_cal], reference_result=ref_result))
+    return results
+
+def append_results(path, offset):
+    store = RS.ResultStore(path)
+    for i in range(5):
+        store.append_results(get_results(2, offset + 2*i))
+
+class TestResultStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = RS.ResultStore(os.path.join(self.tmpdir.name, "store"))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_append_results(self):
+        results = get_results(10)
+        self.store.append_results(results[:4])
+        self.store.append_results(results[4:])
+
+        header, data = results[0].get_filevector()
+        self.assertEqual(self.store.header, header)
+        self.assertEqual(len(self.store), 10)
+        self.assertEqual(len(self.store.get_segments()), 2)
+
+        columns = self.store.get_columns()
+        self.assertEqual(columns["energy_vqe"].dtype, np.float64)
+        # integer columns are stored as float64
+        self.assertEqual(columns["tot_num_cost_fctn_calls_vqe"].dtype, np.float64)
+        self.assertEqual(columns["opt_converged_vqe"].dtype, np.bool_)
+        self.assertEqual(columns["optimizer"].dtype.kind, "U")
+        np.testing.assert_allclose(columns["energy_vqe"], [r.data.energy for r in results])
+        np.testing.assert_array_equal(columns["tot_num_cost_fctn_calls_vqe"], np.arange(200, 210))
+        np.testing.assert_allclose(columns["angles0_vqe"], [r.data.angles[0] for r in results])
+        # None is stored as NaN
+        self.assertTrue(np.all(np.isnan(columns["overlap_vqe"])))
+        self.assertEqual(list(columns["model_name"]), ["transverse_field_Ising_model"]*10)
+
+        # columns are memory-mapped
+        for segment in self.store.get_column_segments("energy_vqe"):
+            self.assertIsInstance(segment, np.memmap)
+
+        # a new store object reads the schema
+        store = RS.ResultStore(self.store.path)
+        self.assertEqual(store.header, header)
+        self.assertEqual(store.dtypes, self.store.dtypes)
+
+    def test_schema(self):
+        self.store.append_results(get_results(2))
+        header, data = get_results(1)[0].get_filevector()
+
+        self.assertRaises(ValueError, self.store.append_rows, header[:-1], [data[:-1]])
+        self.assertRaises(ValueError, self.store.append_rows, header, [data[:-1]])
+        data[header.index("opt_converged_vqe")] = "yes"
+        self.assertRaises(ValueError, self.store.append_rows, header, [data])
+        self.assertRaises(ValueError, self.store.get_column, "unknown")
+        # overlap column accepts floats
+        data[header.index("opt_converged_vqe")] = True
+        data[header.index("overlap_vqe")] = 0.5
+        self.store.append_rows(header, [data])
+        self.assertEqual(self.store.get_column("overlap_vqe")[-1], 0.5)
+
+    def test_mixed_campaign(self):
+        # integer values of the first batch do not fix the type of later batches
+        header = ["g", "meas_shots", "num_qubits"]
+        self.store.append_rows(header, [[-1, 1000, 4], [-2, 2000, 4]])
+        self.store.append_rows(header, [[-0.5, None, 4]])
+
+        self.assertEqual(self.store.dtypes, ["float64"]*3)
+        np.testing.assert_array_equal(self.store.get_column("g"), [-1.0, -2.0, -0.5])
+        np.testing.assert_array_equal(self.store.get_column("meas_shots"), [1000.0, 2000.0, np.nan])
+        self.assertEqual(len(self.store.query().where("g", "==", -0.5)), 1)
+        self.assertEqual(len(self.store.query().where("num_qubits", "==", 4)), 3)
+
+    def test_concurrent_append(self):
+        with ProcessPoolExecutor(max_workers=4, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [executor.submit(append_results, self.store.path, 10*i) for i in range(4)]
+            for future in futures:
+                future.result()
+
+        self.assertEqual(len(self.store), 40)
+        self.assertEqual(len(self.store.get_segments()), 20)
+        self.assertEqual(sorted(self.store.get_column("tot_num_cost_fctn_calls_vqe")), list(range(200, 240)))
+        self.assertEqual([name for name in os.listdir(self.store.path) if name.endswith(".tmp")], [])
+
+    def test_compact(self):
+        for i in range(5):
+            self.store.append_results(get_results(3, 3*i))
+        energies = self.store.get_column("energy_vqe")
+
+        self.store.compact()
+
+        self.assertEqual(len(self.store.get_segments()), 1)
+        np.testing.assert_array_equal(self.store.get_column("energy_vqe"), energies)
+        self.store.append_results(get_results(1, 15))
+        np.testing.assert_array_equal(self.store.get_column("tot_num_cost_fctn_calls_vqe"), np.arange(200, 216))
+
+    def test_column_dtype(self):
+        self.assertEqual(RS._get_column_dtype([1, 2]), "float64")
+        self.assertEqual(RS._get_column_dtype([1, 2.5, None]), "float64")
+        self.assertEqual(RS._get_column_dtype([1, None]), "float64")
+        self.assertEqual(RS._get_column_dtype([True, False]), "bool")
+        self.assertEqual(RS._get_column_dtype([True, 1]), "str")
+        self.assertEqual(RS._get_column_dtype([1j, np.float64(1.0)]), "complex128")
+        self.assertEqual(RS._get_column_dtype(["None", 1]), "str")
+
+class TestIResultsSink(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "iresults")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_stream(self):
+        rng = np.random.default_rng(42)
+        params = rng.random((10, 3))
+        with RS.IResultsSink(self.path, chunk_size=4) as sink:
+            for i in range(10):
+                meta = {"variance": 0.5*i, "shots": 100} if i % 2 == 0 else {}
+                sink.callback(i+1, params[i], -1.0 - i, meta)
+            # only complete chunks are written during the run
+            self.assertEqual(len(RS.IResultsReader(self.path).get_chunks()), 2)
+            self.assertEqual(sink.num_rows, 10)
+
+        reader = RS.IResultsReader(self.path)
+        self.assertEqual(len(reader.get_chunks()), 3)
+        self.assertEqual(len(reader), 10)
+        iresults = reader.get_iresults_dict()
+        np.testing.assert_array_equal(iresults["num_cost_fctn_calls"], np.arange(1, 11))
+        np.testing.assert_array_equal(iresults["energy_values"], -1.0 - np.arange(10))
+        np.testing.assert_array_equal(iresults["circ_params"], params)
+        np.testing.assert_array_equal(iresults["shots"], [100, np.nan]*5)
+        np.testing.assert_array_equal(iresults["variance"][::2], 0.5*np.arange(0, 10, 2))
+        for chunk in reader.get_column_chunks("circ_params"):
+            self.assertIsInstance(chunk, np.memmap)
+
+        self.assertRaises(ValueError, RS.IResultsSink, self.path)
+        self.assertRaises(ValueError, reader.get_column, "unknown")
+        self.assertRaises(ValueError, RS.IResultsReader, os.path.join(self.tmpdir.name, "unknown"))
+
+class TestRunRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.registry = RS.RunRegistry(os.path.join(self.tmpdir.name, "runs"))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_registry(self):
+        model_cal = VQETM.ModelCalibration("transverse_field_Ising_model", num_spins=4, J=1.0, g=-0.5)
+        key = self.registry.get_key("vqe", [model_cal], {"save_iresults": False})
+        self.assertEqual(key, self.registry.get_key("vqe", [VQETM.ModelCalibration("transverse_field_Ising_model", num_spins=4, J=1.0, g=-0.5)], {"save_iresults": False}))
+        self.assertNotEqual(key, self.registry.get_key("vqe", [model_cal], {"save_iresults": True}))
+        self.assertNotEqual(key, self.registry.get_key("ed", [model_cal], {"save_iresults": False}))
+
+        self.assertNotIn(key, self.registry)
+        self.assertIsNone(self.registry.get(key))
+        result = get_results(1)[0]
+        self.registry.add(key, (result, np.arange(4.0)))
+        self.assertIn(key, self.registry)
+        self.assertEqual(self.registry.keys(), [key])
+        self.assertEqual(len(RS.RunRegistry(self.registry.path)), 1)
+        stored_result, stored_array = self.registry.get(key)
+        self.assertEqual(stored_result.to_dict(), result.to_dict())
+        np.testing.assert_array_equal(stored_array, np.arange(4.0))
+
+class TestResultQuery(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = RS.ResultStore(os.path.join(self.tmpdir.name, "store"))
+        rng = np.random.default_rng(5)
+        self.rows = []
+        # one segment per g value, two optimizer settings and three repetitions per segment
+        for g in [-1.0, -0.5, 0.0, 0.5]:
+            model_cal = VQETM.ModelCalibration("transverse_field_Ising_model", num_spins=4, J=1.0, g=g)
+            ref_result = VQER.ReferenceResult(VQER.ResultData(-2.0, Qtot=0.0), [model_cal])
+            results = []
+            for max_iter in [100, 200]:
+                opt_cal = VQEO.OptimizerCalibration("SPSA", max_iter, "fin_diff")
+                for rep in range(3):
+                    energy = rng.normal()
+                    data = VQER.ResultData(energy, opt_converged=bool(rep % 2), tot_num_cost_fctn_calls=2*max_iter+rep, overlap=None if rep == 0 else 0.9, angles=[0.1*rep, 0.2])
+                    results.append(VQER.VQEResult(data, [model_cal, opt_cal], reference_result=ref_result))
+                    self.rows.append((g, max_iter, rep, energy))
+            self.store.append_results(results)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_index(self):
+        index = self.store.get_index("g")
+        np.testing.assert_array_equal(index.values, [-1.0, -0.5, 0.0, 0.5])
+        np.testing.assert_array_equal(index.values[index.codes], self.store.get_column("g"))
+        np.testing.assert_array_equal(index.get_mask([0.5, 7.0]), [row[0] == 0.5 for row in self.rows])
+        self.assertEqual(len(self.store.get_index("optimizer").values), 1)
+
+    def test_filter(self):
+        query = self.store.query()
+        self.assertEqual(len(query), 24)
+        self.assertEqual(len(query.where("g", "==", -0.5)), 6)
+        self.assertEqual(len(query.where("g", "in", [-0.5, 0.5]).where("opt_max_iter", "==", 200)), 6)
+        self.assertEqual(len(query.where("g", "!=", -0.5)), 18)
+        self.assertEqual(len(query.where("g", ">", -0.5)), 12)
+        self.assertEqual(len(query.where("optimizer", "==", "SPSA")), 24)
+        self.assertEqual(len(query.where("optimizer", "==", "SPSA_long_name")), 0)
+        self.assertEqual(len(query.where("overlap_vqe", "==", None)), 8)
+        self.assertEqual(len(query.where("opt_converged_vqe", "==", True)), 8)
+        self.assertRaises(ValueError, query.where, "g", "~", 0.0)
+        self.assertRaises(ValueError, query.where, "unknown", "==", 0.0)
+
+        energies = query.where("g", "==", 0.0).where("opt_max_iter", "<=", 100).get_column("energy_vqe")
+        np.testing.assert_array_equal(energies, [row[3] for row in self.rows if row[0] == 0.0 and row[1] <= 100])
+
+        # the query is a snapshot of the complete segments
+        self.store.append_results(get_results(2))
+        self.assertEqual(len(query), 24)
+        self.assertEqual(len(self.store.query()), 26)
+
+    def test_group_by(self):
+        groups = self.store.query().where("opt_max_iter", "==", 200).group_by(["g", "opt_max_iter"])
+        self.assertEqual(len(groups), 4)
+        np.testing.assert_array_equal(groups.keys["g"], [-1.0, -0.5, 0.0, 0.5])
+
+        aggregated = groups.aggregate({"energy_vqe": ["min", "mean", "count"], "tot_num_cost_fctn_calls_vqe": "max"})
+        for i, g in enumerate([-1.0, -0.5, 0.0, 0.5]):
+            energies = [row[3] for row in self.rows if row[0] == g and row[1] == 200]
+            self.assertEqual(aggregated["energy_vqe_min"][i], min(energies))
+            self.assertAlmostEqual(aggregated["energy_vqe_mean"][i], np.mean(energies))
+            self.assertEqual(aggregated["energy_vqe_count"][i], 3)
+            self.assertEqual(aggregated["tot_num_cost_fctn_calls_vqe_max"][i], 402)
+        self.assertRaises(ValueError, groups.aggregate, {"energy_vqe": "median"})
+
+        # best energy per (g, opt_max_iter) with the angles of the best run
+        best = self.store.query().group_by(["g", "opt_max_iter"]).get_best("energy_vqe", columns=["angles0_vqe"])
+        self.assertEqual(len(best["g"]), 8)
+        for g, max_iter, energy, angle in zip(best["g"], best["opt_max_iter"], best["energy_vqe"], best["angles0_vqe"]):
+            rows = [row for row in self.rows if row[0] == g and row[1] == max_iter]
+            best_row = min(rows, key=lambda row: row[3])
+            self.assertEqual(energy, best_row[3])
+            self.assertAlmostEqual(angle, 0.1*best_row[2])
+
+        empty = self.store.query().where("g", "==", 3.0).group_by("g")
+        self.assertEqual(len(empty), 0)
+        self.assertEqual(len(empty.aggregate({"energy_vqe": ["min", "count"]})["energy_vqe_min"]), 0)
@@ -0,0 +1,74 @@
+import unittest
+import qiskit_vqe_framework
+import qiskit_vqe_framework.Serialization as Ser
+import qiskit_vqe_framework.VQETargetModel as VQETM
+from qiskit.quantum_info import Statevector
+import numpy as np
+import os
+import pickle
+import struct
+import tempfile
+
+class TestSerialization(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fname = os.path.join(self.tmpdir.name, "obj.pickle")
+        rng = np.random.default_rng(3)
+        state = rng.normal(size=2**8) + 1j*rng.normal(size=2**8)
+        self.obj = {"state": Statevector(state/np.linalg.norm(state)), "trace": rng.random((100, 7)), "energy": -1.5, "name": "test"}
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def assert_obj_equal(self, obj):
+        self.assertEqual(obj["state"], self.obj["state"])
+        np.testing.assert_array_equal(obj["trace"], self.obj["trace"])
+        self.assertEqual(obj["energy"], self.obj["energy"])
+        self.assertEqual(obj["name"], self.obj["name"])
+
+    def test_buffers(self):
+        data, buffers = Ser.get_pickle_buffers(self.obj)
+        self.assertEqual(len(buffers), 2)
+        # the array data is not contained in the pickle stream
+        self.assertLess(len(data), self.obj["trace"].nbytes)
+        obj = Ser.get_object_from_buffers(data, buffers)
+        self.assert_obj_equal(obj)
+        self.assertTrue(np.shares_memory(obj["trace"], self.obj["trace"]))
+
+    def test_file(self):
+        Ser.to_pickle(self.obj, self.fname)
+        self.assertTrue(Ser.is_out_of_band_pickle(self.fname))
+        self.assertEqual([name for name in os.listdir(self.tmpdir.name) if name.endswith(".tmp")], [])
+
+        # buffers are aligned blobs behind the pickle stream
+        with open(self.fname, "rb") as f:
+            content = f.read()
+        _, _, num_buffers, _, _ = struct.unpack_from(Ser.PICKLE_HEADER_FORMAT, content)
+        self.assertEqual(num_buffers, 2)
+        for i in range(num_buffers):
+            offset, _ = struct.unpack_from(Ser.PICKLE_BUFFER_FORMAT, content, struct.calcsize(Ser.PICKLE_HEADER_FORMAT) + i*struct.calcsize(Ser.PICKLE_BUFFER_FORMAT))
+            self.assertEqual(offset % Ser.PICKLE_ALIGNMENT, 0)
+
+        obj = Ser.get_object_from_pickle(self.fname)
+        self.assert_obj_equal(obj)
+        # memory-mapped arrays are read-only views of the file
+        self.assertFalse(obj["trace"].flags.writeable)
+        self.assertFalse(obj["trace"].flags.owndata)
+
+        obj = Ser.get_object_from_pickle(self.fname, mmap_mode=False)
+        self.assert_obj_equal(obj)
+        self.assertTrue(obj["trace"].flags.writeable)
+
+    def test_plain_pickle(self):
+        with open(self.fname, "wb") as f:
+            pickle.dump(self.obj, f)
+        self.assertFalse(Ser.is_out_of_band_pickle(self.fname))
+        self.assert_obj_equal(Ser.get_object_from_pickle(self.fname))
+        self.assertRaises(ValueError, Ser.get_object_from_pickle, os.path.join(self.tmpdir.name, "unknown.pickle"))
+
+    def test_calibration(self):
+        model_cal = VQETM.ModelCalibration("transverse_field_Ising_model", num_spins=4, J=1.0, g=-0.5)
+        model_cal.to_pickle(self.fname, out_of_band=True)
+        self.assertTrue(Ser.is_out_of_band_pickle(self.fname))
+        self.assertEqual(VQETM.get_ModelCalibration_from_pickle(self.fname).to_dict(), model_cal.to_dict())
+        self.assertRaises(ValueError, model_cal.to_pickle, self.fname)
@@ -2,6 +2,9 @@ import unittest
 import qiskit_vqe_framework
 import qiskit_vqe_framework.TerminationChecker as TC
 import copy
+import copyreg
+import pickle
+import time
 import numpy as np
 
 class TestRelativeEnergyChecker(unittest.TestCase):
@@ -73,6 +76,21 @@ class TestRelativeEnergyChecker(unittest.TestCase):
         self.checker.values=[]
         self.assertEqual(self.checker, TC.RelativeEnergyChecker(self.checker.buffer_length, self.checker.considered_values_length, self.checker.epsilon))
 
+    def test_incremental_relative_change(self):
+        rng = np.random.default_rng(42)
+        y = rng.normal(size=537)
+        y[rng.integers(0, len(y), size=50)] = 0.0
+        for i, val in enumerate(y):
+            self.checker(i, [0.0, 0.0], val, 0.5, True)
+            vals = y[max(0, i+1-self.checker.buffer_length):i+1]
+            vals = vals[np.abs(vals) > 1e-05]
+            rel_change = np.abs((vals[1:]-vals[:-1])/vals[1:])
+            np.testing.assert_allclose(self.checker._calc_relative_change(), rel_change)
+            self.assertEqual(self.checker._num_deltas, len(rel_change))
+            if len(rel_change) > 0:
+                self.assertAlmostEqual(self.checker._delta_sum, np.sum(rel_change))
+        self.assertEqual(self.checker.values, list(y[-self.checker.buffer_length:]))
+
         
         
 class TestLinearFitChecker(unittest.TestCase):
@@ -107,4 +125,261 @@ class TestLinearFitChecker(unittest.TestCase):
 
     def test_eq(self):
         self.checker.values=[]
-        self.assertEqual(self.checker, TC.LinearFitChecker(self.checker.buffer_length, self.checker.epsilon))
\ No newline at end of file
+        self.assertEqual(self.checker, TC.LinearFitChecker(self.checker.buffer_length, self.checker.epsilon))
+
+    def test_incremental_slope(self):
+        rng = np.random.default_rng(42)
+        y = np.cumsum(rng.normal(size=537)) + 100.0
+        for i, val in enumerate(y):
+            self.checker(i, [0.0, 0.0], val, 0.5, True)
+            if i >= 1:
+                vals = y[max(0, i+1-self.checker.buffer_length):i+1]
+                pp = np.polyfit(range(len(vals)), vals, 1)
+                self.assertAlmostEqual(self.checker._get_slope(), pp[0])
+        self.assertEqual(self.checker.to_dict()["values"], list(y[-self.checker.buffer_length:]))
+
+
+class TestStatisticalTrendChecker(unittest.TestCase):
+    def setUp(self):
+        self.checker = TC.StatisticalTrendChecker(50, 0.05)
+        self.rng = np.random.default_rng(42)
+        self.meta = {"variance": 1.0, "shots": 1000}
+        self.sigma = np.sqrt(self.meta["variance"]/self.meta["shots"])
+
+    def run_checker(self, checker, y):
+        for i, val in enumerate(y):
+            checker.update_metadata(val, self.meta)
+            if checker(i, [0.0, 0.0], val, 0.5, True):
+                return i
+        return None
+
+    def test_plateau(self):
+        y = -1.0 + self.rng.normal(scale=self.sigma, size=200)
+
+        stop = self.run_checker(self.checker, y)
+        self.assertIsNotNone(stop)
+        self.assertLess(stop, 60)
+        # the relative change of the shot noise is far above a typical epsilon
+        self.assertIsNone(self.run_checker(TC.RelativeEnergyChecker(50, 20, 1e-4), y))
+
+    def test_trend(self):
+        y = -0.01*np.arange(200) + self.rng.normal(scale=self.sigma, size=200)
+
+        self.assertIsNone(self.run_checker(self.checker, y))
+
+    def test_variance(self):
+        self.checker.update_metadata(-1.0, {"variance": 2.0, "shots": 100})
+        self.checker.update_metadata(-2.0, {"variance": 4.0, "shots": 100})
+        # value is the mean of the last evaluations (SPSA estimate)
+        self.checker(1, [0.0, 0.0], -1.5, 0.5, True)
+        self.assertAlmostEqual(self.checker._variances[0], (0.02 + 0.04)/4)
+
+        self.checker.update_metadata(-1.0, {"variance": 2.0, "shots": 100})
+        self.checker.update_metadata(-3.0, {"variance": 4.0, "shots": 100})
+        # value is the last evaluation
+        self.checker(2, [0.0, 0.0], -3.0, 0.5, True)
+        self.assertAlmostEqual(self.checker._variances[1], 0.04)
+
+        # exact estimator without variance
+        self.checker.update_metadata(-3.0, {})
+        self.checker(3, [0.0, 0.0], -3.0, 0.5, True)
+        self.assertTrue(np.isnan(self.checker._variances[2]))
+        self.assertEqual(self.checker._num_unknown, 1)
+
+    def test_incremental_trend(self):
+        y = np.cumsum(self.rng.normal(size=173))
+        variances = self.rng.uniform(0.5, 2.0, size=173)
+        for i, (val, var) in enumerate(zip(y, variances)):
+            self.checker.update_metadata(val, {"variance": var, "shots": 1})
+            self.checker(i, [0.0, 0.0], val, 0.5, True)
+            if i >= 2:
+                vals = y[max(0, i+1-self.checker.buffer_length):i+1]
+                w = 1/variances[max(0, i+1-self.checker.buffer_length):i+1]
+                x = np.arange(len(vals))
+                slope, std_error = self.checker._get_trend()
+                self.assertAlmostEqual(slope, np.polyfit(x, vals, 1, w=np.sqrt(w))[0])
+                self.assertAlmostEqual(std_error, np.sqrt(np.sum(w)/(np.sum(w)*np.sum(w*x**2) - np.sum(w*x)**2)))
+
+        # unknown variances: unweighted fit with the noise estimated from the residuals
+        self.checker.values = y[-self.checker.buffer_length:]
+        vals = y[-self.checker.buffer_length:]
+        x = np.arange(len(vals))
+        pp = np.polyfit(x, vals, 1)
+        rss = np.sum((vals - np.polyval(pp, x))**2)
+        slope, std_error = self.checker._get_trend()
+        self.assertAlmostEqual(slope, pp[0])
+        self.assertAlmostEqual(std_error, np.sqrt(rss/(len(x)-2)/np.sum((x - np.mean(x))**2)))
+
+    def test_from_name(self):
+        checker_dict = self.checker.to_dict()
+        checker_dict["values"] = []
+        checker = TC.get_termination_checker_from_name(checker_dict.pop("name"), **checker_dict)
+        self.assertEqual(checker, self.checker)
+        self.assertEqual(checker.significance_level, self.checker.significance_level)
+        self.assertEqual(repr(checker), "StatisticalTrendChecker(buffer_length=50, significance_level=0.05)")
+        self.assertRaises(ValueError, TC.StatisticalTrendChecker, 2)
+        self.assertRaises(ValueError, TC.StatisticalTrendChecker, 10, 1.0)
+
+
+class TestBudgetChecker(unittest.TestCase):
+    def run_checker(self, checker, update, num_iterations=100):
+        # returns the number of iterations until termination
+        for i in range(num_iterations):
+            update(checker)
+            if checker(i, [0.0, 0.0], -1.0, 0.5, True):
+                return i + 1
+        return None
+
+    def test_shot_budget(self):
+        checker = TC.ShotBudgetChecker(1000)
+        def update(checker):
+            checker.update_metadata(-1.0, {"variance": 1.0, "shots": 100})
+            checker.update_metadata(-1.0, {"variance": 1.0, "shots": 100})
+            checker.update_metadata(-1.0, {})
+
+        self.assertEqual(self.run_checker(checker, update), 5)
+        self.assertEqual(checker.usage, 1000)
+
+    def test_job_budget(self):
+        checker = TC.JobBudgetChecker(10)
+        def update(checker):
+            for _ in range(3):
+                checker.update_job()
+
+        # the next iteration would exceed the budget
+        self.assertEqual(self.run_checker(checker, update), 3)
+        self.assertEqual(checker.usage, 9)
+
+    def test_first_iteration(self):
+        checker = TC.JobBudgetChecker(10)
+        checker.update_job()
+        self.assertEqual(checker(0, [0.0, 0.0], -1.0, 0.5, True), False)
+
+        checker = TC.JobBudgetChecker(10)
+        for _ in range(10):
+            checker.update_job()
+        self.assertEqual(checker(0, [0.0, 0.0], -1.0, 0.5, True), True)
+
+    def test_wall_time(self):
+        checker = TC.WallTimeChecker(0.12)
+
+        self.assertEqual(self.run_checker(checker, lambda checker: (checker.update_metadata(-1.0, {}), time.sleep(0.05))), 2)
+        self.assertGreaterEqual(checker.usage, 0.1)
+        # the clock is not continued by copies
+        self.assertIsNone(copy.deepcopy(checker)._last_time)
+
+    def test_composite(self):
+        def update(checker):
+            checker.update_job()
+            checker.update_metadata(-1.0, {"variance": 1.0, "shots": 100})
+
+        checker = TC.CompositeChecker([TC.JobBudgetChecker(10), TC.ShotBudgetChecker(500)], "any")
+        self.assertEqual(self.run_checker(checker, update), 5)
+        checker = TC.CompositeChecker([TC.JobBudgetChecker(10), TC.ShotBudgetChecker(500)], "all")
+        self.assertEqual(self.run_checker(checker, update), 10)
+        self.assertRaises(ValueError, TC.CompositeChecker, [])
+        self.assertRaises(ValueError, TC.CompositeChecker, [checker], "one")
+
+    def test_reset(self):
+        def update(checker):
+            checker.update_job()
+            checker.update_metadata(-1.0, {"variance": 1.0, "shots": 100})
+
+        checker = TC.CompositeChecker([TC.JobBudgetChecker(10), TC.ShotBudgetChecker(500), TC.WallTimeChecker(60.0), TC.LinearFitChecker(5, 0.001)], "any")
+        self.assertEqual(self.run_checker(checker, update), 5)
+        checker.reset()
+        for sub_checker in checker.checkers:
+            self.assertEqual(sub_checker.values, [])
+        self.assertEqual([sub_checker.usage for sub_checker in checker.checkers[:3]], [0, 0, 0.0])
+        self.assertIsNone(checker.checkers[0]._checked_usage)
+        # the budget is available again
+        self.assertEqual(self.run_checker(checker, update), 5)
+
+    def test_from_name(self):
+        checker = TC.CompositeChecker([TC.ShotBudgetChecker(1000), TC.WallTimeChecker(60.0), TC.CompositeChecker([TC.JobBudgetChecker(10), TC.LinearFitChecker(5, 0.001)], "all")], "any")
+        checker_dict = checker.to_dict()
+        checker_new = TC.get_termination_checker_from_name(checker_dict.pop("name"), **checker_dict)
+
+        self.assertEqual(checker_new, checker)
+        self.assertEqual(repr(checker_new), repr(checker))
+        self.assertNotEqual(checker_new, TC.CompositeChecker(checker.checkers, "all"))
+        self.assertRaises(ValueError, TC.ShotBudgetChecker, 0)
+
+
+class _LegacyChecker:
+    # pickles as a termination checker of the given class with the given __dict__ (e.g. from before the ring buffer was introduced)
+    def __init__(self, checker_type, state):
+        self.checker_type = checker_type
+        self.state = state
+
+    def __reduce__(self):
+        return (copyreg._reconstructor, (self.checker_type, object, None), self.state)
+
+class TestLegacyCheckerPickle(unittest.TestCase):
+    def test_values_list(self):
+        rng = np.random.default_rng(3)
+        values = list(-1.0 + 0.01*rng.random(12))
+        new_values = list(-1.0 + 0.01*rng.random(30))
+        legacy_states = [(TC.RelativeEnergyChecker(10, 5, 1e-03), {"buffer_length": 10, "values": values[-10:], "name": "relative_energy_change", "epsilon": 1e-03, "considered_values_length": 5}),
+                         (TC.LinearFitChecker(10, 1e-03), {"buffer_length": 10, "values": values[-10:], "name": "linear_fit", "epsilon": 1e-03})]
+        for checker, state in legacy_states:
+            checker.values = values
+            legacy_checker = pickle.loads(pickle.dumps(_LegacyChecker(type(checker), state)))
+
+            self.assertEqual(legacy_checker, checker)
+            self.assertEqual(legacy_checker.values, values[-10:])
+            self.assertEqual(legacy_checker.to_dict(), checker.to_dict())
+            for value in new_values:
+                self.assertEqual(legacy_checker(0, [], value, 0.1, True), checker(0, [], value, 0.1, True))
+            self.assertEqual(legacy_checker.values, checker.values)
+
+class TestReplayTerminationCheckers(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.traces = []
+        for length in [40, 150, 300, 301]:
+            trace = -1.0 + np.exp(-np.arange(length)/rng.uniform(10, 50)) + rng.normal(scale=1e-4, size=length)
+            trace[rng.integers(0, length, size=5)] = 0.0
+            self.traces.append(trace)
+
+    def run_checker(self, checker, trace):
+        # number of iterations until termination (None if not terminated)
+        checker = copy.deepcopy(checker)
+        for i, val in enumerate(trace):
+            if checker(i, [0.0], val, 0.5, True):
+                return i + 1
+        return None
+
+    def assert_replay(self, checkers):
+        replay = TC.replay_termination_checkers(self.traces, checkers, ref_energy=-1.0)
+        for c, checker in enumerate(checkers):
+            for i, trace in enumerate(self.traces):
+                stop = self.run_checker(checker, trace)
+                self.assertEqual(replay["terminated"][c,i], stop is not None)
+                if stop is None:
+                    stop = len(trace)
+                self.assertEqual(replay["stop_iteration"][c,i], stop)
+                self.assertAlmostEqual(replay["energy_gap"][c,i], trace[stop-1] + 1.0)
+
+    def test_grid(self):
+        checkers = TC.get_termination_checker_grid("linear_fit", buffer_length=[5, 20], epsilon=np.logspace(-6, -3, 4))
+        self.assertEqual(len(checkers), 8)
+        self.assertEqual(repr(checkers[1]), "LinearFitChecker(buffer_length=5, epsilon={})".format(np.logspace(-6, -3, 4)[1]))
+
+    def test_linear_fit(self):
+        self.assert_replay(TC.get_termination_checker_grid("linear_fit", buffer_length=[2, 5, 20, 100], epsilon=np.logspace(-7, -3, 5)))
+
+    def test_relative_energy(self):
+        checkers = TC.get_termination_checker_grid("relative_energy_change", buffer_length=[5, 20, 100], considered_values_length=[2, 4], epsilon=np.logspace(-5, -2, 4))
+        checkers += TC.get_termination_checker_grid("relative_energy_change", buffer_length=[20, 100], considered_values_length=15, epsilon=np.logspace(-5, -2, 4))
+        self.assert_replay(checkers)
+
+    def test_other_checkers(self):
+        self.assert_replay([TC.StatisticalTrendChecker(20, 0.05), TC.CompositeChecker([TC.LinearFitChecker(10, 1e-4), TC.RelativeEnergyChecker(10, 5, 1e-4)], "all")])
+
+    def test_iteration_values(self):
+        energy_values = list(range(50)) + [1.0, 3.0, 5.0, 7.0, 9.0]
+        np.testing.assert_allclose(TC.get_iteration_values(energy_values), [2.0, 6.0])
+        replay = TC.replay_termination_checkers([{"energy_values": energy_values}], [TC.LinearFitChecker(5, 0.1)])
+        self.assertEqual(replay["stop_iteration"][0,0], 2)
+        self.assertEqual(replay["energy_gap"][0,0], 0.0)
@@ -2,6 +2,8 @@ import unittest
 import qiskit_vqe_framework
 import qiskit_vqe_framework.VQEAnsatz as VQEA
 import copy
+import numpy as np
+from qiskit.quantum_info import Statevector
 
 
 class TestVQEAnsatzCalibration(unittest.TestCase):
@@ -49,3 +51,34 @@ class TestVQEAnsatzESU2(unittest.TestCase):
 
         self.assertNotEqual(self.esu2_ansatz.to_dict(), esu2_ansatz.to_dict())
         self.assertNotEqual(self.esu2_ansatz.circuit, esu2_ansatz.circuit)
+
+class TestFrozenParameterAnsatz(unittest.TestCase):
+    def test_frozen_parameter_ansatz(self):
+        ansatz = VQEA.ESU2(2, reps=2)
+        frozen_values = [0.1, 0.2, 0.3]
+        frozen_ansatz = VQEA.FrozenParameterAnsatz(ansatz, frozen_values)
+
+        self.assertEqual(frozen_ansatz.parameters, ansatz.parameters)
+        self.assertEqual(frozen_ansatz.frozen_values, frozen_values)
+        self.assertEqual(frozen_ansatz.circuit.num_parameters, ansatz.circuit.num_parameters - 3)
+        self.assertEqual(list(frozen_ansatz.circuit.parameters), list(ansatz.circuit.parameters)[3:])
+
+        free_values = list(np.linspace(0.0, 1.0, frozen_ansatz.circuit.num_parameters))
+        psi_frozen = Statevector(frozen_ansatz.circuit.assign_parameters(free_values))
+        psi = Statevector(ansatz.circuit.assign_parameters(frozen_values + free_values))
+        self.assertAlmostEqual(np.abs(psi.inner(psi_frozen)), 1.0)
+
+        self.assertRaises(ValueError, VQEA.FrozenParameterAnsatz, ansatz, [0.0]*(ansatz.circuit.num_parameters+1))
+
+    def test_frozen_trailing_parameters(self):
+        ansatz = VQEA.ESU2(2, reps=2)
+        frozen_values = [0.1, 0.2, 0.3]
+        frozen_ansatz = VQEA.FrozenParameterAnsatz(ansatz, frozen_values, trailing=True)
+
+        self.assertTrue(frozen_ansatz.trailing)
+        self.assertEqual(list(frozen_ansatz.circuit.parameters), list(ansatz.circuit.parameters)[:-3])
+
+        free_values = list(np.linspace(0.0, 1.0, frozen_ansatz.circuit.num_parameters))
+        psi_frozen = Statevector(frozen_ansatz.circuit.assign_parameters(free_values))
+        psi = Statevector(ansatz.circuit.assign_parameters(free_values + frozen_values))
+        self.assertAlmostEqual(np.abs(psi.inner(psi_frozen)), 1.0)
@@ -3,7 +3,9 @@ from qiskit_ibm_runtime import QiskitRuntimeService, Session
 from qiskit import IBMQ
 import qiskit_vqe_framework
 import qiskit_vqe_framework.VQEEstimator as VQEE
+from qiskit_aer.noise import NoiseModel, depolarizing_error
 import os
+import tempfile
 
 class TestVQEEstimatorCalibration(unittest.TestCase):
     def setUp(self):
@@ -123,6 +125,63 @@ class TestVQEEstimatorCalibration(unittest.TestCase):
         self.assertRaises(ValueError, self.estimator_cal._validate_estimator_options, est_opt, est_prim_str)
 
 
+class TestNoiseModelStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = VQEE.NoiseModelStore(os.path.join(self.tmpdir.name, "noise_models"))
+        self.noise_model = NoiseModel()
+        self.noise_model.add_all_qubit_quantum_error(depolarizing_error(0.01, 1), ["ry", "rz"])
+        self.est_opt = {"abelian_grouping": False, "transpilation_options": {"optimization_level": 0}, "backend_options": {"method": "automatic", "noise_model": self.noise_model}, "run_options": {"shots": 1024}, "approximation": False, "skip_transpilation": False}
+        VQEE.clear_noise_model_cache()
+
+    def tearDown(self):
+        VQEE.clear_noise_model_cache()
+        self.tmpdir.cleanup()
+
+    def test_add_get(self):
+        key = self.store.add(self.noise_model)
+        self.assertIn(key, self.store)
+        # the hash depends on the content only
+        noise_model = NoiseModel()
+        noise_model.add_all_qubit_quantum_error(depolarizing_error(0.01, 1), ["ry", "rz"])
+        self.assertEqual(VQEE.get_noise_model_hash(noise_model), key)
+        noise_model.add_all_qubit_quantum_error(depolarizing_error(0.02, 2), ["cx"])
+        self.assertNotEqual(VQEE.get_noise_model_hash(noise_model), key)
+        self.assertEqual(self.store.add(self.noise_model), key)
+        self.assertEqual(os.listdir(self.store.path), [key + ".pickle"])
+
+        # loaded once per process
+        VQEE.clear_noise_model_cache()
+        noise_model = VQEE.NoiseModelStore(self.store.path).get(key)
+        self.assertEqual(noise_model, self.noise_model)
+        self.assertIs(self.store.get(key), noise_model)
+        self.assertRaises(ValueError, self.store.get, "0"*64)
+        self.assertRaises(ValueError, self.store.add, "noise_model")
+
+    def test_yaml_reference(self):
+        est_cal = VQEE.EstimatorCalibration(self.est_opt, "depolarizing", "None", "None", "aer", "aer_automatic")
+        fnames = [os.path.join(self.tmpdir.name, "est_cal{}.yaml".format(i)) for i in range(3)]
+        for fname in fnames:
+            est_cal.to_yaml(fname, noise_model_store=self.store)
+        # the noise model is stored once and not next to the yaml files
+        self.assertEqual(len(os.listdir(self.store.path)), 1)
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)), sorted(["noise_models"] + [os.path.basename(fname) for fname in fnames]))
+        # the calibration is not modified
+        self.assertIs(est_cal.estimator_options["backend_options"]["noise_model"], self.noise_model)
+
+        VQEE.clear_noise_model_cache()
+        est_cals = [VQEE.get_EstimatorCalibration_from_yaml(fname) for fname in fnames]
+        noise_model = est_cals[0].estimator_options["backend_options"]["noise_model"]
+        self.assertEqual(noise_model, self.noise_model)
+        for cal in est_cals:
+            self.assertIs(cal.estimator_options["backend_options"]["noise_model"], noise_model)
+            self.assertEqual(cal.noise_model_str, "depolarizing")
+
+        # legacy pickle files next to the yaml file
+        fname = os.path.join(self.tmpdir.name, "est_cal_pickle.yaml")
+        est_cal.to_yaml(fname)
+        self.assertEqual(VQEE.get_EstimatorCalibration_from_yaml(fname).estimator_options["backend_options"]["noise_model"], self.noise_model)
+
 class TestVQEEstimator(unittest.TestCase):
     def setUp(self):
         self.est_opt = {"abelian_grouping": False, "transpilation_options": {"optimization_level": 3}, "backend_options": {"method": "automatic", "shots": 4000}, "run_options": {"shots": 1024}, "approximation": False, "skip_transpilation": False}
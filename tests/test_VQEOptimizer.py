@@ -3,7 +3,21 @@ import qiskit_vqe_framework
 import qiskit_vqe_framework.VQEOptimizer as VQEO
 import qiskit_vqe_framework.TerminationChecker as tc
 import qiskit.algorithms.optimizers as optimizers
+from qiskit.algorithms.gradients import ParamShiftEstimatorGradient, FiniteDiffEstimatorGradient, SPSAEstimatorGradient, ReverseEstimatorGradient
+from qiskit.primitives import Estimator
+from qiskit_aer.primitives import Estimator as AerEstimator
+from qiskit_aer.noise import NoiseModel, depolarizing_error
+import qiskit_vqe_framework.VQEEstimator as VQEE
+import qiskit_vqe_framework.VQEAnsatz as VQEA
+import qiskit_vqe_framework.VQETargetModel as VQETM
+from qiskit import QuantumCircuit
+from qiskit.circuit import Parameter
+from qiskit.quantum_info import SparsePauliOp
+import numpy as np
 import copy
+import os
+import tempfile
+import warnings
 
 class TestVQEOptimizerCalibration(unittest.TestCase):
     def setUp(self):
@@ -21,17 +35,49 @@ class TestVQEOptimizerCalibration(unittest.TestCase):
 
     def test_repr(self):
 
-        self.assertEqual(repr(self.opt_cal), "OptimizerCalibration(name_str=SPSA, maxiter=100, grad_meth=fin_diff, param_map_init=[0.0, 0.0, 0.0], termination_checker={})".format(self.checker))
+        self.assertEqual(repr(self.opt_cal), "OptimizerCalibration(name_str=SPSA, maxiter=100, grad_meth=fin_diff, param_map_init=[0.0, 0.0, 0.0], termination_checker={}, grad_epsilon=0.01, optimizer_options=None)".format(self.checker))
 
     def test_to_dict(self):
-        self.assertEqual(self.opt_cal.to_dict(), {"name": "OptimizerCalibration", "optimizer_name": "SPSA", "maxiter": 100, "grad_meth": "fin_diff", "termination_checker": self.checker, "param_map_init": [0.0, 0.0, 0.0], "use_custom_param_init": True})
+        self.assertEqual(self.opt_cal.to_dict(), {"name": "OptimizerCalibration", "optimizer_name": "SPSA", "maxiter": 100, "grad_meth": "fin_diff", "termination_checker": self.checker, "param_map_init": [0.0, 0.0, 0.0], "use_custom_param_init": True, "grad_epsilon": 0.01, "optimizer_options": None})
 
     def test_get_filevector(self):
         header, data = self.opt_cal.get_filevector()
 
-        self.assertEqual(header, ["optimizer", "opt_max_iter", "grad_method", "use_custom_param_init", "termination_checker"])
-
-        self.assertEqual(data, ["SPSA", 100, "fin_diff", True, self.checker.name])
+        self.assertEqual(header, ["optimizer", "opt_max_iter", "grad_method", "grad_epsilon", "use_custom_param_init", "termination_checker"])
+
+        self.assertEqual(data, ["SPSA", 100, "fin_diff", 0.01, True, self.checker.name])
+
+    def test_legacy_pickle(self):
+        # calibration pickled without the attributes that were added later
+        opt_cal = VQEO.OptimizerCalibration("SPSA", 100, "fin_diff", param_map_init=[0.0, 0.0, 0.0])
+        del opt_cal.__dict__["grad_epsilon"]
+        del opt_cal.__dict__["optimizer_options"]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fname = os.path.join(tmpdir, "opt_cal.pickle")
+            opt_cal.to_pickle(fname)
+            opt_cal_new = VQEO.get_OptimizerCalibration_from_pickle(fname)
+
+        self.assertEqual(opt_cal_new.grad_epsilon, 0.01)
+        self.assertIsNone(opt_cal_new.optimizer_options)
+        self.assertEqual(opt_cal_new.get_filevector(), VQEO.OptimizerCalibration("SPSA", 100, "fin_diff", param_map_init=[0.0, 0.0, 0.0]).get_filevector())
+        self.assertIsInstance(VQEO.VQEOptimizer(opt_cal_new).optimizer, optimizers.SPSA)
+
+    def test_to_yaml(self):
+        checker = tc.CompositeChecker([tc.ShotBudgetChecker(10000), tc.CompositeChecker([tc.JobBudgetChecker(100), tc.RelativeEnergyChecker(10, 5, 0.01)], "all")], "any")
+        checker.update_job()
+        checker(1, [0.0], -1.0, 0.5, True)
+        opt_cal = VQEO.OptimizerCalibration("SPSA", 100, "fin_diff", termination_checker=checker)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fname = os.path.join(tmpdir, "opt_cal.yml")
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                opt_cal.to_yaml(fname)
+                opt_cal_new = VQEO.get_OptimizerCalibration_from_yaml(fname)
+
+        self.assertEqual(repr(opt_cal_new), repr(opt_cal))
+        # budgets and history buffers start from scratch
+        self.assertEqual(opt_cal_new.termination_checker.checkers[1].checkers[0].usage, 0)
+        self.assertEqual(opt_cal_new.termination_checker.checkers[1].checkers[1].values, [])
 
 class TestVQEOptimizer(unittest.TestCase):
     def setUp(self):
@@ -74,5 +120,107 @@ class TestVQEOptimizer(unittest.TestCase):
 
         self.assertRaises(ValueError, VQEO.VQEOptimizer, opt_cal)
 
-    # def test_get_gradient(self):
-    #     self.assertEqual(NotImplementedError, self.vqe_optimizer.get_gradient, None)
+    def test_get_gradient_optimizers(self):
+        for name in ["L_BFGS_B", "ADAM", "GradientDescent"]:
+            opt_cal = VQEO.OptimizerCalibration(name, 50, "param_shift")
+            vqe_optimizer = VQEO.VQEOptimizer(opt_cal)
+            self.assertEqual(vqe_optimizer.optimizer.__class__.__name__, name)
+
+        opt_cal = VQEO.OptimizerCalibration("L_BFGS_B", 50, "unknown")
+        self.assertRaises(ValueError, VQEO.VQEOptimizer, opt_cal)
+
+        opt_cal = VQEO.OptimizerCalibration("ADAM", 50, "param_shift", termination_checker=self.checker)
+        self.assertRaises(ValueError, VQEO.VQEOptimizer, opt_cal)
+
+    def test_spsa_optimizers(self):
+        vqe_optimizer = VQEO.VQEOptimizer(VQEO.OptimizerCalibration("2SPSA", 50, "fin_diff", optimizer_options={"regularization": 1.0}))
+        self.assertIsInstance(vqe_optimizer.optimizer, optimizers.SPSA)
+        self.assertTrue(vqe_optimizer.optimizer.second_order)
+        self.assertEqual(vqe_optimizer.optimizer.regularization, 1.0)
+        self.assertEqual(vqe_optimizer.optimizer._max_evals_grouped, VQEO.SPSA_MAX_EVALS_GROUPED)
+
+        vqe_optimizer = VQEO.VQEOptimizer(VQEO.OptimizerCalibration("QNSPSA", 50, "fin_diff"))
+        self.assertIsInstance(vqe_optimizer.optimizer, optimizers.QNSPSA)
+        self.assertIsNone(vqe_optimizer.optimizer.fidelity)
+
+        ansatz = VQEA.ESU2(2, reps=1)
+        est_cal = VQEE.EstimatorCalibration({"run_options": {"shots": None}}, "None", "None", "None", "terra", "statevector")
+        vqe_estimator = VQEE.VQEEstimator(est_cal)
+        vqe_optimizer.set_fidelity(ansatz.circuit, vqe_estimator.sampler)
+        fidelity = vqe_optimizer.optimizer.fidelity
+        x = np.linspace(0.0, 1.0, ansatz.circuit.num_parameters)
+        self.assertAlmostEqual(fidelity(x, x), 1.0)
+        # fidelity function (and its circuits) is reused for the same circuit and sampler
+        vqe_optimizer.set_fidelity(ansatz.circuit, vqe_estimator.sampler)
+        self.assertIs(vqe_optimizer.optimizer.fidelity, fidelity)
+
+        self.assertRaises(ValueError, VQEO.VQEOptimizer, VQEO.OptimizerCalibration("QNSPSA", 50, "param_shift"))
+        self.assertRaises(ValueError, VQEO.OptimizerCalibration, "QNSPSA", 50, "fin_diff", optimizer_options={"maxiter": 10})
+
+    def test_get_gradient(self):
+        estimator = Estimator()
+        self.assertIsNone(self.vqe_optimizer.get_gradient(estimator))
+
+        grad_classes = {"param_shift": ParamShiftEstimatorGradient, "fin_diff": FiniteDiffEstimatorGradient, "spsa": SPSAEstimatorGradient}
+        for grad_meth, grad_class in grad_classes.items():
+            vqe_optimizer = VQEO.VQEOptimizer(VQEO.OptimizerCalibration("L_BFGS_B", 50, grad_meth))
+            self.assertIsInstance(vqe_optimizer.get_gradient(estimator), grad_class)
+
+    def test_param_shift_gradient_single_job(self):
+        circ = QuantumCircuit(2)
+        circ.ry(Parameter("a"), 0)
+        circ.rx(Parameter("b"), 1)
+        circ.cx(0, 1)
+        observable = SparsePauliOp(["ZZ", "XI"])
+        estimator = Estimator()
+        vqe_optimizer = VQEO.VQEOptimizer(VQEO.OptimizerCalibration("ADAM", 50, "param_shift"))
+        gradient = vqe_optimizer.get_gradient(estimator)
+
+        num_jobs = []
+        run = estimator._run
+        def counting_run(*args, **kwargs):
+            num_jobs.append(1)
+            return run(*args, **kwargs)
+        estimator._run = counting_run
+
+        grad = gradient.run([circ], [observable], [[0.3, 0.7]]).result().gradients[0]
+        # all shifted parameter sets are evaluated in a single job
+        self.assertEqual(len(num_jobs), 1)
+        # the shifted parameter sets share one circuit, which the primitive processes only once
+        self.assertEqual(len(estimator._circuits), 1)
+
+        fin_diff = VQEO.VQEOptimizer(VQEO.OptimizerCalibration("ADAM", 50, "fin_diff", grad_epsilon=1e-6)).get_gradient(Estimator())
+        grad_fd = fin_diff.run([circ], [observable], [[0.3, 0.7]]).result().gradients[0]
+        np.testing.assert_allclose(grad, grad_fd, atol=1e-5)
+
+    def test_adjoint_gradient(self):
+        ansatz = VQEA.ESU2(3, reps=2)
+        target_model = VQETM.TransverseFieldIsingModel(3)
+        x = np.random.default_rng(3).random(ansatz.circuit.num_parameters)
+        vqe_optimizer = VQEO.VQEOptimizer(VQEO.OptimizerCalibration("L_BFGS_B", 50, "adjoint"))
+
+        for estimator in [Estimator(), AerEstimator(approximation=True, run_options={"shots": None})]:
+            gradient = vqe_optimizer.get_gradient(estimator)
+            self.assertIsInstance(gradient, ReverseEstimatorGradient)
+            grad = gradient.run([ansatz.circuit], [target_model.hamiltonian], [x]).result().gradients[0]
+            grad_ps = ParamShiftEstimatorGradient(Estimator()).run([ansatz.circuit], [target_model.hamiltonian], [x]).result().gradients[0]
+            np.testing.assert_allclose(grad, grad_ps, atol=1e-10)
+
+        self.assertRaises(ValueError, vqe_optimizer.get_gradient, Estimator(options={"shots": 100}))
+        self.assertRaises(ValueError, vqe_optimizer.get_gradient, AerEstimator(approximation=False, run_options={"shots": 100}))
+
+    def test_adjoint_gradient_noisy_estimator(self):
+        noise_model = NoiseModel()
+        noise_model.add_all_qubit_quantum_error(depolarizing_error(0.1, 1), ["ry", "rz"])
+        vqe_optimizer = VQEO.VQEOptimizer(VQEO.OptimizerCalibration("L_BFGS_B", 50, "adjoint"))
+
+        noisy_estimator = AerEstimator(backend_options={"noise_model": noise_model}, approximation=True, run_options={"shots": None})
+        self.assertFalse(VQEO.is_exact_estimator(noisy_estimator))
+        self.assertRaises(ValueError, vqe_optimizer.get_gradient, noisy_estimator)
+
+        est_opt = {"abelian_grouping": False, "transpilation_options": {"optimization_level": 0}, "backend_options": {"shots": 4000}, "run_options": {"shots": None}, "approximation": True, "skip_transpilation": False}
+        est_cal = VQEE.EstimatorCalibration(est_opt, "None", "None", "None", "aer", "aer_automatic")
+        estimator = VQEE.VQEEstimator(est_cal).estimator
+        self.assertTrue(VQEO.is_exact_estimator(estimator))
+        self.assertFalse(VQEO.is_exact_estimator(estimator, est_cal))
+        self.assertRaises(ValueError, vqe_optimizer.get_gradient, estimator, estimator_cal=est_cal)
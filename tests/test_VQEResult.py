@@ -6,7 +6,10 @@ import qiskit_vqe_framework.VQEAnsatz as VQEA
 import qiskit_vqe_framework.VQEOptimizer as VQEO
 import qiskit_vqe_framework.TerminationChecker as tc
 import qiskit_vqe_framework.VQEEstimator as VQEE
+import qiskit_vqe_framework.Calibration as Cal
 import copy
+import copyreg
+import pickle
 
 class TestVQEResultData(unittest.TestCase):
     def setUp(self):
@@ -168,3 +171,129 @@ class TestVQEResult(unittest.TestCase):
         self.assertEqual(data_vqe_result, data)
 
 
+
+    def test_to_dict_view(self):
+        result_dict = self.vqe_result.to_dict(deep_copy=False)
+        self.assertEqual(result_dict, self.vqe_result.to_dict())
+        # the view shares the values of the calibrations
+        self.assertIs(result_dict["OptimizerCalibration"]["param_map_init"], self.opt_cal.param_map_init)
+        self.assertIs(result_dict["EstimatorCalibration"]["estimator_options"], self.estimator_cal.estimator_options)
+        self.assertIsNot(self.vqe_result.to_dict()["EstimatorCalibration"]["estimator_options"], self.estimator_cal.estimator_options)
+        # but the calibrations themselves are not modified
+        self.assertEqual(self.opt_cal.to_dict()["name"], "OptimizerCalibration")
+
+    def test_inference_result_filevector(self):
+        infer_data = VQER.ResultData(-0.9, N0 = 1.0, angles = [0.1, 0.2, 0.3])
+        infer_result = VQER.InferenceResult(infer_data, [self.model_cal, self.estimator_cal], self.vqe_result, {})
+        self.assertEqual(infer_result.to_dict(deep_copy=False), infer_result.to_dict())
+
+        header, data = infer_result.get_filevector()
+        header_vqe, data_vqe = self.vqe_data.get_filevector()
+        num_cal_values = len(self.model_cal.get_filevector()[0]) + len(self.estimator_cal.get_filevector()[0])
+        # the angles of the vqe result are only contained once
+        self.assertEqual(header[num_cal_values:num_cal_values+9], [s+"_vqe" for s in header_vqe[:9]])
+        self.assertEqual(header[num_cal_values+9:], ["energy_infer", "N0_infer", "angles0_infer", "angles1_infer", "angles2_infer"])
+        self.assertEqual(data[num_cal_values:num_cal_values+9], data_vqe[:9])
+        self.assertTrue(hasattr(self.vqe_data, "angles"))
+
+class _LegacyResult:
+    # pickles like a result object of an older version with an instance dictionary
+    def __init__(self, result_type, state):
+        self.result_type = result_type
+        self.state = state
+
+    def __reduce__(self):
+        return (copyreg._reconstructor, (self.result_type, object, None), self.state)
+
+class TestLegacyResultPickle(unittest.TestCase):
+    def setUp(self):
+        self.model_cal = VQETM.ModelCalibration("transverse_field_Ising_model", num_spins=4, J=1.0, g=-0.5)
+        self.ref_result = VQER.ReferenceResult(VQER.ResultData(-2.0), [self.model_cal])
+
+    def test_metadata(self):
+        # results pickled before the metadata was added
+        data = VQER.ResultData(-1.0, angles=[0.1, 0.2])
+        vqe_result = pickle.loads(pickle.dumps(_LegacyResult(VQER.VQEResult, {"_data": data, "_calibration_list": [self.model_cal], "_reference": self.ref_result})))
+        self.assertIsNone(vqe_result.metadata)
+        self.assertEqual(vqe_result.to_dict(), VQER.VQEResult(data, [self.model_cal], reference_result=self.ref_result).to_dict())
+        self.assertEqual(repr(vqe_result), repr(VQER.VQEResult(data, [self.model_cal], reference_result=self.ref_result)))
+
+        inf_result = pickle.loads(pickle.dumps(_LegacyResult(VQER.InferenceResult, {"_data": VQER.ResultData(-0.9), "_calibration_list": [self.model_cal], "_vqe_reference": vqe_result})))
+        self.assertIsNone(inf_result.metadata)
+        self.assertEqual(inf_result.get_filevector(), VQER.InferenceResult(VQER.ResultData(-0.9), [self.model_cal], vqe_result, None).get_filevector())
+
+    def test_missing_slots(self):
+        # results pickled without the reference and the metadata
+        results = []
+        for i in range(3):
+            data = VQER.ResultData(-1.0 - 0.1*i, angles=[0.1*i, 0.2])
+            model_cal = VQETM.ModelCalibration("transverse_field_Ising_model", num_spins=4, J=1.0, g=-0.5)
+            results.append(pickle.loads(pickle.dumps(_LegacyResult(VQER.VQEResult, {"_data": data, "_calibration_list": [model_cal]}))))
+        ref_result = pickle.loads(pickle.dumps(_LegacyResult(VQER.ReferenceResult, {"_data": VQER.ResultData(-2.0), "_calibration_list": [self.model_cal]})))
+
+        for i, result in enumerate(results):
+            expected = VQER.VQEResult(VQER.ResultData(-1.0 - 0.1*i, angles=[0.1*i, 0.2]), [self.model_cal])
+            self.assertIsNone(result.metadata)
+            self.assertIsNone(result.reference)
+            self.assertEqual(repr(result), repr(expected))
+            self.assertEqual(result.to_dict(), expected.to_dict())
+            self.assertEqual(result.get_filevector(), expected.get_filevector())
+        self.assertEqual(ref_result.to_dict(), self.ref_result.to_dict())
+
+        registry = Cal.CalibrationRegistry()
+        VQER.intern_results(results + [ref_result], registry)
+        self.assertEqual(len(registry), 1)
+        self.assertIs(results[0].calibration_list[0], results[2].calibration_list[0])
+        self.assertIs(ref_result.calibration_list[0], results[0].calibration_list[0])
+
+class TestInternResults(unittest.TestCase):
+    def setUp(self):
+        self.registry = Cal.CalibrationRegistry()
+        self.ansatz_cal = VQEA.ESU2(4, reps=2).parameters
+        self.opt_cal = VQEO.OptimizerCalibration("SPSA", 100, "fin_diff")
+        self.est_cal = VQEE.EstimatorCalibration({"run_options": {"shots": None}}, "None", "None", "None", "terra", "statevector")
+
+    def get_results(self):
+        # results with separate copies of their calibrations, like results loaded from separate files
+        results = []
+        for i in range(6):
+            model_cal = VQETM.ModelCalibration("transverse_field_Ising_model", num_spins=4, J=1.0, g=-0.5*(i % 2))
+            ref_result = VQER.ReferenceResult(VQER.ResultData(-2.0 - i % 2), [model_cal])
+            vqe_result = VQER.VQEResult(VQER.ResultData(-1.0 - 0.1*i, angles=[0.1*i]), [model_cal, self.ansatz_cal, self.opt_cal, self.est_cal], reference_result=ref_result)
+            results.append(pickle.loads(pickle.dumps(vqe_result)))
+        return results
+
+    def test_intern_results(self):
+        results = self.get_results()
+        dicts = [result.to_dict() for result in results]
+        VQER.intern_results(results, self.registry)
+
+        # 2 model calibrations, ansatz, optimizer and estimator calibration
+        self.assertEqual(len(self.registry), 5)
+        for i, result in enumerate(results):
+            self.assertEqual(result.to_dict(), dicts[i])
+            self.assertIs(result.calibration_list[0], results[i % 2].calibration_list[0])
+            self.assertIs(result.calibration_list[3], results[0].calibration_list[3])
+            # identical references are shared
+            self.assertIs(result.reference, results[i % 2].reference)
+            self.assertIs(result.reference.calibration_list[0], result.calibration_list[0])
+        self.assertIs(self.registry.get(self.est_cal.get_fingerprint()), results[0].calibration_list[3])
+
+        # inference results share their vqe result
+        inf_results = [VQER.InferenceResult(VQER.ResultData(-1.0), [self.est_cal], pickle.loads(pickle.dumps(results[0])), {}) for _ in range(2)]
+        VQER.intern_results(inf_results, self.registry)
+        self.assertIs(inf_results[0].vqe_reference, inf_results[1].vqe_reference)
+        self.assertIs(inf_results[0].calibration_list[0], results[0].calibration_list[3])
+
+    def test_compact_results(self):
+        result = self.get_results()[1]
+        self.assertFalse(hasattr(result, "__dict__"))
+        self.assertEqual(copy.deepcopy(result).to_dict(), result.to_dict())
+
+        # results pickled with an instance dictionary
+        legacy_result = VQER.VQEResult.__new__(VQER.VQEResult)
+        legacy_result.__setstate__({"_data": result.data, "_calibration_list": result.calibration_list, "_reference": result.reference, "_metadata": None})
+        self.assertEqual(legacy_result.to_dict(), result.to_dict())
+        legacy_result = VQER.ReferenceResult.__new__(VQER.ReferenceResult)
+        legacy_result.__setstate__(({"_data": result.reference.data}, {"_calibration_list": result.reference.calibration_list}))
+        self.assertEqual(legacy_result.to_dict(), result.reference.to_dict())
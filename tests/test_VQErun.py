@@ -0,0 +1,802 @@
+import unittest
+import qiskit_vqe_framework
+import qiskit_vqe_framework.VQErun as VQErun
+import qiskit_vqe_framework.VQEResult as VQER
+import qiskit_vqe_framework.VQETargetModel as VQETM
+import qiskit_vqe_framework.VQEAnsatz as VQEA
+import qiskit_vqe_framework.VQEOptimizer as VQEO
+import qiskit_vqe_framework.VQEEstimator as VQEE
+import qiskit_vqe_framework.VQECheckpoint as VQECP
+import qiskit_vqe_framework.Calibration as Cal
+import qiskit_vqe_framework.TerminationChecker as TC
+import qiskit_vqe_framework.ResultStore as RS
+import qiskit_vqe_framework.Serialization as Serialization
+from qiskit.utils import algorithm_globals
+from qiskit.primitives import Estimator as TerraEstimator
+from qiskit.quantum_info import Statevector
+from qiskit_aer.noise import NoiseModel, depolarizing_error
+import numpy as np
+import time
+import os
+import tempfile
+import csv
+import io
+import contextlib
+
+class CountingEstimator(TerraEstimator):
+    """Local stand-in for a remote backend: every primitive job has a fixed latency and is counted."""
+    def __init__(self, latency: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.num_jobs = 0
+
+    def _run(self, circuits, observables, parameter_values, **run_options):
+        self.num_jobs += 1
+        time.sleep(self.latency)
+        return super()._run(circuits, observables, parameter_values, **run_options)
+
+class TestBulkInferenceRun(unittest.TestCase):
+    def setUp(self):
+        self.num_runs = 4
+        self.target_models = []
+        for g in np.linspace(-1.0, -0.25, self.num_runs):
+            target_model = VQETM.TransverseFieldIsingModel(2, J=1.0, g=g)
+            target_model.parameters.meas_aux_ops = True
+            self.target_models.append(target_model)
+
+        self.inf_ansatz = VQEA.ESU2(2, reps=1)
+        est_cal = VQEE.EstimatorCalibration({"run_options": {"shots": None}}, "None", "None", "None", "terra", "statevector")
+        self.inf_estimator = VQEE.VQEEstimator(est_cal)
+        self.inf_estimator._estimator = CountingEstimator(latency=0.05)
+
+        ansatz_cal = self.inf_ansatz.parameters
+        opt_cal = VQEO.OptimizerCalibration("SPSA", 10, "fin_diff")
+        rng = np.random.default_rng(42)
+        self.vqe_results = []
+        for target_model in self.target_models:
+            angles = list(rng.random(self.inf_ansatz.circuit.num_parameters)*2*np.pi)
+            vqe_data = VQER.ResultData(-1.0, opt_converged=True, angles=angles)
+            self.vqe_results.append(VQER.VQEResult(vqe_data, [target_model.parameters, ansatz_cal, opt_cal, est_cal]))
+
+    def test_bulk_inference_run(self):
+        estimator = self.inf_estimator.estimator
+
+        start = time.perf_counter()
+        single_results = [VQErun.inference_run(self.inf_estimator, tm, self.inf_ansatz, res) for tm, res in zip(self.target_models, self.vqe_results)]
+        single_time = time.perf_counter() - start
+        single_jobs = estimator.num_jobs
+
+        estimator.num_jobs = 0
+        start = time.perf_counter()
+        bulk_results = VQErun.bulk_inference_run(self.inf_estimator, self.target_models, self.inf_ansatz, self.vqe_results)
+        bulk_time = time.perf_counter() - start
+        bulk_jobs = estimator.num_jobs
+
+        self.assertEqual(single_jobs, 2*self.num_runs)
+        self.assertEqual(bulk_jobs, 1)
+        self.assertLess(bulk_time, single_time)
+
+        self.assertEqual(len(bulk_results), self.num_runs)
+        for single, bulk in zip(single_results, bulk_results):
+            self.assertAlmostEqual(single.data.energy, bulk.data.energy)
+            self.assertAlmostEqual(single.data.qtot, bulk.data.qtot)
+            self.assertEqual(single.data.angles, bulk.data.angles)
+            self.assertEqual(single.get_filevector()[0], bulk.get_filevector()[0])
+            self.assertEqual(set(single.metadata.keys()), set(bulk.metadata.keys()))
+
+    def test_bulk_inference_run_max_circuits_per_job(self):
+        estimator = self.inf_estimator.estimator
+        bulk_results = VQErun.bulk_inference_run(self.inf_estimator, self.target_models, self.inf_ansatz, self.vqe_results, max_circuits_per_job=3)
+
+        # 2 observables per run
+        self.assertEqual(estimator.num_jobs, int(np.ceil(2*self.num_runs/3)))
+        self.assertEqual(len(bulk_results), self.num_runs)
+
+        self.assertRaises(ValueError, VQErun.bulk_inference_run, self.inf_estimator, self.target_models[:-1], self.inf_ansatz, self.vqe_results)
+
+    def test_bulk_inference_run_ansatz_mismatch(self):
+        vqe_results = list(self.vqe_results)
+        vqe_results[2] = VQER.VQEResult(VQER.ResultData(-1.0, angles=[0.0, 0.0]), vqe_results[2].calibration_list)
+        with self.assertRaisesRegex(ValueError, "vqe result 2"):
+            VQErun.bulk_inference_run(self.inf_estimator, self.target_models, self.inf_ansatz, vqe_results)
+
+        other_ansatz = VQEA.ESU2(2, reps=2)
+        vqe_results[2] = VQER.VQEResult(self.vqe_results[2].data, [self.target_models[2].parameters, other_ansatz.parameters])
+        with self.assertRaisesRegex(ValueError, "vqe result 2"):
+            VQErun.bulk_inference_run(self.inf_estimator, self.target_models, self.inf_ansatz, vqe_results)
+        self.assertEqual(self.inf_estimator.estimator.num_jobs, 0)
+
+class TestRunVQE(unittest.TestCase):
+    def setUp(self):
+        self.target_model = VQETM.TransverseFieldIsingModel(2, J=1.0, g=-0.5)
+        self.vqe_ansatz = VQEA.ESU2(2, reps=1)
+        est_cal = VQEE.EstimatorCalibration({"run_options": {"shots": None}}, "None", "None", "None", "terra", "statevector")
+        self.vqe_estimator = VQEE.VQEEstimator(est_cal)
+        self.ref_result, self.ref_state = VQErun.run_exact_diagonalization(self.target_model)
+        self.param_init = list(np.random.default_rng(7).random(self.vqe_ansatz.circuit.num_parameters)*2*np.pi)
+
+    def test_run_vqe_gradient(self):
+        opt_cal = VQEO.OptimizerCalibration("L_BFGS_B", 100, "param_shift", param_map_init=self.param_init)
+        vqe_optimizer = VQEO.VQEOptimizer(opt_cal)
+
+        result, psi, iresults = VQErun.run_vqe(self.vqe_estimator, self.target_model, self.vqe_ansatz, vqe_optimizer, ref_result=self.ref_result, ref_state=self.ref_state)
+
+        self.assertAlmostEqual(result.data.energy, self.ref_result.data.energy, places=4)
+        self.assertAlmostEqual(result.data.overlap, 1.0, places=3)
+
+    def test_run_vqe_adjoint_gradient(self):
+        opt_cal = VQEO.OptimizerCalibration("L_BFGS_B", 100, "adjoint", param_map_init=self.param_init)
+        vqe_optimizer = VQEO.VQEOptimizer(opt_cal)
+
+        result, psi, iresults = VQErun.run_vqe(self.vqe_estimator, self.target_model, self.vqe_ansatz, vqe_optimizer, ref_result=self.ref_result, ref_state=self.ref_state)
+
+        self.assertAlmostEqual(result.data.energy, self.ref_result.data.energy, places=4)
+
+    def test_run_vqe_multistart(self):
+        opt_cal = VQEO.OptimizerCalibration("L_BFGS_B", 40, "param_shift", param_map_init=self.param_init)
+        vqe_optimizer = VQEO.VQEOptimizer(opt_cal)
+
+        result, psi, iresults = VQErun.run_vqe_multistart(self.vqe_estimator, self.target_model, self.vqe_ansatz, vqe_optimizer, 4, cull_fraction=0.5, cull_interval=2, max_workers=2, poll_interval=0.01, ref_result=self.ref_result, ref_state=self.ref_state)
+
+        multistart_dict = result.metadata["multistart"]
+        survivor = multistart_dict["survivor"]
+        # successive halving with more starts than workers: all starts but the survivor are culled at rungs
+        self.assertEqual([idx for idx, rung in enumerate(multistart_dict["culled_at"]) if rung is None], [survivor])
+        self.assertTrue(all(rung in [2, 4, 8, 16, 32, 64] for rung in multistart_dict["culled_at"] if rung is not None))
+        np.testing.assert_allclose(multistart_dict["param_inits"][0], self.param_init)
+        self.assertEqual(len(multistart_dict["energy_traces"]), 4)
+        for trace, num_calls in zip(multistart_dict["energy_traces"], multistart_dict["num_cost_fctn_calls"]):
+            self.assertEqual(len(trace), num_calls)
+
+        # counters and intermediate results belong to the survivor
+        self.assertEqual(result.data.tot_num_cost_fctn_calls, multistart_dict["num_cost_fctn_calls"][survivor])
+        self.assertEqual(multistart_dict["tot_num_cost_fctn_calls"], sum(multistart_dict["num_cost_fctn_calls"]))
+        self.assertEqual(iresults["energy_values"], multistart_dict["energy_traces"][survivor])
+        self.assertEqual(result.calibration_list[2], opt_cal)
+        self.assertAlmostEqual(result.data.energy, self.ref_result.data.energy, places=3)
+
+        # file schema does not depend on the number of starts
+        self.assertEqual(result.get_filevector()[0], VQER.VQEResult(result.data, result.calibration_list, reference_result=self.ref_result).get_filevector()[0])
+        self.assertIn("metadata", result.to_dict())
+
+        self.assertRaises(ValueError, VQErun.run_vqe_multistart, self.vqe_estimator, self.target_model, self.vqe_ansatz, vqe_optimizer, 4, cull_fraction=1.0)
+
+    def test_successive_halving(self):
+        # 4 starts on 2 workers: starts 2 and 3 are queued while the rung 2 is evaluated over the starts 0 and 1
+        halving = VQErun._SuccessiveHalving(4, 0.5, 2, 2)
+        traces = [[-1.0, -1.1], [-0.5, -0.6], [], []]
+        self.assertEqual(halving.update(traces, [False]*4), [(1, 2)])
+        self.assertEqual(halving.rung, 4)
+        # queued starts are compared with the survivor of the rung when they arrive
+        traces[2] = [-0.2]
+        self.assertEqual(halving.update(traces, [False, False, False, False]), [])
+        traces[2] = [-0.2, -0.3]
+        traces[3] = [-1.5, -1.6]
+        self.assertEqual(halving.update(traces, [False]*4), [(2, 2)])
+        self.assertEqual(halving.active, [0, 3])
+        # the next rung needs both remaining starts
+        traces[0] = [-1.0, -1.1, -1.2, -1.3]
+        self.assertEqual(halving.update(traces, [False]*4), [])
+        traces[3] = [-1.5, -1.6, -1.7, -1.8]
+        self.assertEqual(halving.update(traces, [False]*4), [(0, 4)])
+        self.assertEqual(halving.culled_at, [4, 2, 2, None])
+
+    def test_multistart_seed(self):
+        opt_cal = VQEO.OptimizerCalibration("SPSA", 5, "fin_diff")
+        param_inits = []
+        for _ in range(2):
+            algorithm_globals.random_seed = 17
+            result, _, _ = VQErun.run_vqe_multistart(self.vqe_estimator, self.target_model, self.vqe_ansatz, VQEO.VQEOptimizer(opt_cal), 2, cull_interval=1000, max_workers=2, poll_interval=0.01)
+            param_inits.append((result.metadata["multistart"]["param_inits"], result.metadata["multistart"]["seeds"]))
+        self.assertEqual(param_inits[0], param_inits[1])
+
+    def test_run_vqe_statistical_termination(self):
+        est_cal = VQEE.EstimatorCalibration({"run_options": {"shots": 1000, "seed": 3}}, "None", "None", "None", "terra", "statevector")
+        vqe_estimator = VQEE.VQEEstimator(est_cal)
+
+        opt_iterations = []
+        for term_checker in [TC.StatisticalTrendChecker(30, 0.05), TC.RelativeEnergyChecker(30, 20, 1e-3)]:
+            algorithm_globals.random_seed = 5
+            opt_cal = VQEO.OptimizerCalibration("SPSA", 500, "fin_diff", param_map_init=self.param_init, termination_checker=term_checker)
+            result, psi, iresults = VQErun.run_vqe(vqe_estimator, self.target_model, self.vqe_ansatz, VQEO.VQEOptimizer(opt_cal))
+            opt_iterations.append(result.data.opt_iterations)
+            if isinstance(term_checker, TC.StatisticalTrendChecker):
+                self.assertAlmostEqual(result.data.energy, self.ref_result.data.energy, delta=0.05)
+
+        # the shot noise keeps the relative energy change above epsilon
+        self.assertLess(opt_iterations[0], 200)
+        self.assertEqual(opt_iterations[1], 500)
+
+    def test_run_vqe_job_budget(self):
+        vqe_estimator = VQEE.VQEEstimator(VQEE.EstimatorCalibration({"run_options": {"shots": None}}, "None", "None", "None", "terra", "statevector"))
+        vqe_estimator._estimator = CountingEstimator()
+
+        term_checker = TC.CompositeChecker([TC.JobBudgetChecker(40), TC.ShotBudgetChecker(10)], "any")
+        opt_cal = VQEO.OptimizerCalibration("SPSA", 500, "fin_diff", param_map_init=self.param_init, termination_checker=term_checker)
+        vqe_optimizer = VQEO.VQEOptimizer(opt_cal)
+        result, psi, iresults = VQErun.run_vqe(vqe_estimator, self.target_model, self.vqe_ansatz, vqe_optimizer)
+
+        job_checker = term_checker.checkers[0]
+        # all estimator jobs are counted and the optimization stays within the budget
+        self.assertEqual(vqe_estimator.estimator.num_jobs, job_checker.usage)
+        self.assertLessEqual(job_checker._checked_usage, 40)
+        self.assertLess(result.data.opt_iterations, 500)
+        # the exact estimator does not use shots
+        self.assertEqual(term_checker.checkers[1].usage, 0)
+
+        # a second run with the same optimizer does not inherit the usage of the first one
+        vqe_estimator._estimator = CountingEstimator()
+        result_2, psi, iresults = VQErun.run_vqe(vqe_estimator, self.target_model, self.vqe_ansatz, vqe_optimizer)
+        self.assertEqual(vqe_estimator.estimator.num_jobs, job_checker.usage)
+        self.assertEqual(result_2.data.opt_iterations, result.data.opt_iterations)
+
+    def test_run_vqe_iresults_file(self):
+        est_cal = VQEE.EstimatorCalibration({"run_options": {"shots": 1000, "seed": 3}}, "None", "None", "None", "terra", "statevector")
+        vqe_estimator = VQEE.VQEEstimator(est_cal)
+        opt_cal = VQEO.OptimizerCalibration("SPSA", 20, "fin_diff", param_map_init=self.param_init)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fname = os.path.join(tmpdir, "iresults")
+            result, psi, iresults = VQErun.run_vqe(vqe_estimator, self.target_model, self.vqe_ansatz, VQEO.VQEOptimizer(opt_cal), save_iresults=True, iresults_file=fname, iresults_chunk_size=16)
+
+            reader = RS.IResultsReader(fname)
+            self.assertEqual(len(reader.get_chunks()), int(np.ceil(len(iresults["energy_values"])/16)))
+            streamed = reader.get_iresults_dict()
+            np.testing.assert_array_equal(streamed["num_cost_fctn_calls"], iresults["num_cost_fctn_calls"])
+            np.testing.assert_array_equal(streamed["energy_values"], iresults["energy_values"])
+            np.testing.assert_array_equal(streamed["circ_params"], np.array(iresults["circ_params"]))
+            np.testing.assert_array_equal(streamed["variance"], [meta["variance"] for meta in iresults["est_meta"]])
+            np.testing.assert_array_equal(streamed["shots"], 1000)
+
+class TestGetDataFromFile(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fname = os.path.join(self.tmpdir.name, "results.txt")
+        model_cal = VQETM.ModelCalibration("transverse_field_Ising_model", num_spins=4, J=1.0, g=-0.5)
+        self.results = []
+        for i in range(100):
+            data = VQER.ResultData(-1.0 - 0.01*i, opt_converged=(i % 2 == 0), tot_num_cost_fctn_calls=200+i, overlap=None, angles={"p[0]": 0.1*i})
+            self.results.append(VQER.VQEResult(data, [model_cal]))
+        self.header = self.results[0].get_filevector()[0]
+        with open(self.fname, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["#" + self.header[0]] + self.header[1:])
+            for result in self.results:
+                writer.writerow(result.get_filevector()[1])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_get_data_from_file(self):
+        header, data = VQErun.get_data_from_file(self.fname, 42, [0, 2, "energy", "opt_converged", "overlap", "angles", -3])
+
+        self.assertEqual(header, ["model_name", "J", "energy", "opt_converged", "overlap", "angles", "tot_num_cost_fctn_calls"])
+        self.assertEqual(data, ["transverse_field_Ising_model", 1.0, -1.42, True, None, str({"p[0]": 4.2}), 242])
+        # names with the comment character of the header and negative row indices
+        self.assertEqual(VQErun.get_data_from_file(self.fname, -1, ["#model_name", "tot_num_cost_fctn_calls"])[1], ["transverse_field_Ising_model", 299])
+
+        self.assertRaises(ValueError, VQErun.get_data_from_file, self.fname, 100, [0])
+        self.assertRaises(ValueError, VQErun.get_data_from_file, self.fname, 0, ["unknown"])
+        self.assertRaises(ValueError, VQErun.get_data_from_file, self.fname, 0, [len(self.header)])
+        self.assertRaises(ValueError, VQErun.get_data_from_file, os.path.join(self.tmpdir.name, "unknown.txt"), 0, [0])
+
+    def test_row_index(self):
+        offsets = VQErun.get_row_offsets(self.fname)
+        self.assertEqual(len(offsets), 102)
+        self.assertTrue(os.path.isfile(self.fname + ".idx.npy"))
+        with open(self.fname, "rb") as f:
+            lines = f.readlines()
+        np.testing.assert_array_equal(np.diff(offsets), [len(line) for line in lines])
+
+        # the persisted index is used as long as the file is not modified
+        index = np.load(self.fname + ".idx.npy")
+        index[-1] = 0
+        np.save(self.fname + ".idx.npy", index)
+        self.assertEqual(VQErun.get_row_offsets(self.fname)[-1], 0)
+
+        # appended rows
+        with open(self.fname, "a", newline="") as f:
+            csv.writer(f).writerow(self.results[7].get_filevector()[1])
+        os.utime(self.fname, ns=(time.time_ns(), time.time_ns() + 10**9))
+        self.assertEqual(len(VQErun.get_row_offsets(self.fname)), 103)
+        self.assertEqual(VQErun.get_data_from_file(self.fname, 100, ["energy"])[1], [-1.07])
+
+class TestIResultsExport(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(11)
+        self.iresults = {"num_cost_fctn_calls": list(range(1, 51)), "energy_values": list(rng.normal(size=50)), "circ_params": list(rng.random((50, 6))), "est_meta": [{}]*50}
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_get_iresults_filevector(self):
+        header, data = VQErun.get_iresults_filevector(self.iresults)
+        self.assertEqual(header, ["#num_cost_fctn_calls", "energy_values"] + ["circ_param{}".format(n) for n in range(6)])
+        self.assertEqual(data.shape, (50, 8))
+        for i in [0, 17, 49]:
+            self.assertEqual(list(data[i]), [self.iresults["num_cost_fctn_calls"][i], self.iresults["energy_values"][i]] + list(self.iresults["circ_params"][i]))
+
+        # streamed intermediate results have the same vector
+        streamed = {"num_cost_fctn_calls": np.array(self.iresults["num_cost_fctn_calls"]), "energy_values": np.array(self.iresults["energy_values"]), "circ_params": np.array(self.iresults["circ_params"])}
+        np.testing.assert_array_equal(VQErun.get_iresults_filevector(streamed)[1], data)
+        self.assertEqual(VQErun.get_iresults_filevector({"num_cost_fctn_calls": [], "energy_values": [], "circ_params": []})[1].shape, (0, 2))
+
+    def test_write_iresults(self):
+        header, data = VQErun.get_iresults_filevector(self.iresults)
+        fname = os.path.join(self.tmpdir.name, "iresults.npy")
+        self.assertEqual(VQErun.write_iresults_to_npy(fname, self.iresults), header)
+        np.testing.assert_array_equal(np.load(fname), data)
+
+        fname = os.path.join(self.tmpdir.name, "iresults.csv")
+        VQErun.write_iresults_to_csv(fname, self.iresults)
+        with open(fname, "r") as f:
+            self.assertEqual(f.readline().strip(), ",".join(header))
+        # exact round trip of the floats
+        np.testing.assert_array_equal(np.loadtxt(fname, delimiter=",", skiprows=1), data)
+        self.assertEqual(VQErun.get_data_from_file(fname, 3, ["#num_cost_fctn_calls", "energy_values"])[1], [4, self.iresults["energy_values"][3]])
+        self.assertEqual([name for name in os.listdir(self.tmpdir.name) if name.endswith(".tmp")], [])
+
+class TestStatevectorFile(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.num_qubits = 6
+        rng = np.random.default_rng(7)
+        state = rng.normal(size=2**self.num_qubits) + 1j*rng.normal(size=2**self.num_qubits)
+        self.state = Statevector(state/np.linalg.norm(state))
+        self.fname_txt = os.path.join(self.tmpdir.name, "state.txt")
+        np.savetxt(self.fname_txt, np.column_stack([self.state.data.real, self.state.data.imag]), delimiter="\t", header="real\timag")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_text_file(self):
+        state = VQErun.get_statevector_from_file(self.fname_txt, self.num_qubits)
+        np.testing.assert_allclose(state.data, self.state.data)
+        state = VQErun.get_statevector_from_file(self.fname_txt, self.num_qubits, rev_qargs=True)
+        np.testing.assert_allclose(state.data, self.state.reverse_qargs().data)
+        self.assertRaises(ValueError, VQErun.get_statevector_from_file, self.fname_txt, self.num_qubits-1)
+        self.assertRaises(ValueError, VQErun.get_statevector_from_file, os.path.join(self.tmpdir.name, "unknown.txt"), self.num_qubits)
+
+    def test_binary_file(self):
+        fname = os.path.join(self.tmpdir.name, "state.bin")
+        VQErun.convert_statevector_file(self.fname_txt, fname, self.num_qubits, chunk_size=10)
+        state, header = VQErun.get_statevector_memmap(fname)
+        self.assertIsInstance(state, np.memmap)
+        self.assertEqual(header, {"num_qubits": self.num_qubits, "dtype": "complex128", "rev_qargs": False})
+        np.testing.assert_allclose(state, self.state.data)
+        # the Statevector wraps the memory-mapped file
+        psi = VQErun.get_statevector_from_file(fname, self.num_qubits)
+        self.assertIsInstance(psi.data.base, np.memmap)
+        self.assertRaises(ValueError, VQErun.get_statevector_from_file, fname, self.num_qubits+1)
+        self.assertRaises(ValueError, VQErun.get_statevector_from_file, self.fname_txt[:-4], self.num_qubits)
+
+        # reversed qubit labeling is resolved during the conversion
+        VQErun.convert_statevector_file(self.fname_txt, fname, self.num_qubits, rev_qargs=True, chunk_size=7)
+        np.testing.assert_allclose(VQErun.get_statevector_from_file(fname, self.num_qubits).data, self.state.reverse_qargs().data)
+
+        # reversed qubit ordering recorded in the header
+        VQErun.write_statevector_to_file(fname, self.state.reverse_qargs(), dtype="complex64", rev_qargs=True)
+        state, header = VQErun.get_statevector_memmap(fname)
+        self.assertEqual(state.dtype, np.complex64)
+        self.assertTrue(header["rev_qargs"])
+        np.testing.assert_allclose(VQErun.get_statevector_from_file(fname, self.num_qubits).data, self.state.data, atol=1e-6)
+        self.assertEqual([name for name in os.listdir(self.tmpdir.name) if name.endswith(".tmp")], [])
+
+    def test_overlap(self):
+        fname = os.path.join(self.tmpdir.name, "state.bin")
+        VQErun.write_statevector_to_file(fname, self.state)
+        state, _ = VQErun.get_statevector_memmap(fname)
+        other = Statevector.from_label("+"*self.num_qubits)
+        expected = np.abs(other.inner(self.state))
+        self.assertAlmostEqual(VQErun.get_overlap(other, self.state), expected)
+        for chunk_size in [1, 5, 64, 100]:
+            self.assertAlmostEqual(VQErun.get_overlap(other, state, chunk_size=chunk_size), expected)
+        self.assertAlmostEqual(VQErun.get_overlap(state, state, chunk_size=8), 1.0)
+        self.assertRaises(ValueError, VQErun.get_overlap, other, state, chunk_size=0)
+        self.assertRaises(ValueError, VQErun.get_overlap, Statevector.from_label("0"), state)
+
+class TestBulkCalibrationLoading(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        est_cal = VQEE.EstimatorCalibration({"run_options": {"shots": None}}, "None", "None", "None", "terra", "statevector")
+        ansatz_cal = VQEA.AnsatzCalibration(4, 1, "ESU2")
+        opt_cal = VQEO.OptimizerCalibration("SPSA", 100, "fin_diff", param_map_init=[0.1]*16, termination_checker=TC.RelativeEnergyChecker(10, 5, 0.01))
+        self.fname_list = []
+        for i in range(6):
+            model_cal = VQETM.ModelCalibration("transverse_field_Ising_model", num_spins=4, J=1.0, g=-0.1*i)
+            fnames = []
+            for calibration, name in zip([ansatz_cal, est_cal, opt_cal, model_cal], ["ansatz", "estimator", "optimizer", "model{}".format(i)]):
+                fname = os.path.join(self.tmpdir.name, name + ".yaml")
+                if not os.path.isfile(fname):
+                    calibration.to_yaml(fname)
+                fnames.append(fname)
+            self.fname_list.append(tuple(fnames))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def assert_cals_equal(self, vqe_cals):
+        self.assertEqual(len(vqe_cals), len(self.fname_list))
+        for cals, fnames in zip(vqe_cals, self.fname_list):
+            for calibration, calibration_ref in zip(cals, VQErun.get_vqe_cal_from_file(*fnames)):
+                self.assertEqual(repr(calibration), repr(calibration_ref))
+
+    def test_get_vqe_cals_from_files(self):
+        vqe_cals = VQErun.get_vqe_cals_from_files(self.fname_list)
+        self.assert_cals_equal(vqe_cals)
+        # repeated files give separate objects
+        self.assertIsNot(vqe_cals[0][0], vqe_cals[1][0])
+        # parsing on a process pool
+        self.assert_cals_equal(VQErun.get_vqe_cals_from_files(self.fname_list, max_workers=2, min_files_per_worker=1))
+
+        self.assertRaises(ValueError, VQErun.get_vqe_cals_from_files, [self.fname_list[0][::-1]])
+        self.assertRaises(ValueError, VQErun.get_vqe_cals_from_files, [self.fname_list[0][:3]])
+        self.assertRaises(ValueError, VQErun.get_calibrations_from_yaml, [os.path.join(self.tmpdir.name, "unknown.yaml")])
+
+    def test_cache(self):
+        cache_file = os.path.join(self.tmpdir.name, "cache.pickle")
+        self.assert_cals_equal(VQErun.get_vqe_cals_from_files(self.fname_list, cache_file=cache_file))
+        cache = VQErun._load_yaml_cache(cache_file)
+        self.assertEqual(len(cache), 9)
+
+        # cached files are not read again
+        fname = self.fname_list[0][3]
+        cache[os.path.abspath(fname)][2]["J"] = 2.0
+        Serialization.to_pickle(cache, cache_file)
+        self.assertEqual(VQErun.get_calibrations_from_yaml([fname], cache_file=cache_file)[0].J, 2.0)
+
+        # modified files are parsed again
+        os.remove(fname)
+        VQETM.ModelCalibration("transverse_field_Ising_model", num_spins=4, J=3.0, g=0.0).to_yaml(fname)
+        os.utime(fname, ns=(0, 1))
+        self.assertEqual(VQErun.get_calibrations_from_yaml([fname], cache_file=cache_file)[0].J, 3.0)
+        self.assertEqual(VQErun._load_yaml_cache(cache_file)[os.path.abspath(fname)][2]["J"], 3.0)
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.target_model = VQETM.TransverseFieldIsingModel(2, J=1.0, g=-0.5)
+        self.vqe_ansatz = VQEA.ESU2(2, reps=1)
+        est_cal = VQEE.EstimatorCalibration({"run_options": {"shots": None}}, "None", "None", "None", "terra", "statevector")
+        self.vqe_estimator = VQEE.VQEEstimator(est_cal)
+        self.param_init = list(np.random.default_rng(7).random(self.vqe_ansatz.circuit.num_parameters)*2*np.pi)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.fname = os.path.join(self.tmp_dir.name, "checkpoint.pickle")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def get_optimizer(self):
+        opt_cal = VQEO.OptimizerCalibration("SPSA", 20, "fin_diff", param_map_init=self.param_init, termination_checker=TC.LinearFitChecker(5, 1e-12))
+        return VQEO.VQEOptimizer(opt_cal)
+
+    def test_checkpoint_resume(self):
+        algorithm_globals.random_seed = 11
+        full_result, full_psi, full_iresults = VQErun.run_vqe(self.vqe_estimator, self.target_model, self.vqe_ansatz, self.get_optimizer(), save_iresults=True, checkpoint_file=self.fname, checkpoint_interval=5)
+        checkpoint = VQECP.get_VQECheckpoint_from_file(self.fname)
+        self.assertEqual(checkpoint.iteration, 20)
+        self.assertTrue(checkpoint.finished)
+        self.assertFalse(os.path.isfile(self.fname + ".tmp"))
+        num_evals = len(full_iresults["energy_values"])
+
+        # interrupt the same run after the checkpoint of iteration 10
+        def interrupt(eval_count, params, mean, meta):
+            if eval_count == num_evals - 10:
+                raise RuntimeError("interrupted")
+
+        algorithm_globals.random_seed = 11
+        with self.assertRaisesRegex(RuntimeError, "interrupted"):
+            VQErun.run_vqe(self.vqe_estimator, self.target_model, self.vqe_ansatz, self.get_optimizer(), callback=interrupt, checkpoint_file=self.fname, checkpoint_interval=5)
+        checkpoint = VQECP.get_VQECheckpoint_from_file(self.fname)
+        self.assertEqual(checkpoint.iteration, 15)
+        self.assertEqual(len(checkpoint.termination_checker.values), 5)
+
+        # the rng is at a different state, it is restored from the checkpoint
+        algorithm_globals.random_seed = 12
+        result, psi, iresults = VQErun.resume_vqe(self.fname, self.vqe_estimator, self.target_model, self.vqe_ansatz, self.get_optimizer(), save_iresults=True)
+
+        self.assertEqual(result.data.energy, full_result.data.energy)
+        self.assertEqual(result.data.opt_iterations, full_result.data.opt_iterations)
+        self.assertEqual(result.data.tot_num_cost_fctn_calls, full_result.data.tot_num_cost_fctn_calls)
+        self.assertEqual(result.calibration_list[2].maxiter, 20)
+        self.assertEqual(result.calibration_list[2].param_map_init, self.param_init)
+        self.assertEqual(iresults["num_cost_fctn_calls"], full_iresults["num_cost_fctn_calls"])
+        np.testing.assert_array_equal(iresults["energy_values"], full_iresults["energy_values"])
+
+        self.assertRaises(ValueError, VQErun.resume_vqe, self.fname, self.vqe_estimator, self.target_model, self.vqe_ansatz, self.get_optimizer())
+
+    def test_checkpoint_cost_fctn_calls(self):
+        # checkpointing does not add cost function evaluations
+        algorithm_globals.random_seed = 11
+        result, _, _ = VQErun.run_vqe(self.vqe_estimator, self.target_model, self.vqe_ansatz, self.get_optimizer())
+        algorithm_globals.random_seed = 11
+        cp_result, _, _ = VQErun.run_vqe(self.vqe_estimator, self.target_model, self.vqe_ansatz, self.get_optimizer(), checkpoint_file=self.fname)
+        self.assertEqual(cp_result.data.tot_num_cost_fctn_calls, result.data.tot_num_cost_fctn_calls)
+        self.assertEqual(cp_result.data.energy, result.data.energy)
+        self.assertEqual(VQECP.get_VQECheckpoint_from_file(self.fname).opt_nfev, result.data.tot_num_cost_fctn_calls)
+
+    def test_checkpoint_errors(self):
+        opt_cal = VQEO.OptimizerCalibration("L_BFGS_B", 20, "param_shift", param_map_init=self.param_init)
+        self.assertRaises(ValueError, VQErun.run_vqe, self.vqe_estimator, self.target_model, self.vqe_ansatz, VQEO.VQEOptimizer(opt_cal), checkpoint_file=self.fname)
+        self.assertRaises(ValueError, VQECP.VQECheckpointer, self.fname, 0)
+        opt_cal = VQEO.OptimizerCalibration("SPSA", 20, "fin_diff", param_map_init=self.param_init, optimizer_options={"blocking": True})
+        self.assertRaises(ValueError, VQErun.run_vqe, self.vqe_estimator, self.target_model, self.vqe_ansatz, VQEO.VQEOptimizer(opt_cal), checkpoint_file=self.fname)
+
+        algorithm_globals.random_seed = 11
+        def interrupt(eval_count, params, mean, meta):
+            if eval_count == 60:
+                raise RuntimeError("interrupted")
+        self.assertRaises(RuntimeError, VQErun.run_vqe, self.vqe_estimator, self.target_model, self.vqe_ansatz, self.get_optimizer(), callback=interrupt, checkpoint_file=self.fname)
+
+        other_model = VQETM.TransverseFieldIsingModel(2, J=1.0, g=-0.75)
+        self.assertRaises(ValueError, VQErun.resume_vqe, self.fname, self.vqe_estimator, other_model, self.vqe_ansatz, self.get_optimizer())
+
+class TestSPSACalibrationCache(unittest.TestCase):
+    def setUp(self):
+        self.target_model = VQETM.TransverseFieldIsingModel(2, J=1.0, g=-0.5)
+        self.vqe_ansatz = VQEA.ESU2(2, reps=1)
+        est_cal = VQEE.EstimatorCalibration({"run_options": {"shots": None}}, "None", "None", "None", "terra", "statevector")
+        self.vqe_estimator = VQEE.VQEEstimator(est_cal)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.fname = os.path.join(self.tmp_dir.name, "spsa_cal_cache.yml")
+        opt_cal = VQEO.OptimizerCalibration("SPSA", 10, "fin_diff")
+        self.vqe_optimizer = VQEO.VQEOptimizer(opt_cal)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_spsa_calibration_cache(self):
+        cache = VQEO.SPSACalibrationCache(self.fname)
+        _, _, iresults = VQErun.run_vqe(self.vqe_estimator, self.target_model, self.vqe_ansatz, self.vqe_optimizer, save_iresults=True, spsa_cal_cache=cache)
+        num_evals = len(iresults["energy_values"])
+        self.assertEqual(len(cache.entries), 1)
+        key = Cal.get_fingerprint([self.target_model.parameters, self.vqe_ansatz.parameters, self.vqe_estimator.parameters])
+        self.assertIn(key, cache)
+        # the given optimizer is not modified
+        self.assertIsNone(self.vqe_optimizer.optimizer.learning_rate)
+
+        # reloaded cache skips the 50 calibration evaluations
+        cache = VQEO.SPSACalibrationCache(self.fname)
+        self.assertEqual(cache.get(key)["c"], 0.2)
+        _, _, iresults = VQErun.run_vqe(self.vqe_estimator, self.target_model, self.vqe_ansatz, self.vqe_optimizer, save_iresults=True, spsa_cal_cache=cache)
+        self.assertEqual(len(iresults["energy_values"]), num_evals - 50)
+
+        # different problem is calibrated again
+        other_model = VQETM.TransverseFieldIsingModel(2, J=1.0, g=-0.75)
+        _, _, iresults = VQErun.run_vqe(self.vqe_estimator, other_model, self.vqe_ansatz, self.vqe_optimizer, save_iresults=True, spsa_cal_cache=cache)
+        self.assertEqual(len(iresults["energy_values"]), num_evals)
+        self.assertEqual(len(cache.entries), 2)
+
+    def test_fingerprint(self):
+        key = Cal.get_fingerprint([self.target_model.parameters, self.vqe_ansatz.parameters])
+        self.assertEqual(key, Cal.get_fingerprint([VQETM.TransverseFieldIsingModel(2, J=1.0, g=-0.5).parameters, VQEA.ESU2(2, reps=1).parameters]))
+        self.assertNotEqual(key, Cal.get_fingerprint([self.target_model.parameters, VQEA.ESU2(2, reps=2).parameters]))
+        self.assertEqual(self.vqe_ansatz.parameters.get_fingerprint(), Cal.get_fingerprint([self.vqe_ansatz.parameters]))
+
+    def test_canonical_fingerprint(self):
+        # dictionary order, numpy scalars and -0.0 do not change the fingerprint
+        est_cal = VQEE.EstimatorCalibration({"run_options": {"shots": 1000, "seed": 3}}, "None", "None", "None", "terra", "statevector")
+        est_opt_numpy = {"run_options": {"seed": np.int64(3), "shots": np.int64(1000)}}
+        self.assertEqual(est_cal.get_fingerprint(), VQEE.EstimatorCalibration(est_opt_numpy, "None", "None", "None", "terra", "statevector").get_fingerprint())
+        self.assertEqual(Cal.get_canonical_data({"x": -0.0, "y": np.array([1.5, 2.0])}), {"x": 0.0, "y": [1.5, 2.0]})
+        self.assertNotEqual(Cal.get_fingerprint([est_cal]), Cal.get_fingerprint([est_cal], {"reference": None}))
+
+        # noise models are compared by their content
+        noise_models = []
+        for _ in range(2):
+            noise_model = NoiseModel()
+            noise_model.add_all_qubit_quantum_error(depolarizing_error(0.01, 1), ["ry", "rz"])
+            noise_models.append(noise_model)
+        def get_aer_fingerprint(noise_model):
+            est_opt = {"abelian_grouping": False, "transpilation_options": {"optimization_level": 0}, "backend_options": {"method": "automatic", "noise_model": noise_model}, "run_options": {"shots": 1024}, "approximation": False, "skip_transpilation": False}
+            return VQEE.EstimatorCalibration(est_opt, "None", "None", "None", "aer", "aer_automatic").get_fingerprint()
+        self.assertEqual(get_aer_fingerprint(noise_models[0]), get_aer_fingerprint(noise_models[1]))
+        noise_models[1].add_all_qubit_quantum_error(depolarizing_error(0.02, 2), ["cx"])
+        self.assertNotEqual(get_aer_fingerprint(noise_models[0]), get_aer_fingerprint(noise_models[1]))
+
+        # the history of a termination checker is not part of the fingerprint
+        term_checker = TC.RelativeEnergyChecker(30, 20, 1e-3)
+        opt_cal = VQEO.OptimizerCalibration("SPSA", 500, "fin_diff", termination_checker=term_checker)
+        key = opt_cal.get_fingerprint()
+        for i in range(5):
+            term_checker(i, np.zeros(2), -1.0 - 0.1*i, 0.1, True)
+        self.assertEqual(key, opt_cal.get_fingerprint())
+        self.assertNotEqual(key, VQEO.OptimizerCalibration("SPSA", 500, "fin_diff", termination_checker=TC.RelativeEnergyChecker(30, 20, 1e-4)).get_fingerprint())
+
+def get_tfim_model(g=-0.5):
+    target_model = VQETM.TransverseFieldIsingModel(2, J=1.0, g=g)
+    target_model.parameters.meas_aux_ops = False
+    return target_model
+
+class TestRunRegistry(unittest.TestCase):
+    def setUp(self):
+        self.target_model = get_tfim_model()
+        self.vqe_ansatz = VQEA.ESU2(2, reps=1)
+        est_cal = VQEE.EstimatorCalibration({"run_options": {"shots": None}}, "None", "None", "None", "terra", "statevector")
+        self.vqe_estimator = VQEE.VQEEstimator(est_cal)
+        self.vqe_estimator._estimator = CountingEstimator()
+        param_init = list(np.random.default_rng(7).random(self.vqe_ansatz.circuit.num_parameters)*2*np.pi)
+        self.vqe_optimizer = VQEO.VQEOptimizer(VQEO.OptimizerCalibration("SPSA", 20, "fin_diff", param_map_init=param_init))
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.registry = RS.RunRegistry(os.path.join(self.tmp_dir.name, "runs"))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_run_deduplication(self):
+        ref_result, ref_state = VQErun.run_exact_diagonalization(self.target_model, run_registry=self.registry)
+        ref_result_2, ref_state_2 = VQErun.run_exact_diagonalization(get_tfim_model(), run_registry=self.registry)
+        self.assertEqual(ref_result_2.to_dict(), ref_result.to_dict())
+        self.assertEqual(ref_state_2, ref_state)
+        self.assertEqual(len(self.registry), 1)
+
+        result, psi, iresults = VQErun.run_vqe(self.vqe_estimator, self.target_model, self.vqe_ansatz, self.vqe_optimizer, ref_result=ref_result, ref_state=ref_state, save_iresults=True, run_registry=self.registry)
+        num_jobs = self.vqe_estimator.estimator.num_jobs
+        self.assertGreater(num_jobs, 0)
+
+        # the same run is taken from the registry without any estimator job
+        result_2, psi_2, iresults_2 = VQErun.run_vqe(self.vqe_estimator, self.target_model, self.vqe_ansatz, self.vqe_optimizer, ref_result=ref_result_2, ref_state=ref_state_2, save_iresults=True, run_registry=self.registry)
+        self.assertEqual(self.vqe_estimator.estimator.num_jobs, num_jobs)
+        self.assertEqual(result_2.to_dict(), result.to_dict())
+        self.assertEqual(psi_2, psi)
+        self.assertEqual(iresults_2["energy_values"], iresults["energy_values"])
+        self.assertEqual(len(self.registry), 2)
+
+        # a run with other inputs is executed
+        VQErun.run_vqe(self.vqe_estimator, self.target_model, self.vqe_ansatz, self.vqe_optimizer, ref_result=ref_result, ref_state=ref_state, run_registry=self.registry)
+        self.assertGreater(self.vqe_estimator.estimator.num_jobs, num_jobs)
+        self.assertEqual(len(self.registry), 3)
+
+        inf_result = VQErun.inference_run(self.vqe_estimator, self.target_model, self.vqe_ansatz, result, run_registry=self.registry)
+        num_jobs = self.vqe_estimator.estimator.num_jobs
+        inf_result_2 = VQErun.inference_run(self.vqe_estimator, self.target_model, self.vqe_ansatz, result_2, run_registry=self.registry)
+        self.assertEqual(self.vqe_estimator.estimator.num_jobs, num_jobs)
+        self.assertEqual(inf_result_2.to_dict(), inf_result.to_dict())
+        self.assertEqual(sorted(key.split("_")[0] for key in self.registry.keys()), ["ed", "inference", "vqe", "vqe"])
+
+class TestRunVQESweep(unittest.TestCase):
+    def setUp(self):
+        self.target_model = VQETM.TransverseFieldIsingModel(2, J=1.0, g=-0.5)
+        self.vqe_ansatz = VQEA.ESU2(2, reps=1)
+        est_cal = VQEE.EstimatorCalibration({"run_options": {"shots": None}}, "None", "None", "None", "terra", "statevector")
+        self.vqe_estimator = VQEE.VQEEstimator(est_cal)
+        self.param_init = list(np.random.default_rng(7).random(self.vqe_ansatz.circuit.num_parameters)*2*np.pi)
+        self.model_cal_list = [VQETM.TransverseFieldIsingModel(2, J=1.0, g=g).parameters for g in [-0.5, -0.55, -0.6, -0.65]]
+
+    def test_run_vqe_sweep(self):
+        opt_cal = VQEO.OptimizerCalibration("L_BFGS_B", 100, "param_shift", param_map_init=self.param_init)
+        vqe_optimizer = VQEO.VQEOptimizer(opt_cal)
+
+        results, states, iresults_list = VQErun.run_vqe_sweep(self.vqe_estimator, self.target_model, self.vqe_ansatz, vqe_optimizer, self.model_cal_list, run_ed=True)
+
+        self.assertEqual(len(results), len(self.model_cal_list))
+        self.assertEqual(self.target_model.parameters, self.model_cal_list[-1])
+        # the given optimizer calibration is not modified
+        self.assertEqual(opt_cal.param_map_init, self.param_init)
+        self.assertEqual(results[0].calibration_list[2].param_map_init, self.param_init)
+        for prev, curr, model_cal in zip(results[:-1], results[1:], self.model_cal_list[1:]):
+            self.assertEqual(curr.calibration_list[0], model_cal)
+            self.assertEqual(curr.calibration_list[2].param_map_init, list(prev.data.angles.values()))
+        for result in results:
+            self.assertAlmostEqual(result.data.energy, result.reference.data.energy, places=4)
+
+        # the ansatz circuit and the gradient circuit are cached once by the shared estimator
+        self.assertEqual(len(self.vqe_estimator.estimator._circuits), 2)
+
+        # warm starts need fewer cost function calls than cold starts from the same initial point
+        warm_calls = sum(result.data.tot_num_cost_fctn_calls for result in results[1:])
+        cold_calls = 0
+        for model_cal in self.model_cal_list[1:]:
+            result, _, _ = VQErun.run_vqe(self.vqe_estimator, VQETM.TransverseFieldIsingModel(2, J=1.0, g=model_cal.g), self.vqe_ansatz, vqe_optimizer)
+            cold_calls += result.data.tot_num_cost_fctn_calls
+        self.assertLess(warm_calls, cold_calls)
+
+    def test_run_vqe_sweep_print_status(self):
+        # without exact diagonalization there is no reference result to print
+        opt_cal = VQEO.OptimizerCalibration("L_BFGS_B", 100, "param_shift", param_map_init=self.param_init)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            results, _, _ = VQErun.run_vqe_sweep(self.vqe_estimator, self.target_model, self.vqe_ansatz, VQEO.VQEOptimizer(opt_cal), self.model_cal_list[:2], print_status=True)
+        self.assertEqual(len(results), 2)
+        self.assertIsNone(results[0].reference)
+        self.assertIn("optimization finished:", out.getvalue())
+        self.assertNotIn("_ref = ", out.getvalue())
+
+class TestRunVQELayerwise(unittest.TestCase):
+    def setUp(self):
+        self.target_model = VQETM.TransverseFieldIsingModel(3, J=1.0, g=-0.5)
+        self.vqe_ansatz = VQEA.ESU2(3, reps=3)
+        est_cal = VQEE.EstimatorCalibration({"run_options": {"shots": None}}, "None", "None", "None", "terra", "statevector")
+        self.vqe_estimator = VQEE.VQEEstimator(est_cal)
+        self.ref_result, self.ref_state = VQErun.run_exact_diagonalization(self.target_model)
+        self.param_init = list(np.random.default_rng(7).random(VQEA.ESU2(3, reps=1).circuit.num_parameters)*2*np.pi)
+
+    def get_energy(self, angles):
+        circ = self.vqe_ansatz.circuit
+        return self.vqe_estimator.estimator.run(circ, self.target_model.hamiltonian, list(angles)).result().values[0]
+
+    def test_run_vqe_layerwise(self):
+        opt_cal = VQEO.OptimizerCalibration("L_BFGS_B", 200, "param_shift", param_map_init=self.param_init)
+        result, psi, iresults_list = VQErun.run_vqe_layerwise(self.vqe_estimator, self.target_model, self.vqe_ansatz, VQEO.VQEOptimizer(opt_cal), ref_result=self.ref_result, ref_state=self.ref_state, save_iresults=True)
+
+        layerwise_dict = result.metadata["layerwise"]
+        self.assertEqual(layerwise_dict["num_layers"], [1, 2, 3])
+        self.assertEqual(layerwise_dict["num_trainable_parameters"], [12, 18, 24])
+        self.assertEqual(len(iresults_list), 3)
+        self.assertEqual(result.calibration_list[1].num_layers, 3)
+        self.assertEqual(result.data.tot_num_cost_fctn_calls, sum(layerwise_dict["num_cost_fctn_calls"]))
+        self.assertEqual(len(result.data.angles), self.vqe_ansatz.circuit.num_parameters)
+        self.assertAlmostEqual(self.get_energy(result.data.angles.values()), result.data.energy)
+        self.assertAlmostEqual(result.data.energy, self.ref_result.data.energy, places=3)
+
+    def test_run_vqe_layerwise_frozen(self):
+        opt_cal = VQEO.OptimizerCalibration("L_BFGS_B", 200, "param_shift", param_map_init=self.param_init)
+        result, psi, iresults_list = VQErun.run_vqe_layerwise(self.vqe_estimator, self.target_model, self.vqe_ansatz, VQEO.VQEOptimizer(opt_cal), num_trainable_layers=1, save_iresults=True)
+
+        layerwise_dict = result.metadata["layerwise"]
+        self.assertEqual(layerwise_dict["num_trainable_parameters"], [12, 6, 6])
+        self.assertEqual(len(iresults_list[1]["circ_params"][0]), 6)
+        self.assertEqual(len(result.data.angles), self.vqe_ansatz.circuit.num_parameters)
+        self.assertAlmostEqual(self.get_energy(result.data.angles.values()), result.data.energy)
+
+        self.assertRaises(ValueError, VQErun.run_vqe_layerwise, self.vqe_estimator, self.target_model, self.vqe_ansatz, VQEO.VQEOptimizer(opt_cal), num_trainable_layers=0)
+
+    def test_run_vqe_layerwise_identity_layer(self):
+        # the prepended layer does not change the state, every stage starts at the energy of the previous one
+        opt_cal = VQEO.OptimizerCalibration("L_BFGS_B", 200, "param_shift", param_map_init=self.param_init)
+        for num_trainable_layers in [None, 1]:
+            result, psi, iresults_list = VQErun.run_vqe_layerwise(self.vqe_estimator, self.target_model, self.vqe_ansatz, VQEO.VQEOptimizer(opt_cal), num_trainable_layers=num_trainable_layers, save_iresults=True)
+            energies = result.metadata["layerwise"]["energies"]
+            for prev_energy, iresults in zip(energies[:-1], iresults_list[1:]):
+                self.assertAlmostEqual(iresults["energy_values"][0], prev_energy)
+            self.assertAlmostEqual(self.get_energy(result.data.angles.values()), result.data.energy)
+
+    def test_run_vqe_layerwise_full_initial_point(self):
+        # an initial point of the full ansatz is reduced to the parameters of the first stage
+        vqe_ansatz = VQEA.ESU2(2, reps=2)
+        target_model = VQETM.TransverseFieldIsingModel(2, J=1.0, g=-0.5)
+        num_params = vqe_ansatz.circuit.num_parameters
+        num_stage_params = VQEA.ESU2(2, reps=1).circuit.num_parameters
+        param_init = list(np.linspace(0.1, 1.0, num_params))
+        param_dict = dict(zip(vqe_ansatz.circuit.parameters, param_init))
+        for param_map_init in [param_init, param_dict]:
+            opt_cal = VQEO.OptimizerCalibration("L_BFGS_B", 200, "param_shift", param_map_init=param_map_init)
+            result, psi, iresults_list = VQErun.run_vqe_layerwise(self.vqe_estimator, target_model, vqe_ansatz, VQEO.VQEOptimizer(opt_cal), save_iresults=True)
+            np.testing.assert_allclose(iresults_list[0]["circ_params"][0], param_init[num_params-num_stage_params:])
+            self.assertEqual(len(result.data.angles), num_params)
+
+        opt_cal = VQEO.OptimizerCalibration("L_BFGS_B", 200, "param_shift", param_map_init=[0.1]*(num_params-1))
+        self.assertRaises(ValueError, VQErun.run_vqe_layerwise, self.vqe_estimator, target_model, vqe_ansatz, VQEO.VQEOptimizer(opt_cal))
+
+class TestRunVQEQNSPSA(unittest.TestCase):
+    def setUp(self):
+        self.target_model = VQETM.TransverseFieldIsingModel(2, J=1.0, g=-0.5)
+        self.vqe_ansatz = VQEA.ESU2(2, reps=1)
+        est_cal = VQEE.EstimatorCalibration({"run_options": {"shots": None}}, "None", "None", "None", "terra", "statevector")
+        self.vqe_estimator = VQEE.VQEEstimator(est_cal)
+        self.ref_result, self.ref_state = VQErun.run_exact_diagonalization(self.target_model)
+        self.param_init = list(np.random.default_rng(7).random(self.vqe_ansatz.circuit.num_parameters)*2*np.pi)
+
+    def test_run_vqe_qnspsa(self):
+        sampler = self.vqe_estimator.sampler
+        num_sampler_jobs = [0]
+        sampler_run = sampler._run
+        def counting_run(*args, **kwargs):
+            num_sampler_jobs[0] += 1
+            return sampler_run(*args, **kwargs)
+        sampler._run = counting_run
+
+        algorithm_globals.random_seed = 3
+        opt_cal = VQEO.OptimizerCalibration("QNSPSA", 100, "fin_diff", param_map_init=self.param_init)
+        result, psi, iresults = VQErun.run_vqe(self.vqe_estimator, self.target_model, self.vqe_ansatz, VQEO.VQEOptimizer(opt_cal), ref_result=self.ref_result, ref_state=self.ref_state)
+
+        # all fidelities of an iteration are evaluated in one sampler job
+        self.assertEqual(num_sampler_jobs[0], result.data.opt_iterations)
+        self.assertLess(result.data.energy, self.ref_result.data.energy + 0.1)
+
+    def test_run_vqe_2spsa(self):
+        algorithm_globals.random_seed = 3
+        opt_cal = VQEO.OptimizerCalibration("2SPSA", 100, "fin_diff", param_map_init=self.param_init, optimizer_options={"regularization": 1.0})
+        result, psi, iresults = VQErun.run_vqe(self.vqe_estimator, self.target_model, self.vqe_ansatz, VQEO.VQEOptimizer(opt_cal), ref_result=self.ref_result, ref_state=self.ref_state)
+
+        self.assertLess(result.data.energy, self.ref_result.data.energy + 0.1)